@@ -8,7 +8,7 @@ from app.models import db, SinpeSubscription
 
 def add_phone_number():
     """Add the phone number 84966164 to the database"""
-    app = create_app()
+    app = create_app(with_routes=False)
     
     with app.app_context():
         # Check if phone number already exists
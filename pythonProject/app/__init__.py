@@ -3,11 +3,8 @@ SINPE Banking System Flask Application Factory
 """
 
 from flask import Flask
-from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
 from app.models import db
 import os
-import json
 import logging
 from logging.handlers import RotatingFileHandler
 
@@ -31,8 +28,17 @@ def setup_logging(app, project_root):
     app.logger.setLevel(logging.INFO)
     app.logger.info('Banco startup')
 
-def create_app():
-    """Create and configure Flask application"""
+def create_app(with_routes: bool = True, config: dict = None):
+    """
+    Create and configure Flask application
+    
+    Args:
+        with_routes: Register blueprints, sessions, CORS and HTTP middleware.
+            CLI scripts and workers that only need the database pass False
+            and skip importing the request-handling stack.
+        config: Settings overriding the defaults below (e.g. a test
+            database URI or spool path), applied before any extension is created
+    """
     app = Flask(__name__)
     
     # Get the project root directory (where main.py is located)
@@ -51,10 +57,38 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
-    # Load banks configuration
-    banks_config_path = os.path.join(project_root, 'config', 'banks.json')
-    with open(banks_config_path) as f:
-        app.config['BANKS'] = json.load(f)
+    # Load banks configuration (reloaded automatically when the file changes)
+    app.config['BANKS_CONFIG_PATH'] = os.path.join(project_root, 'config', 'banks.json')
+    
+    # Transfers are logged to BCCR in batches; unsent records are kept in this spool
+    # file, created when the first transfer is logged
+    app.config['BCCR_LOG_SPOOL_PATH'] = os.path.join(db_dir, 'bccr_spool.db')
+    
+    # Local mirror of the BCCR subscription directory
+    app.config['BCCR_SYNC_INTERVAL'] = 300  # seconds between incremental syncs
+    app.config['BCCR_SYNC_WATERMARK_COLUMN'] = 'updated_at'
+    
+    # Bloom filter of known SINPE numbers, rebuilt after each mirror sync and
+    # shared by all processes through mmap
+    app.config['PHONE_FILTER_PATH'] = os.path.join(db_dir, 'phone_filter.bloom')
+    app.config['PHONE_FILTER_FP_RATE'] = 0.01
+    
+    # Read replica for GET endpoints (SQLite uses read-only WAL connections when unset)
+    app.config['SQLALCHEMY_READ_URL'] = os.environ.get('DATABASE_READ_URL')
+    app.config['READ_YOUR_WRITES_SECONDS'] = 5
+    
+    # Completed transactions older than this move to transactions_archive
+    app.config['TRANSACTION_ARCHIVE_DAYS'] = 90
+    
+    # Transfers from the same account run one at a time on a per-account lane
+    app.config['TRANSFER_LANES'] = 8
+    app.config['TRANSFER_LANE_QUEUE'] = 200  # queued transfers per lane before 503
+    
+    # Group commit: transfers arriving within a few milliseconds share one commit
+    # (one fsync); when enabled it replaces the per-account lanes
+    app.config['GROUP_COMMIT'] = os.environ.get('GROUP_COMMIT') == '1'
+    app.config['GROUP_COMMIT_WINDOW_MS'] = 5
+    app.config['GROUP_COMMIT_MAX_BATCH'] = 64
     
     # Configure session
     app.config['SESSION_TYPE'] = 'filesystem'
@@ -63,9 +97,69 @@ def create_app():
     app.config['SESSION_COOKIE_HTTPONLY'] = True
     app.config['SESSION_COOKIE_SAMESITE'] = 'Strict'
     
+    # Configure response compression
+    app.config['COMPRESS_MIN_SIZE'] = 500  # bytes
+    app.config['COMPRESS_LEVEL'] = 6
+    
+    # Sampled request traces, as OTLP/JSON lines (or posted to an OTLP collector)
+    app.config['TRACE_SAMPLE_RATE'] = 0.01
+    app.config['TRACE_EXPORT_PATH'] = os.path.join(project_root, 'logs', 'traces.jsonl')
+    app.config['TRACE_EXPORT_URL'] = os.environ.get('OTEL_EXPORTER_OTLP_TRACES_ENDPOINT')
+    
+    # Statements slower than this are logged and EXPLAINed (see /api/admin/queries)
+    app.config['SLOW_QUERY_MS'] = 100
+    
+    # Request profiles (pstats / speedscope JSON), served by /api/admin/profiles
+    app.config['PROFILE_DIR'] = os.path.join(project_root, 'logs', 'profiles')
+    app.config['PROFILE_SAMPLE_RATE'] = 0.0  # share of all requests profiled
+    
+    # Rate limit buckets are per process unless this names a SQLite file shared by
+    # all worker processes on the host (e.g. database/rate_limits.db)
+    app.config['RATE_LIMIT_STORAGE'] = os.environ.get('RATE_LIMIT_STORAGE')
+    
+    # Admin endpoints are open to localhost, or to callers sending this token
+    app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')
+    
+    # Exact recount of the maintained database statistics
+    app.config['STATS_RECONCILE_INTERVAL'] = 3600  # seconds
+    
+    # Checkpoints of hot accounts (see hot_accounts.py) are written in the background
+    app.config['BALANCE_CONSOLIDATE_INTERVAL'] = 30  # seconds
+    
+    app.config.update(config or {})
+    
     # Initialize extensions
     db.init_app(app)
     
+    from app.services.phone_filter import PhoneFilter
+    PhoneFilter.init_app(app)
+    
+    from app.services.bank_registry import BankRegistry
+    from app.services.bccr_transfer_log import BCCRTransferLog
+    from app.services.transfer_executor import TransferExecutor
+    app.extensions['bank_registry'] = BankRegistry(app.config['BANKS_CONFIG_PATH'])
+    app.extensions['bccr_transfer_log'] = BCCRTransferLog(app, app.config['BCCR_LOG_SPOOL_PATH'])
+    app.extensions['transfer_executor'] = TransferExecutor(
+        app, app.config['TRANSFER_LANES'], app.config['TRANSFER_LANE_QUEUE']
+    )
+    if app.config['GROUP_COMMIT']:
+        from app.services.group_commit import GroupCommitter
+        app.extensions['group_committer'] = GroupCommitter(
+            app, app.config['GROUP_COMMIT_WINDOW_MS'] / 1000, app.config['GROUP_COMMIT_MAX_BATCH']
+        )
+    
+    if with_routes:
+        register_http(app)
+    
+    # Log startup
+    app.logger.info(f'Bank {app.extensions["bank_registry"].local.name} initialized')
+    
+    return app
+
+def register_http(app):
+    """Attach CORS, sessions, HTTP middleware and all API blueprints"""
+    from flask_cors import CORS
+    
     # Configure CORS
     CORS(app, 
          origins=["http://localhost:5173", "http://127.0.0.1:5173"],
@@ -73,6 +167,38 @@ def create_app():
          allow_headers=["Content-Type", "Authorization"],
          supports_credentials=True)
     
+    # Trace requests (first, so requests refused by later middleware are traced too)
+    from app.middleware.tracing import init_tracing
+    init_tracing(app)
+    
+    # Profile requests flagged by an admin (X-Profile / ?profile=) or a sampled share
+    from app.middleware.profiling import init_profiling
+    init_profiling(app)
+    
+    # Record request metrics (registered first so its timing includes compression)
+    from app.middleware.metrics import init_metrics
+    init_metrics(app)
+    
+    # Per-fingerprint SQL statistics; slow statements are logged with their plan
+    from app.middleware.query_log import init_query_log
+    init_query_log(app)
+    
+    # Token-bucket rate limits per user, peer bank or client IP
+    from app.middleware.rate_limit import init_rate_limit
+    init_rate_limit(app)
+    
+    # Bound in-flight requests; shed listing/admin work before transfers queue
+    from app.middleware.admission import init_admission
+    init_admission(app)
+    
+    # Serve read-only GETs from a read-only engine (replica or WAL read connections)
+    from app.middleware.read_routing import init_read_routing
+    init_read_routing(app)
+    
+    # Compress large JSON responses
+    from app.middleware.compression import init_compression
+    init_compression(app)
+    
     # Register blueprints
     from app.routes.sinpe_routes import sinpe_bp
     from app.routes.user_routes import user_bp
@@ -80,6 +206,8 @@ def create_app():
     from app.routes.transaction_routes import transaction_bp
     from app.routes.phone_link_routes import phone_link_bp
     from app.routes.auth_routes import auth_bp
+    from app.routes.import_routes import import_bp
+    from app.routes.admin_routes import admin_bp
     
     # Initialize session
     from flask_session import Session
@@ -91,13 +219,10 @@ def create_app():
     app.register_blueprint(transaction_bp, url_prefix='/api')
     app.register_blueprint(phone_link_bp, url_prefix='/api')
     app.register_blueprint(auth_bp, url_prefix='/api')
+    app.register_blueprint(import_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api')
     
     # Health check endpoint
     @app.route('/health')
     def health_check():
         return {'status': 'healthy', 'message': 'SINPE Banking System API'}
-    
-    # Log startup
-    app.logger.info(f'Bank {app.config["BANKS"]["0666"]["name"]} initialized')
-    
-    return app
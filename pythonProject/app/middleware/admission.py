@@ -0,0 +1,170 @@
+"""
+Admission Middleware - Bound in-flight requests and shed low-priority work first
+"""
+
+import threading
+import time
+from flask import g, jsonify, request
+from app.services.metrics_service import MetricsService
+from app.utils.hmac_generator import generate_nack_response
+
+# Priority classes, most important first
+PRIORITIES = ('transfer', 'validation', 'listing', 'admin')
+
+# Class by endpoint ('blueprint.function'), then by blueprint; anything else is 'listing'
+ROUTE_CLASSES = {
+    'sinpe.handle_sinpe_transfer': 'transfer',
+    'sinpe.handle_sinpe_movil': 'transfer',
+    'transactions.create_transaction': 'transfer',
+    'sinpe': 'validation',
+    'auth': 'validation',
+    'admin': 'admin',
+    'imports': 'admin',
+}
+
+# Requests handled at once by this process
+MAX_IN_FLIGHT = 32
+
+# Share of MAX_IN_FLIGHT each class may occupy, so the rest stays free for higher classes
+SHARES = {'transfer': 1.0, 'validation': 0.75, 'listing': 0.5, 'admin': 0.25}
+
+# Seconds a request of each class may wait for a slot before 503
+MAX_WAIT = {'transfer': 5.0, 'validation': 1.0, 'listing': 0.25, 'admin': 0.0}
+
+# Average admission wait above which listing and admin requests are shed outright
+TARGET_WAIT_MS = 50
+
+# Weight of the newest wait in the moving average
+EWMA_WEIGHT = 0.2
+
+# Seconds for the average to halve when no request has waited since
+WAIT_HALF_LIFE = 1.0
+
+
+class AdmissionController:
+    """
+    Counts in-flight requests and decides which ones may start
+
+    A class is admitted while fewer than its share of MAX_IN_FLIGHT
+    requests are running; otherwise it waits for a slot up to its
+    MAX_WAIT. Transfers can use every slot and wait longest, admin work
+    only a quarter and never waits. When the moving average of admission
+    waits rises above the target, listing and admin requests are refused
+    immediately, before transfers start queueing behind them.
+    """
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, shares: dict = None, max_wait: dict = None,
+                 target_wait_ms: float = TARGET_WAIT_MS):
+        self.max_in_flight = max_in_flight
+        self.shares = shares or SHARES
+        self.max_wait = max_wait or MAX_WAIT
+        self.target_wait_ms = target_wait_ms
+        self.in_flight = 0
+        self._wait_ms = 0.0
+        self._wait_updated = time.monotonic()
+        self.shed = dict.fromkeys(PRIORITIES, 0)
+        self._cond = threading.Condition()
+
+    def limit(self, priority: str) -> int:
+        return max(1, int(self.max_in_flight * self.shares.get(priority, 0.5)))
+
+    @property
+    def wait_ms(self) -> float:
+        """Moving average of admission waits, decaying while nothing is admitted"""
+        idle = time.monotonic() - self._wait_updated
+        return self._wait_ms * 0.5 ** (idle / WAIT_HALF_LIFE)
+
+    def overloaded(self) -> bool:
+        return self.wait_ms > self.target_wait_ms
+
+    def admit(self, priority: str) -> bool:
+        """
+        Take a slot for a request of the given class
+
+        Returns:
+            bool: True if admitted (call release() when done), False if shed
+        """
+        started = time.perf_counter()
+        limit = self.limit(priority)
+        with self._cond:
+            if self.overloaded() and PRIORITIES.index(priority) >= PRIORITIES.index('listing'):
+                self.shed[priority] += 1
+                return False
+
+            deadline = started + self.max_wait.get(priority, 0.0)
+            while self.in_flight >= limit:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self.shed[priority] += 1
+                    return False
+                self._cond.wait(remaining)
+
+            self.in_flight += 1
+            waited = (time.perf_counter() - started) * 1000
+            average = self.wait_ms
+            self._wait_ms = average + EWMA_WEIGHT * (waited - average)
+            self._wait_updated = time.monotonic()
+            return True
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+
+def route_priority(route_classes: dict) -> str:
+    """Priority class of the current request"""
+    return route_classes.get(request.endpoint) or route_classes.get(request.blueprint) or 'listing'
+
+
+def init_admission(app):
+    """
+    Register admission control on a Flask application
+
+    Only blueprint routes are controlled; /health always answers. Shed
+    requests get 503 with Retry-After.
+
+    Configuration keys:
+        ADMISSION_ENABLED: Turn admission control on or off
+        ADMISSION_MAX_IN_FLIGHT: Requests handled at once by one process
+        ADMISSION_ROUTE_CLASSES: Priority class per endpoint or blueprint
+        ADMISSION_TARGET_WAIT_MS: Average wait above which low classes are shed
+    """
+    app.config.setdefault('ADMISSION_ENABLED', True)
+    app.config.setdefault('ADMISSION_MAX_IN_FLIGHT', MAX_IN_FLIGHT)
+    app.config.setdefault('ADMISSION_ROUTE_CLASSES', ROUTE_CLASSES)
+    app.config.setdefault('ADMISSION_TARGET_WAIT_MS', TARGET_WAIT_MS)
+
+    if not app.config['ADMISSION_ENABLED']:
+        return app
+
+    controller = AdmissionController(
+        app.config['ADMISSION_MAX_IN_FLIGHT'], target_wait_ms=app.config['ADMISSION_TARGET_WAIT_MS']
+    )
+    app.extensions['admission'] = controller
+    route_classes = app.config['ADMISSION_ROUTE_CLASSES']
+
+    MetricsService.register_gauge('admission_in_flight', lambda: controller.in_flight)
+    MetricsService.register_gauge('admission_wait_ms', lambda: round(controller.wait_ms, 2))
+    MetricsService.register_gauge('admission_shed', lambda: sum(controller.shed.values()))
+
+    @app.before_request
+    def admit_request():
+        if request.blueprint is None:
+            return None
+        priority = route_priority(route_classes)
+        if controller.admit(priority):
+            g.admitted = True
+            return None
+
+        response = jsonify(generate_nack_response('Server busy, try again later'))
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+
+    @app.teardown_request
+    def release_request(exc):
+        if g.pop('admitted', False):
+            controller.release()
+
+    return app
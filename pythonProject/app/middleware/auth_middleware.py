@@ -3,6 +3,7 @@ Authentication Middleware - Handle user authentication and bank identification
 """
 
 from functools import wraps
+import hmac
 from flask import session, request, jsonify, g, current_app
 from app.models import User, db
 from app.utils.hmac_generator import verify_hmac, generate_nack_response
@@ -47,18 +48,18 @@ def validate_bank_request(f):
         if not bank_code:
             return jsonify(generate_nack_response('Bank identification required')), 400
             
-        # Load banks configuration
-        from flask import current_app
-        banks_config = current_app.config.get('BANKS', {})
+        # Look up the calling bank by any form of its code
+        from app.services.bank_registry import BankRegistry
+        bank = BankRegistry.current().get(bank_code)
         
-        if bank_code not in banks_config:
+        if not bank:
             return jsonify(generate_nack_response('Invalid bank code')), 403
             
         # Add bank info to request context
         g.bank_info = {
-            'code': bank_code,
-            'name': banks_config[bank_code]['name'],
-            'url': banks_config[bank_code]['url']
+            'code': bank.code,
+            'name': bank.name,
+            'url': bank.url
         }
         
         # Log bank request
@@ -93,3 +94,38 @@ def require_sinpe_auth(f):
         
         return f(*args, **kwargs)
     return decorated_function
+
+def is_admin_request() -> bool:
+    """Whether the current request comes from localhost or carries the admin token"""
+    token = current_app.config.get('ADMIN_TOKEN')
+    is_local = request.remote_addr in ('127.0.0.1', '::1')
+    return is_local or bool(token and hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token))
+
+def signed_bank():
+    """
+    Peer bank that signed the current request, or None
+
+    X-Bank-Code alone proves nothing; the bank is only returned when the
+    body is a transfer with a valid HMAC naming that bank as the sender.
+    """
+    bank_code = request.headers.get('X-Bank-Code')
+    data = request.get_json(silent=True)
+    if not bank_code or not isinstance(data, dict) or not isinstance(data.get('sender'), dict):
+        return None
+    
+    from app.services.bank_registry import BankRegistry, canonical_code
+    bank = BankRegistry.current().get(bank_code)
+    sender_code = data['sender'].get('bank_code')
+    if not bank or not sender_code or canonical_code(sender_code) != bank.code:
+        return None
+    return bank if verify_hmac(data, str(data.get('hmac_md5', ''))) else None
+
+def admin_required(f):
+    """Decorator restricting operational endpoints to localhost or an admin token"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not is_admin_request():
+            return jsonify(generate_nack_response('Admin access required')), 403
+            
+        return f(*args, **kwargs)
+    return decorated_function
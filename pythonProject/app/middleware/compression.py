@@ -0,0 +1,208 @@
+"""
+Compression Middleware - Negotiated gzip/deflate/brotli response compression
+"""
+
+import zlib
+from flask import request
+
+# Preference order when the client accepts several encodings with equal weight
+SUPPORTED_ENCODINGS = ('br', 'gzip', 'deflate')
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'text/html',
+    'text/plain',
+    'text/csv',
+    'text/css',
+    'application/javascript',
+}
+
+
+def _load_brotli():
+    """Import brotli lazily; it is an optional dependency"""
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """
+    Parse an Accept-Encoding header into a mapping of coding -> q-value
+
+    Args:
+        header: Raw Accept-Encoding header value
+
+    Returns:
+        dict: Lower-cased codings with their quality weights
+    """
+    weights = {}
+    for part in (header or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip().lower()] = quality
+    return weights
+
+
+def choose_encoding(header: str, available=SUPPORTED_ENCODINGS):
+    """
+    Pick the best content coding the client accepts
+
+    Args:
+        header: Raw Accept-Encoding header value
+        available: Codings the server can produce, in preference order
+
+    Returns:
+        str: Selected coding or None to send the body uncompressed
+    """
+    weights = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = weights.get(coding, weights.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class StreamCompressor:
+    """Incremental compressor with a uniform compress/flush interface"""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == 'br':
+            brotli = _load_brotli()
+            # Brotli quality goes up to 11; map the zlib-style level onto it
+            self._compressor = brotli.Compressor(quality=min(11, max(0, level)))
+        elif encoding == 'gzip':
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """Flush buffered output so the client can decode what it has so far"""
+        if self.encoding == 'br':
+            return self._compressor.flush()
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def compress_stream(chunks, compressor: StreamCompressor, flush_size: int = 8192):
+    """
+    Compress an iterable of body chunks lazily
+
+    Chunks are fed to the compressor as they are produced and a sync flush is
+    issued once at least ``flush_size`` input bytes are pending, so streamed
+    responses reach the client incrementally and the full body is never held
+    in memory.
+    """
+    pending = 0
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            pending += len(chunk)
+            if pending >= flush_size:
+                data += compressor.flush()
+                pending = 0
+            if data:
+                yield data
+        tail = compressor.finish()
+        if tail:
+            yield tail
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def _is_compressible(response, app) -> bool:
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if response.direct_passthrough:
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    if response.mimetype not in app.config['COMPRESS_MIMETYPES']:
+        return False
+    if not response.is_streamed:
+        length = response.calculate_content_length()
+        if length is None or length < app.config['COMPRESS_MIN_SIZE']:
+            return False
+    return True
+
+
+def init_compression(app):
+    """
+    Register the response compression hook on a Flask application
+
+    Configuration keys:
+        COMPRESS_ENABLED: Turn compression on or off
+        COMPRESS_MIN_SIZE: Smallest non-streamed body (bytes) worth compressing
+        COMPRESS_LEVEL: zlib/brotli compression level
+        COMPRESS_ALGORITHMS: Codings offered, in preference order
+        COMPRESS_MIMETYPES: Content types eligible for compression
+        COMPRESS_STREAM_FLUSH_SIZE: Input bytes between flushes of a streamed body
+    """
+    app.config.setdefault('COMPRESS_ENABLED', True)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_ALGORITHMS', SUPPORTED_ENCODINGS)
+    app.config.setdefault('COMPRESS_MIMETYPES', COMPRESSIBLE_MIMETYPES)
+    app.config.setdefault('COMPRESS_STREAM_FLUSH_SIZE', 8192)
+
+    available = tuple(
+        coding for coding in app.config['COMPRESS_ALGORITHMS']
+        if coding != 'br' or _load_brotli() is not None
+    )
+
+    @app.after_request
+    def compress_response(response):
+        if not app.config['COMPRESS_ENABLED']:
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        if not _is_compressible(response, app):
+            return response
+
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''), available)
+        if not encoding:
+            return response
+
+        compressor = StreamCompressor(encoding, app.config['COMPRESS_LEVEL'])
+
+        if response.is_streamed:
+            response.response = compress_stream(
+                response.response, compressor, app.config['COMPRESS_STREAM_FLUSH_SIZE']
+            )
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            response.set_data(compressor.compress(body) + compressor.finish())
+
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    return app
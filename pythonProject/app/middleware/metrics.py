@@ -0,0 +1,63 @@
+"""
+Metrics Middleware - Record request latency/status and database write time
+"""
+
+import time
+from flask import g, request
+from sqlalchemy import event
+from app.models import db
+from app.services.metrics_service import MetricsService
+
+_WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def _instrument_engine(engine):
+    """Time write statements; on SQLite this includes waiting for the write lock"""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info['metrics_started'] = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('metrics_started', None)
+        if started is not None and statement.lstrip()[:7].upper().startswith(_WRITE_VERBS):
+            MetricsService.record_db_write((time.perf_counter() - started) * 1000)
+
+    pool = engine.pool
+    if hasattr(pool, 'checkedout'):
+        MetricsService.register_gauge('db_connections_in_use', pool.checkedout)
+
+
+def init_metrics(app):
+    """
+    Register request metrics hooks on a Flask application
+
+    Configuration keys:
+        METRICS_ENABLED: Turn request/database metrics on or off
+        METRICS_EXCLUDE_PATHS: Request path prefixes not counted (the
+            metrics endpoint itself, so polling does not skew the figures)
+    """
+    app.config.setdefault('METRICS_ENABLED', True)
+    app.config.setdefault('METRICS_EXCLUDE_PATHS', ('/api/admin/metrics',))
+
+    if not app.config['METRICS_ENABLED']:
+        return app
+
+    with app.app_context():
+        _instrument_engine(db.engine)
+
+    excluded = tuple(app.config['METRICS_EXCLUDE_PATHS'])
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None and not request.path.startswith(excluded):
+            MetricsService.record_request((time.perf_counter() - started) * 1000, response.status_code)
+        return response
+
+    return app
@@ -0,0 +1,86 @@
+"""
+Profiling Middleware - Profile requests flagged by an admin or picked at random
+"""
+
+import random
+import uuid
+from flask import g, request
+from app.middleware.auth_middleware import is_admin_request
+from app.services.profiler import Profiler, SAMPLE_INTERVAL
+
+
+def _requested_mode():
+    """Profiler asked for by an admin with X-Profile or ?profile= ('sample' or anything else for cProfile)"""
+    flag = request.headers.get('X-Profile') or request.args.get('profile')
+    if not flag or flag in ('0', 'false') or not is_admin_request():
+        return None
+    return 'sample' if flag == 'sample' else 'cprofile'
+
+
+def _finish(response=None):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return
+    trace = g.get('trace')
+    # The trace id may come from the client and is shared by every request of a
+    # trace; the root span id is this request's own
+    request_id = trace[0].span_id if trace else uuid.uuid4().hex
+    rule = request.url_rule.rule if request.url_rule else request.path
+    entry = Profiler.finish(profile, request_id, f"{request.method} {rule}", trace[0].trace_id if trace else None)
+    if response is not None:
+        response.headers['X-Profile-Id'] = entry['id']
+
+
+def init_profiling(app):
+    """
+    Profile single requests on demand
+
+    An admin (see admin_required) profiles any request by sending
+    X-Profile: 1 or ?profile=1 (cProfile), or 'sample' for the stack
+    sampler; flags from anyone else are ignored. PROFILE_SAMPLE_RATE
+    additionally profiles a share of all requests. The profile id (the
+    request's root span id) is returned in X-Profile-Id; profiles, with
+    their trace id, and the aggregated hot functions are served by
+    /api/admin/profiles.
+
+    Configuration keys:
+        PROFILING_ENABLED: Turn profiling on or off
+        PROFILE_SAMPLE_RATE: Share of all requests profiled
+        PROFILE_SAMPLE_MODE: Profiler used for those ('sample' or 'cprofile')
+        PROFILE_SAMPLE_INTERVAL_MS: Stack sampling interval
+        PROFILE_DIR: Directory profiles are written to
+        PROFILE_KEEP: Profiles kept before the oldest are deleted
+    """
+    app.config.setdefault('PROFILING_ENABLED', True)
+    app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+    app.config.setdefault('PROFILE_SAMPLE_MODE', 'sample')
+    app.config.setdefault('PROFILE_SAMPLE_INTERVAL_MS', SAMPLE_INTERVAL * 1000)
+    app.config.setdefault('PROFILE_DIR', None)
+    app.config.setdefault('PROFILE_KEEP', 200)
+
+    if not app.config['PROFILING_ENABLED']:
+        return app
+
+    Profiler.configure(app.config['PROFILE_DIR'], app.config['PROFILE_KEEP'])
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    interval = app.config['PROFILE_SAMPLE_INTERVAL_MS'] / 1000
+
+    @app.before_request
+    def start_profile():
+        mode = _requested_mode()
+        if mode is None and rate and random.random() < rate:
+            mode = app.config['PROFILE_SAMPLE_MODE']
+        if mode:
+            g.profile = Profiler.start(mode, interval)
+
+    @app.after_request
+    def finish_profile(response):
+        _finish(response)
+        return response
+
+    @app.teardown_request
+    def abandon_profile(exc):
+        # Requests that raised never reach after_request
+        _finish()
+
+    return app
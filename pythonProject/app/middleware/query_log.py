@@ -0,0 +1,57 @@
+"""
+Query Log Middleware - Time every SQL statement and keep the slow ones with their plans
+"""
+
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.services.query_stats import QueryStats, SLOW_QUERY_MS
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('query_started', None)
+    if started is not None:
+        QueryStats.record(conn, statement, parameters, (time.perf_counter() - started) * 1000, executemany)
+
+
+def _on_error(exception_context):
+    conn = exception_context.connection
+    started = conn.info.pop('query_started', None) if conn is not None else None
+    if started is not None and exception_context.statement:
+        QueryStats.record(
+            conn, exception_context.statement, exception_context.parameters,
+            (time.perf_counter() - started) * 1000, error=str(exception_context.original_exception)
+        )
+
+
+def init_query_log(app):
+    """
+    Record timing statistics for every SQL statement
+
+    Listens on every engine (the primary and the read engine), grouping
+    statements by fingerprint. Results are served by /api/admin/queries.
+
+    Configuration keys:
+        SLOW_QUERY_LOG_ENABLED: Turn statement statistics on or off
+        SLOW_QUERY_MS: Duration above which a statement is logged as slow
+        SLOW_QUERY_EXPLAIN: Capture the plan of slow statements with EXPLAIN
+    """
+    app.config.setdefault('SLOW_QUERY_LOG_ENABLED', True)
+    app.config.setdefault('SLOW_QUERY_MS', SLOW_QUERY_MS)
+    app.config.setdefault('SLOW_QUERY_EXPLAIN', True)
+
+    if not app.config['SLOW_QUERY_LOG_ENABLED']:
+        return app
+
+    QueryStats.configure(app.config['SLOW_QUERY_MS'], app.config['SLOW_QUERY_EXPLAIN'])
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_execute)
+        event.listen(Engine, 'handle_error', _on_error)
+
+    return app
@@ -0,0 +1,207 @@
+"""
+Rate Limit Middleware - Token buckets per user, peer bank or client IP
+"""
+
+import logging
+import math
+import sqlite3
+import threading
+import time
+from flask import jsonify, request, session
+from app.utils.hmac_generator import generate_nack_response
+
+logger = logging.getLogger(__name__)
+
+# Limits by endpoint ('blueprint.function'), then by blueprint, then 'default'
+RATE_LIMITS = {
+    'sinpe.handle_sinpe_transfer': '60/minute',
+    'sinpe.handle_sinpe_movil': '60/minute',
+    'sinpe.validate_sinpe_movil': '20/second',
+    'sinpe.validate_sinpe_movil_bulk': '5/second',
+    'auth.login': '10/minute',
+    'sinpe': '50/second',
+}
+
+# In-memory buckets kept before idle (full) ones are dropped
+MAX_BUCKETS = 100000
+
+# Stored buckets untouched for this long (the longest refill period) are deleted
+IDLE_SECONDS = 86400
+
+# Takes per worker thread between deletions of idle stored buckets
+PRUNE_EVERY = 1000
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(limit: str) -> tuple:
+    """
+    Parse 'N/period' (second, minute, hour or day) into a bucket size and refill rate
+
+    Returns:
+        tuple: (capacity, tokens per second)
+    """
+    count, _, period = limit.partition('/')
+    seconds = _PERIODS.get(period.strip().lower())
+    if seconds is None or not count.strip().isdigit() or int(count) <= 0:
+        raise ValueError(f"Invalid rate limit: {limit!r}")
+    return int(count), int(count) / seconds
+
+
+def refill(tokens: float, updated: float, capacity: int, rate: float, now: float) -> tuple:
+    """
+    Take one token from a bucket
+
+    Returns:
+        tuple: (tokens left, seconds to wait; 0 if the token was granted)
+    """
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryStore:
+    """Buckets in a dict; per process"""
+
+    def __init__(self, max_buckets: int = MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, rate: float, now: float = None) -> float:
+        """Take a token; returns seconds to wait (0 if granted)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now, capacity, rate))[:2]
+            tokens, wait = refill(tokens, updated, capacity, rate, now)
+            self._buckets[key] = (tokens, now, capacity, rate)
+            if len(self._buckets) > self.max_buckets:
+                self._prune(now)
+            return wait
+
+    def _prune(self, now: float):
+        # A bucket that has refilled completely is the same as a missing one
+        idle = [
+            key for key, (tokens, updated, capacity, rate) in self._buckets.items()
+            if tokens + (now - updated) * rate >= capacity
+        ]
+        for key in idle:
+            del self._buckets[key]
+
+
+class SQLiteStore:
+    """
+    Buckets in a local SQLite file, shared by every worker process on the host
+
+    Each take is one primary-key read and upsert inside a BEGIN IMMEDIATE
+    transaction. If the file cannot be used in time the request is let
+    through rather than failed.
+    """
+
+    def __init__(self, path: str, timeout: float = 0.2):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, capacity: int, rate: float, now: float = None) -> float:
+        """Take a token; returns seconds to wait (0 if granted)"""
+        now = time.time() if now is None else now
+        try:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE key = ?', (key,)).fetchone()
+                tokens, wait = refill(*(row or (capacity, now)), capacity, rate, now)
+                conn.execute(
+                    'INSERT INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                    (key, tokens, now)
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+            self._local.takes = getattr(self._local, 'takes', 0) + 1
+            if self._local.takes % PRUNE_EVERY == 0:
+                conn.execute('DELETE FROM rate_buckets WHERE updated < ?', (now - IDLE_SECONDS,))
+            return wait
+        except sqlite3.Error as e:
+            logger.warning(f"Rate limit store unavailable, allowing request: {e}")
+            return 0.0
+
+
+def client_identity() -> str:
+    """Who a request is counted against: the session user, a verified peer bank, or the client IP"""
+    user_id = session.get('user_id')
+    if user_id:
+        return f'user:{user_id}'
+
+    # X-Bank-Code alone proves nothing: only a signed transfer from that bank
+    # uses its bucket, anything else (unknown codes included) counts against the IP
+    from app.middleware.auth_middleware import signed_bank
+    bank = signed_bank()
+    if bank:
+        return f'bank:{bank.code}'
+
+    return f'ip:{request.remote_addr}'
+
+
+def init_rate_limit(app):
+    """
+    Register token-bucket rate limiting on a Flask application
+
+    Every request to a limited endpoint takes a token from the bucket of
+    (limit, client identity); an empty bucket answers 429 with Retry-After.
+
+    Configuration keys:
+        RATE_LIMIT_ENABLED: Turn rate limiting on or off
+        RATE_LIMITS: 'N/period' per endpoint, blueprint or 'default'
+        RATE_LIMIT_STORAGE: SQLite file shared by worker processes
+            (default: per-process memory). The file is written with
+            synchronous=OFF: buckets may be lost on a crash, never corrupted.
+    """
+    app.config.setdefault('RATE_LIMIT_ENABLED', True)
+    app.config.setdefault('RATE_LIMITS', RATE_LIMITS)
+    app.config.setdefault('RATE_LIMIT_STORAGE', None)
+
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return app
+
+    limits = {name: parse_limit(limit) for name, limit in app.config['RATE_LIMITS'].items() if limit}
+    path = app.config['RATE_LIMIT_STORAGE']
+    store = SQLiteStore(path) if path else MemoryStore()
+    app.extensions['rate_limit_store'] = store
+
+    @app.before_request
+    def enforce_rate_limit():
+        for name in (request.endpoint, request.blueprint, 'default'):
+            if name in limits:
+                break
+        else:
+            return None
+
+        capacity, rate = limits[name]
+        wait = store.take(f'{name}|{client_identity()}', capacity, rate)
+        if not wait:
+            return None
+
+        response = jsonify(generate_nack_response('Too many requests'))
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+        return response
+
+    return app
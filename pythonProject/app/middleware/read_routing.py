@@ -0,0 +1,138 @@
+"""
+Read Routing Middleware - Serve read-only GET requests from a read-only engine
+"""
+
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import create_engine, event
+from app.models import db
+from app.models.routing import RoutingSession
+
+# Blueprints whose GET requests may read from the read engine
+READ_ROUTED_BLUEPRINTS = ('accounts', 'users', 'transactions', 'phone_links')
+
+# Seconds after a client's write during which its reads stay on the primary
+READ_YOUR_WRITES_SECONDS = 5
+
+READ_PRIMARY_COOKIE = 'read_primary_until'
+
+
+def read_primary():
+    """Send the rest of the current request's queries to the primary engine"""
+    g.db_read_only = False
+
+
+def remember_write():
+    """
+    Record that the current request has written, so its client reads from the primary
+
+    Flushes in the request thread are recorded automatically; work run on
+    another thread (transfer lanes, the group committer) has no request
+    context, so its caller records it.
+    """
+    if has_request_context():
+        g.db_read_only = False
+        g.db_wrote = True
+
+
+def _on_flush(session, flush_context):
+    # The request has written: later reads must see those writes
+    remember_write()
+
+
+def _create_reader(app, primary):
+    """
+    Read-only engine for the configured database, or None if reads cannot be split
+
+    PostgreSQL (or anything else): SQLALCHEMY_READ_URL, typically a replica,
+    with every transaction started READ ONLY. SQLite: the same file opened
+    with mode=ro and query_only, after switching it to WAL so readers never
+    wait for a writer's commit.
+    """
+    url = app.config.get('SQLALCHEMY_READ_URL')
+    if url:
+        reader = create_engine(url, pool_pre_ping=True)
+        if reader.dialect.name == 'postgresql':
+            @event.listens_for(reader, 'connect')
+            def set_read_only(dbapi_connection, connection_record):
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute('SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY')
+        return reader
+
+    path = primary.url.database
+    if primary.dialect.name != 'sqlite' or not path or path == ':memory:':
+        return None
+
+    @event.listens_for(primary, 'connect')
+    def use_wal(dbapi_connection, connection_record):
+        # Persistent once set; done on first use so creating the app never touches the file
+        dbapi_connection.execute('PRAGMA journal_mode=WAL')
+
+    reader = create_engine(f'sqlite:///file:{path}?mode=ro&uri=true')
+
+    @event.listens_for(reader, 'connect')
+    def set_query_only(dbapi_connection, connection_record):
+        dbapi_connection.execute('PRAGMA query_only = ON')
+
+    return reader
+
+
+def init_read_routing(app):
+    """
+    Route reads of read-only requests to a separate engine
+
+    GET/HEAD requests to READ_ROUTED_BLUEPRINTS read through
+    app.extensions['db_reader']. A client that has just written (any
+    request that flushed to the database) gets a short-lived cookie that
+    keeps its reads on the primary, so it sees its own transfer; a request
+    can also ask for the primary with an X-Read-Primary: 1 header.
+
+    Configuration keys:
+        DB_READ_ROUTING: Turn routing on or off
+        SQLALCHEMY_READ_URL: Read replica URL (default: read-only WAL
+            connections to the SQLite file)
+        READ_YOUR_WRITES_SECONDS: How long a client's reads stay on the
+            primary after it writes
+    """
+    app.config.setdefault('DB_READ_ROUTING', True)
+    app.config.setdefault('READ_YOUR_WRITES_SECONDS', READ_YOUR_WRITES_SECONDS)
+    app.config.setdefault('READ_ROUTED_BLUEPRINTS', READ_ROUTED_BLUEPRINTS)
+
+    if not app.config['DB_READ_ROUTING']:
+        return app
+
+    with app.app_context():
+        reader = _create_reader(app, db.engine)
+    if reader is None:
+        return app
+    app.extensions['db_reader'] = reader
+
+    if not event.contains(RoutingSession, 'after_flush', _on_flush):
+        event.listen(RoutingSession, 'after_flush', _on_flush)
+
+    blueprints = tuple(app.config['READ_ROUTED_BLUEPRINTS'])
+    window = app.config['READ_YOUR_WRITES_SECONDS']
+
+    @app.before_request
+    def route_reads():
+        if request.method not in ('GET', 'HEAD') or request.blueprint not in blueprints:
+            return
+        if request.headers.get('X-Read-Primary') == '1':
+            return
+        try:
+            if float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time():
+                return
+        except ValueError:
+            pass
+        g.db_read_only = True
+
+    @app.after_request
+    def remember_write(response):
+        if g.get('db_wrote') and response.status_code < 400 and window:
+            response.set_cookie(
+                READ_PRIMARY_COOKIE, str(time.time() + window), max_age=window,
+                httponly=True, samesite='Strict', secure=app.config.get('SESSION_COOKIE_SECURE', False)
+            )
+        return response
+
+    return app
@@ -0,0 +1,101 @@
+"""
+Tracing Middleware - One trace per request, with spans for every SQL statement
+"""
+
+import time
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.middleware.auth_middleware import is_admin_request, signed_bank
+from app.services.tracing import Tracer, Span, FileExporter, OTLPHttpExporter, MAX_STATEMENT_LENGTH
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = Tracer.current()
+    if parent is not None and parent.sampled:
+        span = Span('db.query', parent.trace_id, parent.span_id, True, 'client', parent.trace)
+        span.set('db.system', conn.dialect.name)
+        span.set('db.statement', statement[:MAX_STATEMENT_LENGTH])
+        conn.info['trace_span'] = span
+
+
+def _finish(conn, error: str = None):
+    span = conn.info.pop('trace_span', None) if conn is not None else None
+    if span is not None:
+        span.end_ns = time.time_ns()
+        span.error = error
+        span.trace.append(span)
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    _finish(conn)
+
+
+def _on_error(exception_context):
+    _finish(exception_context.connection, str(exception_context.original_exception)[:MAX_STATEMENT_LENGTH])
+
+
+def init_tracing(app):
+    """
+    Trace requests and export sampled traces
+
+    Each request starts a trace, continuing an incoming W3C traceparent
+    header; the trace id is returned in X-Trace-Id. Its sampled flag is
+    only followed for admins and signed peer bank transfers; other
+    requests are sampled at TRACE_SAMPLE_RATE. Every engine's SQL
+    statements become child spans of the active one.
+
+    Configuration keys:
+        TRACING_ENABLED: Turn tracing on or off
+        TRACE_SAMPLE_RATE: Share of new traces exported
+        TRACE_EXPORT_URL: OTLP/HTTP JSON traces endpoint
+        TRACE_EXPORT_PATH: File receiving one OTLP/JSON trace per line
+            (used when no URL is set)
+    """
+    app.config.setdefault('TRACING_ENABLED', True)
+    app.config.setdefault('TRACE_SAMPLE_RATE', 0.01)
+    app.config.setdefault('TRACE_EXPORT_URL', None)
+    app.config.setdefault('TRACE_EXPORT_PATH', None)
+
+    if not app.config['TRACING_ENABLED']:
+        return app
+
+    if app.config['TRACE_EXPORT_URL']:
+        exporter = OTLPHttpExporter(app.config['TRACE_EXPORT_URL'])
+    elif app.config['TRACE_EXPORT_PATH']:
+        exporter = FileExporter(app.config['TRACE_EXPORT_PATH'])
+    else:
+        exporter = None
+    Tracer.configure(exporter, app.config['TRACE_SAMPLE_RATE'])
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_execute)
+        event.listen(Engine, 'handle_error', _on_error)
+
+    @app.before_request
+    def start_trace():
+        rule = request.url_rule.rule if request.url_rule else request.path
+        traceparent = request.headers.get('traceparent')
+        g.trace = Tracer.start_trace(
+            f"{request.method} {rule}", traceparent,
+            trust_sampled=bool(traceparent) and (is_admin_request() or signed_bank() is not None),
+            **{'http.method': request.method, 'http.target': request.path, 'http.route': rule}
+        )
+
+    @app.after_request
+    def tag_response(response):
+        trace = g.get('trace')
+        if trace:
+            trace[0].set('http.status_code', response.status_code)
+            response.headers['X-Trace-Id'] = trace[0].trace_id
+        return response
+
+    @app.teardown_request
+    def end_trace(exc):
+        trace = g.pop('trace', None)
+        if trace:
+            span, token = trace
+            Tracer.end_trace(span, token, f"{type(exc).__name__}: {exc}" if exc else None)
+
+    return app
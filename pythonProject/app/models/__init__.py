@@ -3,10 +3,11 @@ Database Models for SINPE Banking System
 """
 
 from flask_sqlalchemy import SQLAlchemy
+from app.models.routing import RoutingSession
 from datetime import datetime
 from decimal import Decimal
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -36,7 +37,8 @@ class Account(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     number = db.Column(db.String(30), unique=True, nullable=False)
     currency = db.Column(db.String(3), nullable=False, default='CRC')
-    balance = db.Column(db.Numeric(15, 2), default=Decimal('0.00'))
+    # Balance the account was opened (or migrated) with; movements live in the ledger
+    opening_balance = db.Column('balance', db.Numeric(15, 2), default=Decimal('0.00'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -45,12 +47,26 @@ class Account(db.Model):
     sent_transactions = db.relationship('Transaction', foreign_keys='Transaction.from_account_id', back_populates='from_account')
     received_transactions = db.relationship('Transaction', foreign_keys='Transaction.to_account_id', back_populates='to_account')
     
-    def to_dict(self):
+    @property
+    def balance(self):
+        """Current balance: latest checkpoint (or opening balance) plus newer ledger entries"""
+        if self.id is None:
+            return self.opening_balance if self.opening_balance is not None else Decimal('0.00')
+        from app.services.ledger_service import LedgerService
+        return LedgerService.get_balance(self)
+    
+    @balance.setter
+    def balance(self, value):
+        if self.id is not None:
+            raise AttributeError('Balance is derived from the ledger; use LedgerService to post entries')
+        self.opening_balance = value
+    
+    def to_dict(self, balance=None):
         return {
             'id': self.id,
             'number': self.number,
             'currency': self.currency,
-            'balance': float(self.balance),
+            'balance': float(self.balance if balance is None else balance),
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
@@ -106,7 +122,7 @@ class Transaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     transaction_id = db.Column(db.String(36), unique=True, nullable=False)
     from_account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=True)  # Can be null for external
-    to_account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
+    to_account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=True)  # Null when sent to another bank
     amount = db.Column(db.Numeric(15, 2), nullable=False)
     currency = db.Column(db.String(3), nullable=False, default='CRC')
     status = db.Column(db.String(20), default='pending')
@@ -134,6 +150,139 @@ class Transaction(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class TransactionArchive(db.Model):
+    """Completed transactions moved out of the hot transactions table by ArchiveService"""
+    __tablename__ = 'transactions_archive'
+    
+    id = db.Column(db.Integer, primary_key=True)  # Same id the row had in transactions
+    transaction_id = db.Column(db.String(36), unique=True, nullable=False)
+    from_account_id = db.Column(db.Integer, nullable=True)
+    to_account_id = db.Column(db.Integer, nullable=True)
+    amount = db.Column(db.Numeric(15, 2), nullable=False)
+    currency = db.Column(db.String(3), nullable=False, default='CRC')
+    status = db.Column(db.String(20))
+    description = db.Column(db.String(255))
+    sender_phone = db.Column(db.String(15))
+    receiver_phone = db.Column(db.String(15))
+    created_at = db.Column(db.DateTime, index=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_transactions_archive_from_account_id', 'from_account_id', 'created_at'),
+        db.Index('ix_transactions_archive_to_account_id', 'to_account_id', 'created_at'),
+    )
+    
+    to_dict = Transaction.to_dict
+
+class LedgerEntry(db.Model):
+    """Append-only ledger leg; every transfer writes one debit and one credit"""
+    __tablename__ = 'ledger_entries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # No foreign key: the transaction may have moved to transactions_archive, which keeps the same id
+    transaction_id = db.Column(db.String(36), nullable=True, index=True)
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=True)  # Null for the SINPE clearing side
+    direction = db.Column(db.String(6), nullable=False)  # 'debit' or 'credit'
+    amount = db.Column(db.Numeric(15, 2), nullable=False)
+    description = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_ledger_entries_account_id_id', 'account_id', 'id'),)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'transaction_id': self.transaction_id,
+            'account_id': self.account_id,
+            'direction': self.direction,
+            'amount': float(self.amount),
+            'description': self.description,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class BalanceCheckpoint(db.Model):
+    """Account balance as of a given ledger entry"""
+    __tablename__ = 'balance_checkpoints'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
+    last_entry_id = db.Column(db.Integer, nullable=False)
+    balance = db.Column(db.Numeric(15, 2), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_balance_checkpoints_account_id_entry', 'account_id', 'last_entry_id'),)
+    
+    def to_dict(self):
+        return {
+            'account_id': self.account_id,
+            'last_entry_id': self.last_entry_id,
+            'balance': float(self.balance),
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class HotAccount(db.Model):
+    """Account whose checkpoints are written by periodic consolidation instead of per transfer"""
+    __tablename__ = 'hot_accounts'
+    
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class DailyBalance(db.Model):
+    """End-of-day closing balance snapshot of an account"""
+    __tablename__ = 'daily_balances'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
+    business_date = db.Column(db.Date, nullable=False)
+    closing_balance = db.Column(db.Numeric(15, 2), nullable=False)
+    last_entry_id = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('account_id', 'business_date'),)
+    
+    def to_dict(self):
+        return {
+            'account_id': self.account_id,
+            'business_date': self.business_date.isoformat(),
+            'closing_balance': float(self.closing_balance),
+            'last_entry_id': self.last_entry_id
+        }
+
+class AccountSequence(db.Model):
+    """Persisted counter handing out account numbers in blocks"""
+    __tablename__ = 'account_sequences'
+    
+    name = db.Column(db.String(30), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False, default=1)
+
+class StatCounter(db.Model):
+    """Running aggregate (row count, balance total, ...) kept current by triggers"""
+    __tablename__ = 'stat_counters'
+    
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Numeric(20, 2), nullable=False, default=0)
+
+class SyncState(db.Model):
+    """Progress of a background mirror of a remote table"""
+    __tablename__ = 'sync_state'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    watermark = db.Column(db.String(40))  # Highest change marker applied so far
+    completed_at = db.Column(db.DateTime)  # Last finished full load
+    last_run_at = db.Column(db.DateTime)  # Last successful sync of any kind
+    last_error = db.Column(db.String(255))
+    rows = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'watermark': self.watermark,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_error': self.last_error,
+            'rows': self.rows
+        }
+
 class Currency(db.Model):
     __tablename__ = 'currencies'
     
@@ -0,0 +1,26 @@
+"""
+Routing Session - Send the reads of read-only requests to a separate read engine
+"""
+
+from flask import current_app, g, has_request_context
+from flask_sqlalchemy.session import Session
+
+def reading() -> bool:
+    """True while the current request is routed to the read engine"""
+    return has_request_context() and g.get('db_read_only', False)
+
+class RoutingSession(Session):
+    """
+    Flask-SQLAlchemy session that binds to app.extensions['db_reader']
+    while the request is marked read-only (see app.middleware.read_routing)
+
+    Flushes always go to the primary engine, and the first flush pins the
+    rest of the request to it so later reads see the request's own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and reading():
+            reader = current_app.extensions.get('db_reader')
+            if reader is not None:
+                return reader
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
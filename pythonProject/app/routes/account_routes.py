@@ -4,8 +4,10 @@ Account Routes - API endpoints for account management
 
 from flask import Blueprint, request, jsonify
 from app.models import db, Account, User, UserAccount
-from app.utils.iban_generator import generate_account_number
+from app.services.ledger_service import LedgerService
+from app.services.account_number_service import AccountNumberService
 from decimal import Decimal
+from datetime import datetime, date, time, timedelta, timezone
 
 account_bp = Blueprint('accounts', __name__)
 
@@ -14,9 +16,10 @@ def get_accounts():
     """Get all accounts"""
     try:
         accounts = Account.query.all()
+        balances = LedgerService.get_balances(accounts)
         return jsonify({
             'success': True,
-            'data': [account.to_dict() for account in accounts]
+            'data': [account.to_dict(balances[account.id]) for account in accounts]
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -27,12 +30,15 @@ def create_account():
     try:
         data = request.get_json()
         
-        # Generate account number if not provided
-        account_number = data.get('number', generate_account_number())
+        account_number = data.get('number')
         
-        # Check if account number already exists
-        if Account.query.filter_by(number=account_number).first():
-            return jsonify({'error': 'Account number already exists'}), 400
+        if account_number:
+            # Check if the client-supplied account number already exists
+            if Account.query.filter_by(number=account_number).first():
+                return jsonify({'error': 'Account number already exists'}), 400
+        else:
+            # Sequence-allocated IBANs are unique by construction
+            account_number = AccountNumberService.next_iban()
         
         account = Account(
             number=account_number,
@@ -41,15 +47,16 @@ def create_account():
         )
         
         db.session.add(account)
-        db.session.commit()
         
         # Link to user if user_id provided
         if 'user_id' in data:
             user = User.query.get(data['user_id'])
             if user:
+                db.session.flush()  # Get account ID
                 user_account = UserAccount(user_id=user.id, account_id=account.id)
                 db.session.add(user_account)
-                db.session.commit()
+        
+        db.session.commit()
         
         return jsonify({
             'success': True,
@@ -83,6 +90,47 @@ def get_account_by_number(account_number):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _parse_as_of(value: str) -> datetime:
+    """
+    Parse the as_of query parameter into a naive UTC datetime
+    
+    A bare date (YYYY-MM-DD) means the close of that day.
+    """
+    if len(value) == 10:
+        return datetime.combine(date.fromisoformat(value) + timedelta(days=1), time.min)
+    as_of = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if as_of.tzinfo:
+        as_of = as_of.astimezone(timezone.utc).replace(tzinfo=None)
+    return as_of
+
+@account_bp.route('/accounts/<account_number>/balance', methods=['GET'])
+def get_account_balance(account_number):
+    """Get account balance, optionally at a point in time (?as_of=ISO-8601)"""
+    try:
+        account = Account.query.filter_by(number=account_number).first_or_404()
+        
+        as_of = None
+        if request.args.get('as_of'):
+            try:
+                as_of = _parse_as_of(request.args['as_of'])
+            except ValueError:
+                return jsonify({'error': 'Invalid as_of, expected ISO-8601 date or datetime'}), 400
+        
+        balance = LedgerService.get_balance(account, as_of)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'account_number': account.number,
+                'currency': account.currency,
+                'balance': float(balance),
+                'as_of': (as_of or datetime.utcnow()).isoformat()
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @account_bp.route('/accounts/<int:account_id>/balance', methods=['PUT'])
 def update_balance(account_id):
     """Update account balance"""
@@ -93,7 +141,8 @@ def update_balance(account_id):
         if 'balance' not in data:
             return jsonify({'error': 'Balance is required'}), 400
             
-        account.balance = Decimal(str(data['balance']))
+        # Book the difference as a ledger adjustment instead of overwriting the balance
+        LedgerService.post_adjustment(account, Decimal(str(data['balance'])))
         db.session.commit()
         
         return jsonify({
@@ -109,10 +158,9 @@ def get_user_accounts(user_id):
     """Get all accounts for a specific user"""
     try:
         user = User.query.get_or_404(user_id)
-        accounts = []
-        
-        for user_account in user.user_accounts:
-            accounts.append(user_account.account.to_dict())
+        user_accounts = [user_account.account for user_account in user.user_accounts]
+        balances = LedgerService.get_balances(user_accounts)
+        accounts = [account.to_dict(balances[account.id]) for account in user_accounts]
             
         return jsonify({
             'success': True,
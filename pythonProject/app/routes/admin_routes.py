@@ -0,0 +1,67 @@
+"""
+Admin Routes - Operational endpoints for the live dashboard, query statistics and profiles
+"""
+
+from flask import Blueprint, request, jsonify, send_file
+from app.middleware.auth_middleware import admin_required
+from app.services.metrics_service import MetricsService
+from app.services.profiler import Profiler
+from app.services.query_stats import QueryStats
+from app.utils.hmac_generator import generate_ack_response, generate_nack_response
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/admin/metrics', methods=['GET'])
+@admin_required
+def get_metrics():
+    """
+    Per-second request, database and peer-bank metrics
+    
+    Pass ?since=<ts> with the last bucket timestamp already received to
+    fetch only newer seconds. Served from memory; no database access.
+    """
+    return jsonify(MetricsService.snapshot(request.args.get('since', type=int)))
+
+@admin_bp.route('/admin/queries', methods=['GET'])
+@admin_required
+def get_query_stats():
+    """
+    SQL statement statistics grouped by fingerprint
+    
+    Pass ?sort=total|mean|max|calls|slow and ?limit=N. Slow fingerprints
+    include their slowest sample and its captured plan.
+    """
+    return jsonify(QueryStats.snapshot(request.args.get('sort', 'total'), request.args.get('limit', 20, type=int)))
+
+@admin_bp.route('/admin/queries', methods=['DELETE'])
+@admin_required
+def reset_query_stats():
+    """Clear the collected statement statistics"""
+    QueryStats.reset()
+    return jsonify(generate_ack_response())
+
+@admin_bp.route('/admin/profiles', methods=['GET'])
+@admin_required
+def get_profiles():
+    """
+    Hottest functions across profiled requests, and the stored profiles
+    
+    Pass ?sort=self|total and ?limit=N.
+    """
+    return jsonify(Profiler.snapshot(request.args.get('sort', 'self'), request.args.get('limit', 30, type=int)))
+
+@admin_bp.route('/admin/profiles/<profile_id>', methods=['GET'])
+@admin_required
+def download_profile(profile_id):
+    """Stored profile of one request (.pstats or speedscope JSON)"""
+    path = Profiler.path(profile_id)
+    if path is None:
+        return jsonify(generate_nack_response('Profile not found')), 404
+    return send_file(path, as_attachment=True)
+
+@admin_bp.route('/admin/profiles', methods=['DELETE'])
+@admin_required
+def reset_profiles():
+    """Clear the aggregated hot functions (stored profiles are kept)"""
+    Profiler.reset()
+    return jsonify(generate_ack_response())
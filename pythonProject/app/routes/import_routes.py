@@ -0,0 +1,47 @@
+"""
+Import Routes - API endpoints for bulk customer import
+"""
+
+from flask import Blueprint, request, jsonify
+from app.middleware.auth_middleware import admin_required
+from app.services.import_service import ImportService, SUPPORTED_FORMATS
+import io
+
+import_bp = Blueprint('imports', __name__)
+
+@import_bp.route('/import/customers', methods=['POST'])
+@admin_required
+def import_customers():
+    """
+    Bulk import users with their accounts and phone links
+    
+    Accepts a multipart upload ('file' field) or a raw CSV/NDJSON body.
+    The format is taken from ?format=, else guessed from the filename or
+    Content-Type. Optional ?chunk_size= controls rows per transaction.
+    Restricted to admins (localhost or X-Admin-Token).
+    """
+    try:
+        upload = request.files.get('file')
+        if upload:
+            stream = io.TextIOWrapper(upload.stream, encoding='utf-8', newline='')
+            detected = ImportService.detect_format(upload.filename, upload.mimetype)
+        else:
+            stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+            detected = ImportService.detect_format(content_type=request.content_type)
+        
+        fmt = request.args.get('format', detected)
+        if fmt not in SUPPORTED_FORMATS:
+            return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+        
+        report = ImportService.import_records(
+            ImportService.parse_records(stream, fmt),
+            chunk_size=request.args.get('chunk_size', type=int)
+        )
+        
+        return jsonify({
+            'success': report['failed'] == 0,
+            'data': report
+        }), 201 if report['imported'] else 400
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
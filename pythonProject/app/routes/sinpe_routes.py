@@ -5,6 +5,11 @@ SINPE Routes - API endpoints for SINPE functionality
 from flask import Blueprint, request, jsonify, g, current_app
 from app.services.sinpe_service import SinpeService
 from app.services.bccr_service import BCCRService
+from app.services.bank_registry import BankRegistry, wire_code
+from app.services.subscription_mirror import SubscriptionMirror
+from app.services.phone_filter import PhoneFilter
+from app.services.transfer_executor import LaneFullError
+from app.services.tracing import Tracer
 from app.utils.hmac_generator import verify_hmac, generate_hmac, generate_nack_response, generate_ack_response
 from app.middleware.auth_middleware import login_required, validate_bank_request, require_sinpe_auth
 import logging
@@ -88,13 +93,15 @@ def handle_sinpe_transfer():
         data['hmac_md5'] = hmac_signature
         
         # Process transfer
-        result = SinpeService.process_sinpe_transfer(data, g.current_user)
+        result = SinpeService.execute_sinpe_transfer(data, g.current_user)
         
         if result.get('status') == 'ACK':
             return jsonify(result), 201
         else:
             return jsonify(result), 400
             
+    except LaneFullError:
+        return jsonify(generate_nack_response('Too many pending transfers for this account')), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify(generate_nack_response(str(e))), 500
 
@@ -151,7 +158,9 @@ def handle_sinpe_movil():
             return jsonify({'error': 'Se requiere el monto de la transferencia'}), 400
         
         # Verify HMAC
-        if not verify_hmac(data, hmac_md5):
+        with Tracer.span('verify_hmac'):
+            valid = verify_hmac(data, hmac_md5)
+        if not valid:
             return jsonify({'error': 'HMAC inválido'}), 403
         
         # Determine phone numbers for transfer
@@ -169,7 +178,7 @@ def handle_sinpe_movil():
                 return jsonify({'error': 'Cuenta destino no tiene teléfono vinculado'}), 400
         
         # Process transfer
-        transfer = SinpeService.send_sinpe_transfer(
+        transfer = SinpeService.execute_sinpe_movil(
             sender_phone=sender_phone,
             receiver_phone=receiver_phone,
             amount=amount['value'],
@@ -181,12 +190,15 @@ def handle_sinpe_movil():
         return jsonify({
             'success': True,
             'message': 'Transferencia realizada exitosamente',
-            'data': transfer.to_dict()
+            'data': transfer
         }), 201
         
+    except LaneFullError:
+        return jsonify({'error': 'Demasiadas transferencias pendientes para esta cuenta'}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@sinpe_bp.route('/validate/<phone>', methods=['GET'])
 @sinpe_bp.route('/api/validate/<phone>', methods=['GET'])
 def validate_sinpe_movil(phone):
     """
@@ -199,23 +211,30 @@ def validate_sinpe_movil(phone):
         JSON response with validation result
     """
     try:
+        # Numbers the filter has never seen are rejected without touching a database
+        if PhoneFilter.definitely_unregistered(phone):
+            return jsonify({'error': 'No registrado'}), 404
+            
         # First check local database
         subscription = SinpeService.find_phone_subscription(phone)
         
         if subscription:
             return jsonify({
                 'name': subscription.sinpe_client_name,
-                'bank_code': subscription.sinpe_bank_code.lstrip('0'),  # Remove leading zero for response
+                'bank_code': wire_code(subscription.sinpe_bank_code),
                 'phone': subscription.sinpe_number,
-                'bank_name': current_app.config['BANKS'].get(subscription.sinpe_bank_code, {}).get('name', 'Unknown Bank')
+                'bank_name': BankRegistry.current().name_for(subscription.sinpe_bank_code)
             })
             
+        # A complete, recent mirror of BCCR makes a local miss final
+        if SubscriptionMirror.is_authoritative():
+            return jsonify({'error': 'No registrado'}), 404
+            
         # If not found locally, check with BCCR
         bccr_result = BCCRService.validate_sinpe_number(phone)
         if bccr_result:
             # Add bank name to response
-            bank_code = f"0{bccr_result['bank_code']}"  # Add leading zero for config lookup
-            bccr_result['bank_name'] = current_app.config['BANKS'].get(bank_code, {}).get('name', 'Unknown Bank')
+            bccr_result['bank_name'] = BankRegistry.current().name_for(bccr_result['bank_code'])
             return jsonify(bccr_result)
             
         return jsonify({'error': 'No registrado'}), 404
@@ -224,6 +243,40 @@ def validate_sinpe_movil(phone):
         current_app.logger.error(f"Error validating phone {phone}: {str(e)}")
         return jsonify({'error': 'Error interno del servidor'}), 500
 
+@sinpe_bp.route('/validate', methods=['POST'])
+def validate_sinpe_movil_bulk():
+    """
+    Validate many phone numbers at once (local subscriptions, then one BCCR query)
+    
+    Expected JSON:
+        {"phones": ["88887777", "84966164", ...]}
+        
+    Returns:
+        JSON response with one result per number and a count per status
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        phones = data.get('phones')
+        
+        if not isinstance(phones, list) or not phones:
+            return jsonify({'error': 'Se requiere una lista de teléfonos'}), 400
+            
+        limit = current_app.config.get('VALIDATE_BULK_MAX', 500)
+        if len(phones) > limit:
+            return jsonify({'error': f'Máximo {limit} teléfonos por solicitud'}), 400
+            
+        results = SinpeService.validate_phone_numbers(phones)
+        
+        summary = {}
+        for result in results:
+            summary[result['status']] = summary.get(result['status'], 0) + 1
+            
+        return jsonify({'results': results, 'summary': summary})
+        
+    except Exception as e:
+        current_app.logger.error(f"Error validating phone batch: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
 @sinpe_bp.route('/sinpe/accounts/<username>', methods=['GET'])
 @login_required
 def get_user_sinpe_accounts(username):
@@ -4,36 +4,46 @@ Transaction Routes - API endpoints for transaction management
 
 from flask import Blueprint, request, jsonify
 from app.models import db, Transaction, Account
+from app.services.ledger_service import LedgerService
+from app.services.archive_service import ArchiveService
 from app.utils.hmac_generator import verify_hmac
+from datetime import datetime, timedelta
 from decimal import Decimal
 import uuid
 
 transaction_bp = Blueprint('transactions', __name__)
 
+def _date_range():
+    """
+    Optional ?from=&to= filter (ISO dates or datetimes; a plain 'to' date includes that whole day)
+    
+    Raises:
+        ValueError: If either value is not ISO formatted
+    """
+    start, end = request.args.get('from'), request.args.get('to')
+    start = datetime.fromisoformat(start) if start else None
+    if end:
+        end = datetime.fromisoformat(end) + (timedelta(days=1) if len(end) == 10 else timedelta(0))
+    return start, end or None
+
 @transaction_bp.route('/transactions', methods=['GET'])
 def get_transactions():
-    """Get all transactions"""
+    """Get all transactions (archived ones included when the page or date range reaches them)"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        transactions = Transaction.query.order_by(
-            Transaction.created_at.desc()
-        ).paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        try:
+            start, end = _date_range()
+        except ValueError:
+            return jsonify({'error': 'Invalid date, use YYYY-MM-DD'}), 400
+        
+        result = ArchiveService.list_transactions(page, per_page, start, end)
         
         return jsonify({
             'success': True,
-            'data': [transaction.to_dict() for transaction in transactions.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': transactions.total,
-                'pages': transactions.pages
-            }
+            'data': result['data'],
+            'pagination': result['pagination']
         })
         
     except Exception as e:
@@ -43,13 +53,14 @@ def get_transactions():
 def get_transaction(transaction_id):
     """Get specific transaction"""
     try:
-        transaction = Transaction.query.filter_by(
-            transaction_id=transaction_id
-        ).first_or_404()
+        transaction = ArchiveService.find(transaction_id)
+        
+        if not transaction:
+            return jsonify({'error': 'Transaction not found'}), 404
         
         return jsonify({
             'success': True,
-            'data': transaction.to_dict()
+            'data': transaction
         })
         
     except Exception as e:
@@ -61,21 +72,15 @@ def get_account_transactions(account_number):
     try:
         account = Account.query.filter_by(number=account_number).first_or_404()
         
-        # Get both sent and received transactions
-        sent_transactions = Transaction.query.filter_by(
-            from_account_id=account.id
-        ).all()
-        
-        received_transactions = Transaction.query.filter_by(
-            to_account_id=account.id
-        ).all()
-        
-        all_transactions = sent_transactions + received_transactions
-        all_transactions.sort(key=lambda x: x.created_at, reverse=True)
+        try:
+            start, end = _date_range()
+        except ValueError:
+            return jsonify({'error': 'Invalid date, use YYYY-MM-DD'}), 400
         
+        # Both sent and received transactions, hot and (if the range reaches it) archived
         return jsonify({
             'success': True,
-            'data': [transaction.to_dict() for transaction in all_transactions]
+            'data': ArchiveService.account_transactions(account.id, start, end)
         })
         
     except Exception as e:
@@ -117,9 +122,10 @@ def create_transaction():
         
         db.session.add(transaction)
         
-        # Update balances
-        from_account.balance -= amount
-        to_account.balance += amount
+        # Append debit/credit ledger legs
+        LedgerService.post_transfer(
+            transaction.transaction_id, from_account, to_account, amount, transaction.description
+        )
         
         # Mark transaction as completed
         transaction.status = 'completed'
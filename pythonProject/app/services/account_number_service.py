@@ -0,0 +1,110 @@
+"""
+Account Number Service - Collision-free IBAN allocation from a persisted sequence
+"""
+
+from app.models import db, Account, AccountSequence
+from app.utils.iban_generator import build_iban, COUNTRY_CODE, BANK_CODE, BRANCH_CODE, ACCOUNT_DIGITS
+from flask import current_app
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+import threading
+
+SEQUENCE_NAME = 'account_number'
+
+# Numbers reserved per round trip when handing out single IBANs
+DEFAULT_BLOCK_SIZE = 100
+
+_cache_lock = threading.Lock()
+_cached_blocks = {}  # engine url -> [next value, end (exclusive)]
+
+class AccountNumberService:
+
+    @staticmethod
+    def _seed_value(conn) -> int:
+        """First free number after any IBAN already issued by this bank"""
+        prefix = f"{COUNTRY_CODE}__{BANK_CODE}{BRANCH_CODE}"
+        highest = conn.execute(
+            select(func.max(func.substr(Account.number, len(prefix) + 1))).where(
+                Account.number.like(f"{prefix}%"),
+                func.length(Account.number) == len(prefix) + ACCOUNT_DIGITS
+            )
+        ).scalar()
+        return int(highest) + 1 if highest and highest.isdigit() else 1
+
+    @staticmethod
+    def reserve_block(count: int) -> int:
+        """
+        Atomically reserve `count` consecutive account numbers
+
+        Runs in its own short transaction so a reserved block is never
+        handed out twice, even if the caller's transaction rolls back.
+
+        Args:
+            count: Numbers to reserve
+
+        Returns:
+            int: First number of the block [start, start + count)
+        """
+        if count <= 0:
+            raise ValueError("count must be positive")
+
+        try:
+            with db.engine.begin() as conn:
+                updated = conn.execute(
+                    update(AccountSequence)
+                    .where(AccountSequence.name == SEQUENCE_NAME)
+                    .values(next_value=AccountSequence.next_value + count)
+                ).rowcount
+
+                if not updated:
+                    seed = AccountNumberService._seed_value(conn)
+                    conn.execute(AccountSequence.__table__.insert().values(
+                        name=SEQUENCE_NAME, next_value=seed + count
+                    ))
+                    return seed
+
+                end = conn.execute(
+                    select(AccountSequence.next_value).where(AccountSequence.name == SEQUENCE_NAME)
+                ).scalar_one()
+                return end - count
+        except IntegrityError:
+            # Another worker created the sequence row first; retry against it
+            return AccountNumberService.reserve_block(count)
+
+    @staticmethod
+    def allocate_ibans(count: int) -> list:
+        """
+        Allocate a block of new IBANs with one sequence round trip
+
+        Args:
+            count: Number of IBANs to allocate
+
+        Returns:
+            list: IBAN strings with correct mod-97 check digits
+        """
+        start = AccountNumberService.reserve_block(count)
+        return [build_iban(value) for value in range(start, start + count)]
+
+    @staticmethod
+    def next_iban() -> str:
+        """
+        Hand out a single IBAN from an in-process cached block
+
+        Unused numbers in a cached block are lost on restart, which leaves
+        gaps but never duplicates.
+
+        Returns:
+            str: New IBAN
+        """
+        key = str(db.engine.url)
+        block_size = current_app.config.get('ACCOUNT_NUMBER_BLOCK_SIZE', DEFAULT_BLOCK_SIZE)
+
+        with _cache_lock:
+            block = _cached_blocks.get(key)
+            if not block or block[0] >= block[1]:
+                start = AccountNumberService.reserve_block(block_size)
+                block = _cached_blocks[key] = [start, start + block_size]
+            value = block[0]
+            block[0] += 1
+
+        return build_iban(value)
@@ -0,0 +1,103 @@
+"""
+API Client - Pooled HTTP or in-process access to the banking API
+"""
+
+from urllib.parse import urlsplit
+
+DEFAULT_BASE_URL = "http://127.0.0.1:5000/api"
+
+class InProcessResponse:
+    """Adapt a Flask test response to the subset of the requests.Response API callers use"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    @property
+    def text(self) -> str:
+        return self._response.get_data(as_text=True)
+
+    def json(self):
+        return self._response.get_json()
+
+class ApiClient:
+    """
+    Client for the banking API with a swappable transport
+
+    With an ``app`` the API is called in-process through the app's test
+    client: no sockets, no serialization round trip through the network
+    stack and no server thread required. Without one, requests go over
+    HTTP through a keep-alive ``requests.Session`` whose connection pool
+    is reused across calls.
+
+    Cookies (e.g. the login session) persist across calls in both modes.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, app=None, timeout: float = 10, pool_size: int = 4):
+        self.base_url = base_url.rstrip('/')
+        self.app = app
+        self.timeout = timeout
+
+        if app is not None:
+            self._client = app.test_client()
+            # Routes are mounted under the same path prefix as the HTTP API
+            self._prefix = urlsplit(self.base_url).path
+        else:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
+
+    @property
+    def in_process(self) -> bool:
+        return self.app is not None
+
+    def request(self, method: str, path: str, params: dict = None, json=None, headers: dict = None):
+        """
+        Call an API endpoint
+
+        Args:
+            method: HTTP method
+            path: Path relative to the API base (e.g. '/users')
+            params: Optional query string parameters
+            json: Optional JSON body
+            headers: Optional extra headers
+
+        Returns:
+            Response exposing status_code, headers, text and json()
+        """
+        if self.in_process:
+            response = self._client.open(
+                self._prefix + path,
+                method=method,
+                query_string=params,
+                json=json,
+                headers=headers
+            )
+            return InProcessResponse(response)
+
+        return self._session.request(
+            method, f"{self.base_url}{path}",
+            params=params, json=json, headers=headers, timeout=self.timeout
+        )
+
+    def get(self, path: str, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path: str, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def put(self, path: str, **kwargs):
+        return self.request('PUT', path, **kwargs)
+
+    def delete(self, path: str, **kwargs):
+        return self.request('DELETE', path, **kwargs)
+
+    def close(self):
+        """Release pooled connections"""
+        if not self.in_process:
+            self._session.close()
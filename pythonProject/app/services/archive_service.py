@@ -0,0 +1,193 @@
+"""
+Archive Service - Move old completed transactions out of the hot table and read across both
+"""
+
+from flask import current_app
+from app.models import db, Transaction, TransactionArchive
+from sqlalchemy import select, insert, delete, func, literal, or_, union_all
+from datetime import datetime, timedelta
+import math
+
+# Completed transactions older than this many days are archived
+ARCHIVE_AFTER_DAYS = 90
+
+# Rows moved per transaction, so the write lock is released between batches
+BATCH_SIZE = 5000
+
+# Columns copied to the archive (everything but archived_at)
+_COLUMNS = [column.name for column in Transaction.__table__.columns]
+
+def _serialize(row) -> dict:
+    """API representation of a row from either table (matches Transaction.to_dict)"""
+    return {
+        'id': row.id,
+        'transaction_id': row.transaction_id,
+        'from_account_id': row.from_account_id,
+        'to_account_id': row.to_account_id,
+        'amount': float(row.amount),
+        'currency': row.currency,
+        'status': row.status,
+        'description': row.description,
+        'sender_phone': row.sender_phone,
+        'receiver_phone': row.receiver_phone,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'archived': bool(row.archived)
+    }
+
+class ArchiveService:
+    """
+    Hot/cold split of the transactions table
+
+    Completed transactions older than TRANSACTION_ARCHIVE_DAYS move to
+    transactions_archive in batches, keeping the hot table and its indexes
+    small. Readers go through this service, which only touches the archive
+    when the requested range or page reaches past the newest archived row.
+    """
+
+    @staticmethod
+    def horizon(now: datetime = None) -> datetime:
+        days = current_app.config.get('TRANSACTION_ARCHIVE_DAYS', ARCHIVE_AFTER_DAYS)
+        return (now or datetime.utcnow()) - timedelta(days=days)
+
+    @staticmethod
+    def archive(before: datetime = None, batch_size: int = BATCH_SIZE) -> int:
+        """
+        Move completed transactions created before `before` (default: the horizon) to the archive
+
+        Returns:
+            int: Transactions archived
+        """
+        before = before or ArchiveService.horizon()
+        columns = [Transaction.__table__.c[name] for name in _COLUMNS]
+        moved = 0
+
+        while True:
+            ids = [row_id for (row_id,) in db.session.execute(
+                select(Transaction.id)
+                .where(Transaction.status == 'completed', Transaction.created_at < before)
+                .order_by(Transaction.id)
+                .limit(batch_size)
+            )]
+            if not ids:
+                return moved
+
+            try:
+                db.session.execute(
+                    insert(TransactionArchive).from_select(
+                        _COLUMNS + ['archived_at'],
+                        select(*columns, literal(datetime.utcnow())).where(Transaction.id.in_(ids))
+                    )
+                )
+                db.session.execute(delete(Transaction).where(Transaction.id.in_(ids)))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            moved += len(ids)
+
+    @staticmethod
+    def boundary():
+        """created_at of the newest archived transaction (None if nothing is archived)"""
+        return db.session.query(func.max(TransactionArchive.created_at)).scalar()
+
+    @staticmethod
+    def archived_count() -> int:
+        """Archived rows, from the maintained counter when available"""
+        from app.services.stats_service import StatsService
+        counters = StatsService.get_counters(['rows:transactions_archive'])
+        if counters:
+            return int(counters['rows:transactions_archive'])
+        return db.session.query(func.count()).select_from(TransactionArchive).scalar()
+
+    @staticmethod
+    def _select(model, archived: bool, start=None, end=None, account_id=None):
+        query = select(*[model.__table__.c[name] for name in _COLUMNS], literal(archived).label('archived'))
+        if start is not None:
+            query = query.where(model.created_at >= start)
+        if end is not None:
+            query = query.where(model.created_at < end)
+        if account_id is not None:
+            query = query.where(or_(model.from_account_id == account_id, model.to_account_id == account_id))
+        return query
+
+    @staticmethod
+    def _needs_archive(start=None) -> bool:
+        boundary = ArchiveService.boundary()
+        return boundary is not None and (start is None or start <= boundary)
+
+    @staticmethod
+    def _query(start=None, end=None, account_id=None, include_archive: bool = None):
+        """Hot-table select, or a UNION ALL with the archive when the range reaches it"""
+        if include_archive is None:
+            include_archive = ArchiveService._needs_archive(start)
+        hot = ArchiveService._select(Transaction, False, start, end, account_id)
+        if not include_archive:
+            return hot
+        cold = ArchiveService._select(TransactionArchive, True, start, end, account_id)
+        return union_all(hot, cold).subquery().select()
+
+    @staticmethod
+    def _ordered(query):
+        columns = query.selected_columns
+        return query.order_by(columns.created_at.desc(), columns.id.desc())
+
+    @staticmethod
+    def list_transactions(page: int = 1, per_page: int = 20, start: datetime = None, end: datetime = None) -> dict:
+        """
+        One page of transactions, newest first, across hot and archived rows
+
+        Without a date range the hot table is read first and the archive
+        only when the page reaches rows as old as the newest archived one;
+        the archive's size comes from the maintained counter.
+
+        Returns:
+            dict: data (list of transaction dicts) and pagination
+        """
+        page, per_page = max(1, page), max(1, per_page)
+        offset = (page - 1) * per_page
+
+        rows = None
+        if start is None and end is None:
+            total = db.session.query(func.count()).select_from(Transaction).scalar()
+            archived = ArchiveService.archived_count()
+            hot = ArchiveService._ordered(ArchiveService._query(include_archive=False))
+            rows = db.session.execute(hot.limit(per_page).offset(offset)).all()
+            if archived:
+                # The hot page stands alone only if it is full and all of it is newer than the archive
+                boundary = ArchiveService.boundary()
+                oldest = rows[-1].created_at if rows else None
+                if len(rows) < per_page or oldest is None or boundary is None or oldest <= boundary:
+                    rows = None
+            total += archived
+            query = ArchiveService._query(include_archive=True)
+        else:
+            query = ArchiveService._query(start, end)
+            total = db.session.execute(select(func.count()).select_from(query.subquery())).scalar()
+
+        if rows is None:
+            rows = db.session.execute(ArchiveService._ordered(query).limit(per_page).offset(offset))
+        return {
+            'data': [_serialize(row) for row in rows],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': math.ceil(total / per_page) if total else 0
+            }
+        }
+
+    @staticmethod
+    def account_transactions(account_id: int, start: datetime = None, end: datetime = None) -> list:
+        """Sent and received transactions of an account, newest first"""
+        query = ArchiveService._query(start, end, account_id)
+        return [_serialize(row) for row in db.session.execute(ArchiveService._ordered(query))]
+
+    @staticmethod
+    def find(transaction_id: str):
+        """Transaction dict by transaction_id, looking in the archive on a hot miss"""
+        for model, archived in ((Transaction, False), (TransactionArchive, True)):
+            query = ArchiveService._select(model, archived).where(model.transaction_id == transaction_id)
+            row = db.session.execute(query).first()
+            if row is not None:
+                return _serialize(row)
+        return None
@@ -0,0 +1,228 @@
+"""
+Bank Registry - Hot-reloadable bank routing table with canonical code lookups
+"""
+
+from flask import current_app
+from app.utils.iban_generator import BANK_CODE
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of banks.json for changes
+RELOAD_CHECK_INTERVAL = 1.0
+
+# Seconds before retrying BCCR for a bank code it did not know
+NEGATIVE_CACHE_TTL = 60.0
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_CONNECT_TIMEOUT = 3.0
+
+def canonical_code(code) -> str:
+    """
+    Routing form of a bank code: numeric codes zero-padded to 4 digits
+    ('666', '0666', 666 -> '0666'), named entries such as 'BCCR' upper-cased
+    """
+    code = str(code).strip()
+    if code.isdigit():
+        return code.lstrip('0').zfill(4)
+    return code.upper()
+
+def wire_code(code) -> str:
+    """BCCR / inter-bank payload form of a bank code: no leading zeros ('0666' -> '666')"""
+    code = canonical_code(code)
+    if not code.isdigit():
+        return code
+    return code.lstrip('0') or '0'
+
+class Bank:
+    """One routing entry; treated as read-only once built"""
+
+    __slots__ = ('code', 'wire_code', 'name', 'url', 'timeout', 'connect_timeout', 'db')
+
+    def __init__(self, code: str, name: str, url: str = None, timeout: float = DEFAULT_TIMEOUT,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT, db: dict = None):
+        self.code = canonical_code(code)
+        self.wire_code = wire_code(code)
+        self.name = name
+        self.url = url.rstrip('/') if url else url
+        self.timeout = float(timeout)
+        self.connect_timeout = float(connect_timeout)
+        self.db = db
+
+    @property
+    def timeouts(self) -> tuple:
+        """(connect, read) timeout pair for requests"""
+        return (self.connect_timeout, self.timeout)
+
+    def to_dict(self) -> dict:
+        return {
+            'code': self.code,
+            'wire_code': self.wire_code,
+            'name': self.name,
+            'url': self.url,
+            'timeout': self.timeout,
+            'connect_timeout': self.connect_timeout
+        }
+
+class BankRegistry:
+    """
+    Bank routing table loaded from banks.json
+
+    Every bank is indexed under all the forms its code appears in (canonical
+    '0666' and wire '666'), so lookups are a single dict access whatever form
+    a caller holds. The file's mtime is checked at most once per
+    RELOAD_CHECK_INTERVAL; a changed file is parsed into a fresh index that
+    replaces the old one in a single reference swap, so readers never see a
+    half-built table and an invalid file leaves the current one in place.
+
+    Optional per-bank keys in banks.json: "timeout" and "connect_timeout"
+    (seconds) for HTTP calls to that bank.
+    """
+
+    def __init__(self, path: str, check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._index = {}
+        self._banks = {}
+        self._learned = {}
+        self._mtime = None
+        self._next_check = 0.0
+        self._missing = {}
+        self.reload()
+
+    @staticmethod
+    def current() -> 'BankRegistry':
+        """Registry of the active Flask application"""
+        return current_app.extensions['bank_registry']
+
+    @staticmethod
+    def _build(entries: dict) -> tuple:
+        banks, index = {}, {}
+        for code, entry in entries.items():
+            bank = Bank(
+                code,
+                entry.get('name', code),
+                entry.get('url'),
+                entry.get('timeout', DEFAULT_TIMEOUT),
+                entry.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT),
+                entry.get('db')
+            )
+            banks[bank.code] = bank
+            index[bank.code] = bank
+            index[bank.wire_code] = bank
+            index[str(code)] = bank
+        return banks, index
+
+    def reload(self) -> bool:
+        """
+        Re-read banks.json and swap in the new table
+
+        Returns:
+            bool: True if the table was replaced, False if the file was invalid
+        """
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                with open(self.path) as f:
+                    banks, index = self._build(json.load(f))
+            except (OSError, ValueError, AttributeError) as e:
+                logger.error(f"Bank registry reload failed, keeping current table: {e}")
+                return False
+
+            # Banks added at runtime survive a file reload unless the file now defines them
+            for code, bank in self._learned.items():
+                if code not in banks:
+                    banks[code] = bank
+                    index[bank.code] = index[bank.wire_code] = bank
+
+            self._banks, self._index = banks, index
+            self._mtime = mtime
+            self._missing.clear()
+            return True
+
+    def _check_for_changes(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+    def get(self, code):
+        """
+        Look up a bank by any form of its code
+
+        Args:
+            code: '0666', '666', 666, 'BCCR', ...
+
+        Returns:
+            Bank or None
+        """
+        if code is None:
+            return None
+        self._check_for_changes()
+        index = self._index
+        bank = index.get(code)
+        if bank is None:
+            bank = index.get(canonical_code(code))
+        return bank
+
+    def resolve(self, code):
+        """
+        Look up a bank, asking BCCR (BCCRService.get_bank_info) for unknown codes
+
+        Banks learned this way are added to the table without a restart;
+        codes BCCR does not know are not asked about again for
+        NEGATIVE_CACHE_TTL seconds.
+        """
+        bank = self.get(code)
+        if bank is not None or code is None:
+            return bank
+
+        canonical = canonical_code(code)
+        if time.monotonic() < self._missing.get(canonical, 0):
+            return None
+
+        from app.services.bccr_service import BCCRService
+        info = BCCRService.get_bank_info(canonical)
+        if not info:
+            self._missing[canonical] = time.monotonic() + NEGATIVE_CACHE_TTL
+            return None
+        return self.add(info['code'], info['name'], info.get('url'))
+
+    def add(self, code, name: str, url: str = None, **settings) -> Bank:
+        """Add or replace one bank at runtime (copy-on-write swap of the table)"""
+        bank = Bank(code, name, url, **settings)
+        with self._lock:
+            banks = dict(self._banks)
+            index = {key: value for key, value in self._index.items() if value.code != bank.code}
+            banks[bank.code] = bank
+            index[bank.code] = index[bank.wire_code] = bank
+            self._learned[bank.code] = bank
+            self._banks, self._index = banks, index
+            self._missing.pop(bank.code, None)
+        return bank
+
+    @property
+    def local(self) -> Bank:
+        """This bank's own entry"""
+        return self.get(BANK_CODE)
+
+    def is_local(self, code) -> bool:
+        return code is not None and canonical_code(code) == canonical_code(BANK_CODE)
+
+    def name_for(self, code, default: str = 'Unknown Bank') -> str:
+        bank = self.get(code)
+        return bank.name if bank else default
+
+    def all(self) -> list:
+        return list(self._banks.values())
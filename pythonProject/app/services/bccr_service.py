@@ -2,26 +2,31 @@
 BCCR Service - Handle interactions with Banco Central de Costa Rica
 """
 
-import psycopg2
-from psycopg2.extras import DictCursor
 from flask import current_app
-from datetime import datetime
+from app.services.metrics_service import MetricsService
+from app.services.bank_registry import BankRegistry, wire_code
+from app.services.tracing import Tracer
 from typing import Optional, Dict, Any
 
 class BCCRService:
     @staticmethod
     def get_db_connection():
         """Get PostgreSQL connection to BCCR database"""
-        config = current_app.config['BANKS']['BCCR']['db']
-        return psycopg2.connect(
-            host=config['host'],
-            port=config['port'],
-            user=config['user'],
-            password=config['password'],
-            database=config['database']
-        )
+        # psycopg2 is only needed when BCCR is actually contacted; keep it off the startup path
+        import psycopg2
+        
+        config = BankRegistry.current().get('BCCR').db
+        with MetricsService.peer_call('BCCR'):
+            return psycopg2.connect(
+                host=config['host'],
+                port=config['port'],
+                user=config['user'],
+                password=config['password'],
+                database=config['database']
+            )
 
     @staticmethod
+    @Tracer.traced('BCCRService.validate_sinpe_number')
     def validate_sinpe_number(phone: str) -> Optional[Dict[str, Any]]:
         """
         Validate if a phone number is registered in SINPE system
@@ -43,6 +48,8 @@ class BCCRService:
                 
             # Try database connection for other numbers
             try:
+                from psycopg2.extras import DictCursor
+                
                 with BCCRService.get_db_connection() as conn:
                     with conn.cursor(cursor_factory=DictCursor) as cur:
                         cur.execute("""
@@ -55,7 +62,7 @@ class BCCRService:
                         if result:
                             return {
                                 'phone': result['phone_number'],
-                                'bank_code': result['bank_code'].lstrip('0'),  # Remove leading zero
+                                'bank_code': wire_code(result['bank_code']),
                                 'name': result['client_name']
                             }
             except Exception as db_error:
@@ -70,48 +77,76 @@ class BCCRService:
             return None
 
     @staticmethod
+    @Tracer.traced('BCCRService.validate_sinpe_numbers')
+    def validate_sinpe_numbers(phones: list) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Validate many phone numbers with a single BCCR query
+        
+        Args:
+            phones: Phone numbers to validate
+            
+        Returns:
+            Dict of phone -> subscription info for the registered numbers,
+            or None if BCCR could not be queried (so callers can tell
+            "not registered" from "unknown")
+        """
+        found = {}
+        phones = list(dict.fromkeys(phones))
+        
+        # For testing/demo purposes, simulate external bank numbers
+        if '84966164' in phones:
+            found['84966164'] = {'phone': '84966164', 'bank_code': '111', 'name': 'Test User External'}
+            phones.remove('84966164')
+        
+        if not phones:
+            return found
+        
+        try:
+            from psycopg2.extras import DictCursor
+            
+            with BCCRService.get_db_connection() as conn:
+                with conn.cursor(cursor_factory=DictCursor) as cur:
+                    cur.execute("""
+                        SELECT phone_number, bank_code, client_name
+                        FROM sinpe_subscriptions
+                        WHERE phone_number = ANY(%s) AND status = 'active'
+                    """, (phones,))
+                    
+                    for row in cur.fetchall():
+                        found[row['phone_number']] = {
+                            'phone': row['phone_number'],
+                            'bank_code': wire_code(row['bank_code']),
+                            'name': row['client_name']
+                        }
+            return found
+        except Exception as e:
+            current_app.logger.error(f"BCCR bulk validation error: {str(e)}")
+            return None
+
+    @staticmethod
+    @Tracer.traced('BCCRService.log_sinpe_transfer')
     def log_sinpe_transfer(data: dict) -> bool:
         """
         Log SINPE transfer in central bank system
         
+        The record is queued on the application's BCCRTransferLog and written
+        in a later batch; without one it is written immediately.
+        
         Args:
             data: Transfer data including sender and receiver info
             
         Returns:
-            bool: True if logged successfully, False otherwise
+            bool: True if queued or logged successfully, False otherwise
         """
         try:
-            # Remove leading zeros from bank codes for BCCR database
-            sender_bank = data['sender']['bank_code'].lstrip('0')
-            receiver_bank = data['receiver']['bank_code'].lstrip('0')
+            from app.services.bccr_transfer_log import transfer_row, write_batch
             
-            with BCCRService.get_db_connection() as conn:
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        INSERT INTO sinpe_transfers (
-                            transaction_id,
-                            timestamp,
-                            sender_bank,
-                            sender_account,
-                            receiver_bank,
-                            receiver_account,
-                            amount,
-                            currency,
-                            status
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        data['transaction_id'],
-                        datetime.fromisoformat(data['timestamp']),
-                        sender_bank,  # Bank code without leading zeros
-                        data['sender']['account_number'],
-                        receiver_bank,  # Bank code without leading zeros
-                        data['receiver']['account_number'],
-                        data['amount']['value'],
-                        data['amount'].get('currency', 'CRC'),
-                        'completed'
-                    ))
-                conn.commit()
-                return True
+            transfer_log = current_app.extensions.get('bccr_transfer_log')
+            if transfer_log is not None:
+                transfer_log.enqueue(data)
+            else:
+                write_batch([transfer_row(data)])
+            return True
                 
         except Exception as e:
             current_app.logger.error(f"BCCR DB Error: {str(e)}")
@@ -129,6 +164,8 @@ class BCCRService:
             Dict with account info or None if not found
         """
         try:
+            from psycopg2.extras import DictCursor
+            
             with BCCRService.get_db_connection() as conn:
                 with conn.cursor(cursor_factory=DictCursor) as cur:
                     cur.execute("""
@@ -162,8 +199,10 @@ class BCCRService:
             Dict with bank info or None if not found
         """
         try:
-            # Remove leading zeros for BCCR database query
-            clean_bank_code = bank_code.lstrip('0')
+            from psycopg2.extras import DictCursor
+            
+            # BCCR stores bank codes without leading zeros
+            clean_bank_code = wire_code(bank_code)
             
             with BCCRService.get_db_connection() as conn:
                 with conn.cursor(cursor_factory=DictCursor) as cur:
@@ -0,0 +1,246 @@
+"""
+BCCR Transfer Log - Buffered, batched logging of SINPE transfers to the central bank
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from app.services.bank_registry import wire_code
+from app.services.metrics_service import MetricsService
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Flush as soon as this many records are waiting...
+BATCH_SIZE = 200
+
+# ...or after this many seconds, whichever comes first
+FLUSH_INTERVAL = 1.0
+
+# Records held in memory before new ones are spilled straight to the spool file
+MAX_BUFFERED = 10000
+
+# Retry delay after a failed flush doubles up to this many seconds
+MAX_RETRY_DELAY = 60.0
+
+COLUMNS = (
+    'transaction_id', 'timestamp', 'sender_bank', 'sender_account',
+    'receiver_bank', 'receiver_account', 'amount', 'currency', 'status'
+)
+
+def transfer_row(data: dict) -> tuple:
+    """sinpe_transfers row for a SINPE transfer payload (bank codes in BCCR form)"""
+    return (
+        data['transaction_id'],
+        data['timestamp'],
+        wire_code(data['sender']['bank_code']),
+        data['sender']['account_number'],
+        wire_code(data['receiver']['bank_code']),
+        data['receiver']['account_number'],
+        str(data['amount']['value']),
+        data['amount'].get('currency', 'CRC'),
+        'completed'
+    )
+
+class BCCRTransferLog:
+    """
+    Asynchronous writer for the BCCR sinpe_transfers table
+
+    Transfers are queued in memory and written by a background thread in
+    multi-row INSERTs of up to BATCH_SIZE rows, so a transfer never waits on
+    a PostgreSQL round trip and commit. Records that cannot be written
+    (BCCR unreachable, buffer full, process shutting down) go to a local
+    SQLite spool file and are sent first on the next successful flush, so a
+    BCCR outage delays logging instead of losing it.
+    """
+
+    def __init__(self, app, spool_path: str, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, max_buffered: int = MAX_BUFFERED):
+        self.app = app
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self._buffer = deque()
+        self._cond = threading.Condition()
+        self._spool_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._retry_at = 0.0
+        self._retry_delay = flush_interval
+        self._spooled = None  # unknown until the spool file is first opened
+
+    @contextmanager
+    def _spool(self):
+        """
+        Serialized connection to the spool file, committed on success
+
+        The file is created on first use, so processes that never log a
+        transfer (CLI tools, tests) leave no spool behind.
+        """
+        with self._spool_lock:
+            conn = sqlite3.connect(self.spool_path, timeout=30)
+            try:
+                conn.execute('PRAGMA journal_mode=WAL')
+                if self._spooled is None:
+                    self._init_spool(conn)
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+
+    def _init_spool(self, conn):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS pending_transfers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                {', '.join(f'{column} TEXT' for column in COLUMNS)}
+            )
+        """)
+        self._spooled = conn.execute('SELECT COUNT(*) FROM pending_transfers').fetchone()[0]
+
+    def _spill(self, rows: list):
+        """Persist rows to the local spool"""
+        if not rows:
+            return
+        with self._spool() as conn:
+            conn.executemany(
+                f"INSERT INTO pending_transfers ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows
+            )
+            self._spooled += len(rows)
+
+    def _read_spool(self, limit: int) -> tuple:
+        """Oldest spooled rows as (ids, rows)"""
+        if self._spooled == 0 or (self._spooled is None and not os.path.exists(self.spool_path)):
+            return [], []
+        with self._spool() as conn:
+            records = conn.execute(
+                f"SELECT id, {', '.join(COLUMNS)} FROM pending_transfers ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [record[0] for record in records], [tuple(record[1:]) for record in records]
+
+    def _delete_spooled(self, ids: list):
+        if not ids:
+            return
+        with self._spool() as conn:
+            conn.executemany('DELETE FROM pending_transfers WHERE id = ?', [(i,) for i in ids])
+            self._spooled -= len(ids)
+
+    def start(self):
+        """Start the background flusher (idempotent) and expose queue depths as gauges"""
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='bccr-transfer-log', daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+        MetricsService.register_gauge('bccr_log_buffered', lambda: len(self._buffer))
+        MetricsService.register_gauge('bccr_log_spooled', lambda: self._spooled or 0)
+
+    def stop(self, timeout: float = 5.0):
+        """Flush what BCCR will take, spool the rest and stop the flusher"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+        with self._cond:
+            rows = list(self._buffer)
+            self._buffer.clear()
+        self._spill(rows)
+
+    def enqueue(self, data: dict):
+        """
+        Queue one transfer for logging
+
+        Args:
+            data: SINPE transfer payload (transaction_id, timestamp, sender, receiver, amount)
+        """
+        row = transfer_row(data)
+        with self._cond:
+            if len(self._buffer) < self.max_buffered:
+                self._buffer.append(row)
+                if len(self._buffer) >= self.batch_size:
+                    self._cond.notify()
+                row = None
+        if row is not None:
+            self._spill([row])
+        if self._thread is None:
+            self.start()
+
+    def pending(self) -> int:
+        """Records not yet written to BCCR (spooled ones are counted once the spool is opened)"""
+        return len(self._buffer) + (self._spooled or 0)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping:
+                    backoff = self._retry_at - time.monotonic()
+                    if backoff > 0:
+                        # BCCR failed recently: a full buffer must not skip the wait
+                        self._cond.wait(backoff)
+                    elif len(self._buffer) < self.batch_size:
+                        self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+            if time.monotonic() >= self._retry_at or stopping:
+                while self.flush() == self.batch_size:
+                    pass
+            if stopping:
+                return
+
+    def flush(self) -> int:
+        """
+        Write one batch to BCCR, spooled records first
+
+        Returns:
+            int: Rows written (0 if there was nothing to write or BCCR failed)
+        """
+        ids, rows = self._read_spool(self.batch_size)
+        taken = []
+        with self._cond:
+            while self._buffer and len(rows) + len(taken) < self.batch_size:
+                taken.append(self._buffer.popleft())
+        rows += taken
+        if not rows:
+            return 0
+
+        try:
+            with self.app.app_context():
+                write_batch(rows)
+        except Exception as e:
+            logger.error(f"BCCR transfer log flush failed, {len(rows)} records spooled: {e}")
+            self._spill(taken)
+            self._retry_at = time.monotonic() + self._retry_delay
+            self._retry_delay = min(self._retry_delay * 2, MAX_RETRY_DELAY)
+            return 0
+
+        self._delete_spooled(ids)
+        self._retry_delay = self.flush_interval
+        return len(rows)
+
+def write_batch(rows: list):
+    """Insert rows into BCCR sinpe_transfers in a single statement and commit"""
+    from psycopg2.extras import execute_values
+    from app.services.bccr_service import BCCRService
+
+    values = [
+        row[:1] + (datetime.fromisoformat(row[1]),) + row[2:6] + (Decimal(row[6]),) + row[7:]
+        for row in rows
+    ]
+    with BCCRService.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            execute_values(
+                cur,
+                f"INSERT INTO sinpe_transfers ({', '.join(COLUMNS)}) VALUES %s",
+                values,
+                page_size=len(values)
+            )
+        conn.commit()
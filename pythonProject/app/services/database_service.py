@@ -213,20 +213,38 @@ class DatabaseService:
         for phone_link in phone_links_data:
             print(f"  - {phone_link[1]} -> Account {phone_link[0]}")
     
+    def generate_dataset(self, progress=None, **params):
+        """
+        Generate a large synthetic dataset for benchmarks
+        
+        Args:
+            progress: Optional callback(table name, rows inserted)
+            **params: DatasetGenerator parameters (users, transactions, seed, ...)
+            
+        Returns:
+            dict: Rows inserted per table
+        """
+        from app.services.dataset_generator import DatasetGenerator
+        from app.services.phone_filter import PhoneFilter
+        
+        counts = DatasetGenerator(**params).generate(progress)
+        # Bulk-inserted subscriptions bypass the filter's insert hook
+        PhoneFilter.rebuild()
+        return counts
+    
     def reset_database(self):
         """Reset database (drop all tables and recreate)"""
+        from app.services.stats_service import StatsService
+        from app.services.ledger_service import LedgerService
         db.drop_all()
         db.create_all()
         self.create_sample_data()
+        # Dropping the tables dropped the counter triggers too
+        StatsService.install_counters(recheck=True)
+        LedgerService.refresh_hot()
         print("✓ Database reset successfully")
     
     def get_database_stats(self):
-        """Get database statistics"""
-        stats = {
-            'users': User.query.count(),
-            'accounts': Account.query.count(),
-            'phone_links': PhoneLink.query.count(),
-            'sinpe_subscriptions': SinpeSubscription.query.count(),
-            'transactions': Transaction.query.count()
-        }
-        return stats
\ No newline at end of file
+        """Get database statistics from the maintained counters"""
+        from app.services.stats_service import StatsService
+        return StatsService.get_stats()
\ No newline at end of file
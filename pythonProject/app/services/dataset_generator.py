@@ -0,0 +1,272 @@
+"""
+Dataset Generator - Deterministic, production-scale synthetic data for benchmarks
+"""
+
+from app.models import (
+    db, User, Account, UserAccount, PhoneLink, SinpeSubscription,
+    Transaction, LedgerEntry, BalanceCheckpoint
+)
+from app.services.account_number_service import AccountNumberService
+from sqlalchemy import func, insert
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import accumulate, islice
+import hashlib
+import random
+import uuid
+
+# External banks synthetic SINPE subscriptions are spread across
+EXTERNAL_BANK_CODES = ['0152', '0111']
+
+SAMPLE_PASSWORD = 'password123'
+
+def _deterministic_password_hash(password: str, salt: str, iterations: int = 600000) -> str:
+    """Werkzeug-compatible pbkdf2 hash with a fixed salt, computed once per dataset"""
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations).hex()
+    return f"pbkdf2:sha256:{iterations}${salt}${digest}"
+
+class DatasetGenerator:
+    """
+    Generate users, accounts, phone links, SINPE subscriptions and skewed
+    transaction histories with bulk inserts
+
+    Receivers follow a Zipf distribution over accounts, and a small set of
+    hot accounts (e.g. merchants) additionally absorbs a fixed share of all
+    credits. The same seed on the same starting database always produces
+    the same rows. User phone numbers are derived from ids (6xxxxxxx), so
+    a single database holds at most 10 million synthetic users.
+    """
+
+    def __init__(self, users: int = 1000, accounts_per_user: float = 1.5, transactions: int = 10000,
+                 phone_link_ratio: float = 0.8, external_subscriptions: int = 100,
+                 hot_account_ratio: float = 0.001, hot_traffic_share: float = 0.3,
+                 zipf_exponent: float = 1.1, failed_ratio: float = 0.02, days: int = 90,
+                 end_date: datetime = datetime(2025, 1, 1), seed: int = 42, batch_size: int = 10000):
+        self.users = users
+        self.accounts_per_user = accounts_per_user
+        self.transactions = transactions
+        self.phone_link_ratio = phone_link_ratio
+        self.external_subscriptions = external_subscriptions
+        self.hot_account_ratio = hot_account_ratio
+        self.hot_traffic_share = hot_traffic_share
+        self.zipf_exponent = zipf_exponent
+        self.failed_ratio = failed_ratio
+        self.days = days
+        self.end_date = end_date
+        self.seed = seed
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+
+    @staticmethod
+    def _next_id(model) -> int:
+        return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+    def _insert(self, model, rows, progress=None) -> int:
+        """Insert rows in batches, committing after each batch"""
+        rows = iter(rows)
+        total = 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            db.session.execute(insert(model), batch)
+            db.session.commit()
+            total += len(batch)
+            if progress:
+                progress(model.__tablename__, len(batch))
+        return total
+
+    def generate(self, progress=None) -> dict:
+        """
+        Generate and insert the dataset
+
+        Users and everything derived from them are generated and committed
+        one batch of users at a time, so memory stays flat at any size.
+
+        Args:
+            progress: Optional callback(table name, rows inserted)
+
+        Returns:
+            dict: Rows inserted per table
+        """
+        rng = self.rng
+        start_date = self.end_date - timedelta(days=self.days)
+        password_hash = _deterministic_password_hash(SAMPLE_PASSWORD, f"synth{self.seed}")
+        extra = max(0.0, self.accounts_per_user - 1)
+
+        first_user_id = self._next_id(User)
+        first_account_id = next_account_id = self._next_id(Account)
+        balances = {}
+        counts = dict.fromkeys(('users', 'accounts', 'phone_links', 'sinpe_subscriptions'), 0)
+
+        for batch_start in range(first_user_id, first_user_id + self.users, self.batch_size):
+            user_ids = range(batch_start, min(batch_start + self.batch_size, first_user_id + self.users))
+            user_rows = [{
+                'id': user_id,
+                'name': f"synth_user_{user_id}",
+                'email': f"synth{user_id}@example.com",
+                'phone': f"6{user_id % 10_000_000:07d}",
+                'password_hash': password_hash,
+                'created_at': start_date - timedelta(days=rng.randint(1, 365))
+            } for user_id in user_ids]
+
+            # Accounts: every user gets one, some get extra
+            owners = []
+            for user in user_rows:
+                count = 1 + int(extra) + (1 if rng.random() < extra - int(extra) else 0)
+                owners.extend([user] * count)
+
+            numbers = AccountNumberService.allocate_ibans(len(owners))
+            account_rows = []
+            for owner, number in zip(owners, numbers):
+                opening = Decimal(str(round(rng.lognormvariate(11.5, 1.0), 2)))
+                balances[next_account_id] = opening
+                account_rows.append({
+                    'id': next_account_id,
+                    'number': number,
+                    'currency': 'CRC' if rng.random() < 0.9 else 'USD',
+                    'opening_balance': opening,
+                    'created_at': owner['created_at']
+                })
+                next_account_id += 1
+
+            # Phone links and local SINPE subscriptions for each user's first account
+            linked, seen_users = [], set()
+            for owner, account in zip(owners, account_rows):
+                if owner['id'] not in seen_users and rng.random() < self.phone_link_ratio:
+                    linked.append((owner, account))
+                seen_users.add(owner['id'])
+
+            counts['users'] += self._insert(User, user_rows, progress)
+            counts['accounts'] += self._insert(Account, account_rows, progress)
+            self._insert(UserAccount, (
+                {'user_id': owner['id'], 'account_id': account['id']}
+                for owner, account in zip(owners, account_rows)
+            ), progress)
+            counts['phone_links'] += self._insert(PhoneLink, (
+                {'account_number': account['number'], 'phone': owner['phone'], 'created_at': account['created_at']}
+                for owner, account in linked
+            ), progress)
+            counts['sinpe_subscriptions'] += self._insert_subscriptions([
+                {'sinpe_number': owner['phone'], 'sinpe_bank_code': '0666',
+                 'sinpe_client_name': f"Synth Client {owner['id']}"}
+                for owner, _ in linked
+            ], progress)
+
+        for batch_start in range(0, self.external_subscriptions, self.batch_size):
+            counts['sinpe_subscriptions'] += self._insert_subscriptions([
+                {'sinpe_number': f"7{(self.seed * 1_000_003 + i) % 10_000_000:07d}",
+                 'sinpe_bank_code': rng.choice(EXTERNAL_BANK_CODES),
+                 'sinpe_client_name': f"Synth External {self.seed}-{i}"}
+                for i in range(batch_start, min(batch_start + self.batch_size, self.external_subscriptions))
+            ], progress)
+
+        account_ids = range(first_account_id, next_account_id)
+        counts.update(self._generate_transactions(account_ids, balances, start_date, progress))
+        return counts
+
+    def _insert_subscriptions(self, rows: list, progress=None) -> int:
+        """Insert one batch of subscriptions, skipping numbers already subscribed"""
+        rows = {row['sinpe_number']: row for row in rows}
+        existing = db.session.query(SinpeSubscription.sinpe_number).filter(
+            SinpeSubscription.sinpe_number.in_(list(rows))
+        )
+        for (number,) in existing:
+            del rows[number]
+        return self._insert(SinpeSubscription, rows.values(), progress)
+
+    def _receiver_sampler(self, account_ids: list):
+        """Return a function drawing k receiver ids with hot-account and Zipf skew"""
+        rng = self.rng
+        ranked = list(account_ids)
+        rng.shuffle(ranked)
+
+        hot_count = max(1, int(len(ranked) * self.hot_account_ratio))
+        hot = ranked[:hot_count]
+        cum_weights = list(accumulate(1.0 / (rank ** self.zipf_exponent) for rank in range(1, len(ranked) + 1)))
+
+        def sample(k: int) -> list:
+            zipf = rng.choices(ranked, cum_weights=cum_weights, k=k)
+            return [rng.choice(hot) if rng.random() < self.hot_traffic_share else receiver for receiver in zipf]
+
+        return sample
+
+    def _generate_transactions(self, account_ids: range, balances: dict, start_date: datetime, progress=None) -> dict:
+        rng = self.rng
+        if not account_ids or not self.transactions:
+            return {'transactions': 0, 'ledger_entries': 0, 'balance_checkpoints': 0}
+
+        sample_receivers = self._receiver_sampler(account_ids)
+        span = (self.end_date - start_date).total_seconds()
+
+        next_transaction_id = self._next_id(Transaction)
+        next_entry_id = self._next_id(LedgerEntry)
+        last_entry = {}
+        total_transactions = total_entries = 0
+
+        for start in range(0, self.transactions, self.batch_size):
+            size = min(self.batch_size, self.transactions - start)
+            receivers = sample_receivers(size)
+            transaction_rows, entry_rows = [], []
+
+            for offset, receiver in enumerate(receivers):
+                index = start + offset
+                sender_index = rng.randrange(len(account_ids))
+                sender = account_ids[sender_index]
+                if sender == receiver:
+                    sender = account_ids[(sender_index + 1) % len(account_ids)]
+                # Monotonic timestamps keep ledger ids and created_at in the same order
+                created_at = start_date + timedelta(seconds=span * (index + rng.random()) / self.transactions)
+                amount = Decimal(str(round(min(rng.lognormvariate(8.5, 1.2), 1_000_000), 2)))
+                status = 'failed' if rng.random() < self.failed_ratio else 'completed'
+                transaction_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+                transaction_rows.append({
+                    'id': next_transaction_id,
+                    'transaction_id': transaction_id,
+                    'from_account_id': sender,
+                    'to_account_id': receiver,
+                    'amount': amount,
+                    'currency': 'CRC',
+                    'status': status,
+                    'description': 'SINPE Móvil',
+                    'created_at': created_at
+                })
+                next_transaction_id += 1
+
+                if status != 'completed':
+                    continue
+                for account_id, direction in ((sender, 'debit'), (receiver, 'credit')):
+                    entry_rows.append({
+                        'id': next_entry_id,
+                        'transaction_id': transaction_id,
+                        'account_id': account_id,
+                        'direction': direction,
+                        'amount': amount,
+                        'description': 'SINPE Móvil',
+                        'created_at': created_at
+                    })
+                    balances[account_id] += amount if direction == 'credit' else -amount
+                    last_entry[account_id] = (next_entry_id, created_at)
+                    next_entry_id += 1
+
+            db.session.execute(insert(Transaction), transaction_rows)
+            db.session.execute(insert(LedgerEntry), entry_rows)
+            db.session.commit()
+            total_transactions += len(transaction_rows)
+            total_entries += len(entry_rows)
+            if progress:
+                progress('transactions', len(transaction_rows))
+
+        # One checkpoint per touched account so balance reads start at the end of history
+        checkpoints = self._insert(BalanceCheckpoint, (
+            {'account_id': account_id, 'last_entry_id': entry_id,
+             'balance': balances[account_id], 'created_at': created_at}
+            for account_id, (entry_id, created_at) in last_entry.items()
+        ), progress)
+
+        return {
+            'transactions': total_transactions,
+            'ledger_entries': total_entries,
+            'balance_checkpoints': checkpoints
+        }
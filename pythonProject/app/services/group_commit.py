@@ -0,0 +1,170 @@
+"""
+Group Commit - Apply concurrently arriving transfers in one database transaction
+"""
+
+from concurrent.futures import Future
+from flask import current_app, has_app_context
+from app.models import db
+from app.services.metrics_service import MetricsService
+from app.services.tracing import Tracer
+from app.services.transfer_executor import LaneFullError
+import queue
+import threading
+import time
+
+# Seconds the committer waits for more transfers after the first one of a group arrives
+WINDOW = 0.005
+
+# Transfers applied per shared commit
+MAX_BATCH = 64
+
+# Transfers waiting for the committer before new ones are refused
+QUEUE_SIZE = 1000
+
+# Seconds a caller waits for room in a full queue before LaneFullError
+ENQUEUE_TIMEOUT = 2.0
+
+class GroupCommitter:
+    """
+    Single writer thread that commits transfers in groups
+
+    Transfers submitted within WINDOW seconds of each other are applied one
+    after another in a single database transaction, each inside its own
+    savepoint, and committed together: one fsync for the whole group
+    instead of one per transfer. A transfer that fails only rolls back its
+    savepoint. Results are handed back only after the shared commit has
+    succeeded, so no caller is acknowledged for work that is not durable;
+    if the commit fails, every transfer of the group fails with it.
+
+    Code running inside a group must call GroupCommitter.commit() and
+    GroupCommitter.rollback() instead of the session's, which would end the
+    shared transaction.
+    """
+
+    _local = threading.local()
+
+    def __init__(self, app, window: float = WINDOW, max_batch: int = MAX_BATCH,
+                 queue_size: int = QUEUE_SIZE, enqueue_timeout: float = ENQUEUE_TIMEOUT):
+        self.app = app
+        self.window = window
+        self.max_batch = max_batch
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current():
+        """Group committer of the active Flask application (None if group commit is off)"""
+        if not has_app_context():
+            return None
+        return current_app.extensions.get('group_committer')
+
+    @staticmethod
+    def in_group() -> bool:
+        return getattr(GroupCommitter._local, 'savepoint', None) is not None
+
+    @staticmethod
+    def commit():
+        """Commit the session, or only flush when running inside a group (the group commits)"""
+        with Tracer.span('db.commit', group=GroupCommitter.in_group()):
+            if GroupCommitter.in_group():
+                db.session.flush()
+            else:
+                db.session.commit()
+
+    @staticmethod
+    def rollback():
+        """Roll back the session, or only the current transfer's savepoint inside a group"""
+        savepoint = getattr(GroupCommitter._local, 'savepoint', None)
+        if savepoint is None:
+            db.session.rollback()
+        elif savepoint.is_active:
+            savepoint.rollback()
+
+    def start(self):
+        """Start the committer thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._work, name='group-committer', daemon=True)
+            self._thread.start()
+        MetricsService.register_gauge('group_commit_queue', self._queue.qsize)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Queue fn(*args, **kwargs) for the next group
+
+        Raises:
+            LaneFullError: If the queue stays full for enqueue_timeout seconds
+        """
+        future = Future()
+        if GroupCommitter.in_group():
+            # Already on the committer thread: run as part of the current group
+            future.set_result(fn(*args, **kwargs))
+            return future
+
+        self.start()
+        try:
+            self._queue.put((future, Tracer.current(), fn, args, kwargs), timeout=self.enqueue_timeout)
+        except queue.Full:
+            raise LaneFullError("Group commit queue is full")
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """Run fn in the next group and return its result once the group is committed"""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            self._apply(self._collect())
+
+    def _apply(self, batch: list):
+        """Run a group of transfers in savepoints and commit them together"""
+        results = []
+        with self.app.app_context():
+            try:
+                for future, span, fn, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    savepoint = None
+                    try:
+                        savepoint = GroupCommitter._local.savepoint = db.session.begin_nested()
+                        with Tracer.attach(span):
+                            value = fn(*args, **kwargs)
+                        if savepoint.is_active:
+                            savepoint.commit()
+                        results.append((future, value, None))
+                    except Exception as e:
+                        if savepoint is not None and savepoint.is_active:
+                            savepoint.rollback()
+                        results.append((future, None, e))
+                    finally:
+                        GroupCommitter._local.savepoint = None
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                # Includes transfers of the batch not reached yet, which would otherwise wait forever
+                for future, _, _, _, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        for future, value, error in results:
+            if error is None:
+                future.set_result(value)
+            else:
+                future.set_exception(error)
@@ -0,0 +1,246 @@
+"""
+Import Service - Bulk import of migrated customers (users, accounts, phone links)
+"""
+
+from app.models import db, User, Account, UserAccount, PhoneLink
+from app.services.account_number_service import AccountNumberService
+from app.services.sinpe_service import SinpeService
+from app.utils.iban_generator import validate_ibans
+from werkzeug.security import generate_password_hash
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from sqlalchemy import insert
+import csv
+import json
+import os
+
+REQUIRED_FIELDS = ['name', 'email', 'phone', 'password']
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Cap on per-row errors kept in the report
+MAX_REPORTED_ERRORS = 1000
+
+SUPPORTED_FORMATS = ('csv', 'ndjson')
+
+class ImportService:
+
+    @staticmethod
+    def detect_format(filename: str = None, content_type: str = None) -> str:
+        """Guess the import format from a filename or content type"""
+        name = (filename or '').lower()
+        content_type = (content_type or '').lower()
+        if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonl' in content_type:
+            return 'ndjson'
+        return 'csv'
+
+    @staticmethod
+    def parse_records(stream, fmt: str):
+        """
+        Lazily parse an import file
+
+        Args:
+            stream: Text stream positioned at the start of the file
+            fmt: 'csv' (with header row) or 'ndjson'
+
+        Yields:
+            Tuples of (line number, record dict); unparseable lines yield
+            a record holding only an '__error__' key
+        """
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported import format: {fmt}")
+
+        if fmt == 'csv':
+            reader = csv.DictReader(stream)
+            for record in reader:
+                yield reader.line_num, {k.strip(): (v or '').strip() for k, v in record.items() if k}
+            return
+
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError('expected a JSON object')
+                yield line_number, record
+            except ValueError as e:
+                yield line_number, {'__error__': f'Invalid JSON: {e}'}
+
+    @staticmethod
+    def import_records(records, chunk_size: int = None, workers: int = None, progress=None) -> dict:
+        """
+        Import parsed records chunk by chunk
+
+        Each chunk is validated with set-based uniqueness queries, its
+        passwords are hashed in parallel and its users, accounts, user-account
+        links and phone links are bulk-inserted in one transaction.
+
+        Args:
+            records: Iterable of (line number, record) tuples
+            chunk_size: Records per validation/insert transaction
+            workers: Threads used for password hashing (defaults to CPU count)
+            progress: Optional callback receiving the report after each chunk
+
+        Returns:
+            dict: Report with processed/imported/failed counts and row errors
+        """
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        report = {'processed': 0, 'imported': 0, 'failed': 0, 'errors': []}
+        # Keys already used earlier in this file (DB checks only see committed chunks)
+        seen = {'name': set(), 'email': set(), 'number': set(), 'phone': set()}
+
+        records = iter(records)
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                ImportService._import_chunk(chunk, pool, seen, report)
+                if progress:
+                    progress(report)
+
+        return report
+
+    @staticmethod
+    def _record_error(report: dict, line: int, error: str):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line, 'error': error})
+
+    @staticmethod
+    def _validate_record(record: dict) -> dict:
+        """Normalize a record; raises ValueError describing the first problem"""
+        if '__error__' in record:
+            raise ValueError(record['__error__'])
+
+        for field in REQUIRED_FIELDS:
+            if not str(record.get(field) or '').strip():
+                raise ValueError(f'Missing field: {field}')
+
+        phone = str(record['phone']).strip()
+        sinpe_phone = str(record.get('sinpe_phone') or '').strip()
+        for value in filter(None, (phone, sinpe_phone)):
+            if not SinpeService.validate_phone_number(value):
+                raise ValueError(f'Invalid phone number format: {value}')
+
+        currency = str(record.get('currency') or 'CRC').strip().upper()
+        if len(currency) != 3:
+            raise ValueError(f'Invalid currency: {currency}')
+
+        try:
+            balance = Decimal(str(record.get('balance') or '0'))
+        except InvalidOperation:
+            raise ValueError(f"Invalid balance: {record.get('balance')}")
+        if balance < 0:
+            raise ValueError('Balance cannot be negative')
+
+        return {
+            'name': str(record['name']).strip(),
+            'email': str(record['email']).strip().lower(),
+            'phone': phone,
+            'password': str(record['password']),
+            'number': str(record.get('account_number') or '').strip(),
+            'currency': currency,
+            'balance': balance,
+            'sinpe_phone': sinpe_phone
+        }
+
+    @staticmethod
+    def _import_chunk(chunk: list, pool, seen: dict, report: dict):
+        report['processed'] += len(chunk)
+
+        # 1. Per-row validation
+        rows = []
+        for line, record in chunk:
+            try:
+                rows.append((line, ImportService._validate_record(record)))
+            except ValueError as e:
+                ImportService._record_error(report, line, str(e))
+
+        supplied = [(line, row) for line, row in rows if row['number']]
+        for (line, row), valid in zip(supplied, validate_ibans(row['number'] for _, row in supplied)):
+            if not valid:
+                row['error'] = f"Invalid IBAN: {row['number']}"
+
+        # 2. Set-based uniqueness against the database, one query per key
+        taken = {
+            'name': {v for (v,) in db.session.query(User.name).filter(
+                User.name.in_({row['name'] for _, row in rows}))},
+            'email': {v for (v,) in db.session.query(User.email).filter(
+                User.email.in_({row['email'] for _, row in rows}))},
+            'number': {v for (v,) in db.session.query(Account.number).filter(
+                Account.number.in_({row['number'] for _, row in rows if row['number']}))},
+            'phone': {v for (v,) in db.session.query(PhoneLink.phone).filter(
+                PhoneLink.phone.in_({row['sinpe_phone'] for _, row in rows if row['sinpe_phone']}))},
+        }
+
+        # Keys claimed by this chunk, added to seen only once it has committed
+        claimed = {key: set() for key in seen}
+        accepted = []
+        for line, row in rows:
+            keys = {'name': row['name'], 'email': row['email'],
+                    'number': row['number'], 'phone': row['sinpe_phone']}
+            error = row.get('error')
+            for key, value in keys.items():
+                if error:
+                    break
+                if value and (value in taken[key] or value in seen[key] or value in claimed[key]):
+                    error = f'Duplicate {key}: {value}'
+            if error:
+                ImportService._record_error(report, line, error)
+                continue
+            for key, value in keys.items():
+                if value:
+                    claimed[key].add(value)
+            accepted.append((line, row))
+
+        if not accepted:
+            return
+
+        # 3. Hash passwords in parallel (pbkdf2 releases the GIL) and allocate missing IBANs
+        hashes = list(pool.map(generate_password_hash, [row['password'] for _, row in accepted]))
+
+        missing = [row for _, row in accepted if not row['number']]
+        if missing:
+            for row, iban in zip(missing, AccountNumberService.allocate_ibans(len(missing))):
+                row['number'] = iban
+
+        # 4. Bulk insert the whole chunk in one transaction
+        try:
+            db.session.execute(insert(User), [
+                {'name': row['name'], 'email': row['email'], 'phone': row['phone'], 'password_hash': password_hash}
+                for (_, row), password_hash in zip(accepted, hashes)
+            ])
+            db.session.execute(insert(Account), [
+                {'number': row['number'], 'currency': row['currency'], 'opening_balance': row['balance']}
+                for _, row in accepted
+            ])
+
+            user_ids = dict(db.session.query(User.name, User.id).filter(
+                User.name.in_([row['name'] for _, row in accepted])))
+            account_ids = dict(db.session.query(Account.number, Account.id).filter(
+                Account.number.in_([row['number'] for _, row in accepted])))
+
+            db.session.execute(insert(UserAccount), [
+                {'user_id': user_ids[row['name']], 'account_id': account_ids[row['number']]}
+                for _, row in accepted
+            ])
+            phone_links = [
+                {'account_number': row['number'], 'phone': row['sinpe_phone']}
+                for _, row in accepted if row['sinpe_phone']
+            ]
+            if phone_links:
+                db.session.execute(insert(PhoneLink), phone_links)
+
+            db.session.commit()
+            report['imported'] += len(accepted)
+            for key, values in claimed.items():
+                seen[key] |= values
+
+        except Exception as e:
+            db.session.rollback()
+            for line, _ in accepted:
+                ImportService._record_error(report, line, f'Chunk insert failed: {e}')
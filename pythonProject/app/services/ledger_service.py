@@ -0,0 +1,484 @@
+"""
+Ledger Service - Append-only double-entry ledger and balance checkpoints
+"""
+
+from app.models import db, Account, LedgerEntry, BalanceCheckpoint, DailyBalance, HotAccount
+from sqlalchemy import func, case, insert
+from decimal import Decimal
+from datetime import datetime, date, time, timedelta
+import threading
+import weakref
+
+# Number of new entries on an account before a fresh checkpoint is written
+CHECKPOINT_INTERVAL = 100
+
+# Max accounts per IN (...) clause when batching balance lookups
+BATCH_SIZE = 500
+
+# Accounts processed per chunk by the end-of-day snapshot job
+SNAPSHOT_CHUNK_SIZE = 5000
+
+# Seconds between checkpoint consolidation runs for hot accounts
+CONSOLIDATE_INTERVAL = 30
+
+CENTS = Decimal('0.01')
+
+def _to_decimal(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(CENTS)
+
+def _signed_amount():
+    """SQL expression: +amount for credits, -amount for debits"""
+    return case(
+        (LedgerEntry.direction == 'credit', LedgerEntry.amount),
+        else_=-LedgerEntry.amount
+    )
+
+class LedgerService:
+
+    _consolidator = None
+    _hot = weakref.WeakKeyDictionary()  # engine -> frozenset of hot account ids
+
+    @staticmethod
+    def post_transfer(transaction_id: str, from_account, to_account, amount, description: str = ''):
+        """
+        Append the debit and credit legs of a transfer
+
+        A missing side (external sender or receiver) is booked against the
+        SINPE clearing leg (account_id NULL) so every transfer still balances.
+
+        Args:
+            transaction_id: Transaction.transaction_id the legs belong to
+            from_account: Debited Account, or None for incoming external funds
+            to_account: Credited Account, or None for outgoing external funds
+            amount: Positive transfer amount
+            description: Optional entry description
+
+        Returns:
+            List of the two LedgerEntry objects
+        """
+        amount = _to_decimal(amount)
+        if amount <= 0:
+            raise ValueError("Ledger amount must be positive")
+
+        entries = [
+            LedgerEntry(
+                transaction_id=transaction_id,
+                account_id=from_account.id if from_account else None,
+                direction='debit',
+                amount=amount,
+                description=description
+            ),
+            LedgerEntry(
+                transaction_id=transaction_id,
+                account_id=to_account.id if to_account else None,
+                direction='credit',
+                amount=amount,
+                description=description
+            )
+        ]
+        db.session.add_all(entries)
+        db.session.flush()
+
+        # Hot accounts are checkpointed by consolidate(), keeping their transfers to one insert
+        account_ids = {a.id for a in (from_account, to_account) if a}
+        LedgerService.checkpoint_if_due(account_ids - LedgerService.cached_hot_account_ids())
+        return entries
+
+    @staticmethod
+    def post_adjustment(account, new_balance, description: str = 'Balance adjustment'):
+        """
+        Bring an account to a target balance with a balancing adjustment
+
+        Args:
+            account: Account to adjust
+            new_balance: Desired balance
+            description: Entry description
+
+        Returns:
+            List of LedgerEntry objects (empty if no adjustment was needed)
+        """
+        delta = _to_decimal(new_balance) - LedgerService.get_balance(account)
+        if delta == 0:
+            return []
+
+        if delta > 0:
+            return LedgerService.post_transfer(None, None, account, delta, description)
+        return LedgerService.post_transfer(None, account, None, -delta, description)
+
+    @staticmethod
+    def _latest_checkpoint(account_id: int, as_of: datetime = None):
+        query = BalanceCheckpoint.query.filter_by(account_id=account_id)
+        if as_of is not None:
+            query = query.filter(BalanceCheckpoint.created_at <= as_of)
+        return query.order_by(BalanceCheckpoint.last_entry_id.desc()).first()
+
+    @staticmethod
+    def _delta_since(account_id: int, after_entry_id: int, as_of: datetime = None):
+        """Sum and max id of entries newer than after_entry_id"""
+        query = db.session.query(
+            func.coalesce(func.sum(_signed_amount()), 0),
+            func.max(LedgerEntry.id)
+        ).filter(
+            LedgerEntry.account_id == account_id,
+            LedgerEntry.id > after_entry_id
+        )
+        if as_of is not None:
+            query = query.filter(LedgerEntry.created_at <= as_of)
+        delta, last_id = query.one()
+        return _to_decimal(delta), last_id
+
+    @staticmethod
+    def get_balance(account, as_of: datetime = None) -> Decimal:
+        """
+        Compute an account balance from the nearest checkpoint plus later entries
+
+        Args:
+            account: Account object
+            as_of: Optional point in time; defaults to now
+
+        Returns:
+            Decimal balance
+        """
+        if as_of is not None and account.created_at and as_of < account.created_at:
+            return _to_decimal(0)
+
+        base, after_id = _to_decimal(account.opening_balance), 0
+
+        # Start from whichever of checkpoint / end-of-day snapshot is closer to as_of
+        checkpoint = LedgerService._latest_checkpoint(account.id, as_of)
+        if checkpoint:
+            base, after_id = _to_decimal(checkpoint.balance), checkpoint.last_entry_id
+
+        if as_of is not None:
+            snapshot = LedgerService._latest_snapshot(account.id, as_of)
+            if snapshot and snapshot.last_entry_id > after_id:
+                base, after_id = _to_decimal(snapshot.closing_balance), snapshot.last_entry_id
+
+        delta, _ = LedgerService._delta_since(account.id, after_id, as_of)
+        return base + delta
+
+    @staticmethod
+    def _latest_snapshot(account_id: int, as_of: datetime):
+        """Latest end-of-day snapshot whose day closed at or before as_of"""
+        return DailyBalance.query.filter(
+            DailyBalance.account_id == account_id,
+            DailyBalance.business_date <= (as_of - timedelta(days=1)).date()
+        ).order_by(DailyBalance.business_date.desc()).first()
+
+    @staticmethod
+    def snapshot_end_of_day(business_date: date, chunk_size: int = None) -> int:
+        """
+        Write closing balances of every account for a business day in bulk
+
+        Each account starts from its previous snapshot (or opening balance)
+        and only that day's ledger entries are aggregated, so a daily run
+        scans one day of history. Accounts already snapshotted for the day
+        are skipped, which makes the job safe to re-run.
+
+        Args:
+            business_date: Day to close (UTC)
+            chunk_size: Accounts per grouped query / bulk insert
+
+        Returns:
+            int: Number of snapshot rows written
+        """
+        chunk_size = chunk_size or SNAPSHOT_CHUNK_SIZE
+        cutoff = datetime.combine(business_date + timedelta(days=1), time.min)
+        written = 0
+        last_id = 0
+
+        while True:
+            accounts = db.session.query(
+                Account.id, Account.opening_balance
+            ).filter(
+                Account.id > last_id,
+                Account.created_at < cutoff
+            ).order_by(Account.id).limit(chunk_size).all()
+            if not accounts:
+                break
+
+            low, high = accounts[0].id, accounts[-1].id
+            last_id = high
+
+            done = {row.account_id for row in db.session.query(DailyBalance.account_id).filter(
+                DailyBalance.business_date == business_date,
+                DailyBalance.account_id.between(low, high)
+            )}
+
+            previous_dates = db.session.query(
+                DailyBalance.account_id,
+                func.max(DailyBalance.business_date).label('business_date')
+            ).filter(
+                DailyBalance.account_id.between(low, high),
+                DailyBalance.business_date < business_date
+            ).group_by(DailyBalance.account_id).subquery()
+
+            previous = db.session.query(
+                DailyBalance.account_id,
+                DailyBalance.closing_balance,
+                DailyBalance.last_entry_id
+            ).join(
+                previous_dates,
+                (DailyBalance.account_id == previous_dates.c.account_id) &
+                (DailyBalance.business_date == previous_dates.c.business_date)
+            ).subquery()
+
+            deltas = {
+                row.account_id: row for row in db.session.query(
+                    LedgerEntry.account_id,
+                    func.sum(_signed_amount()).label('delta'),
+                    func.max(LedgerEntry.id).label('last_entry_id')
+                ).outerjoin(
+                    previous, LedgerEntry.account_id == previous.c.account_id
+                ).filter(
+                    LedgerEntry.account_id.between(low, high),
+                    LedgerEntry.id > func.coalesce(previous.c.last_entry_id, 0),
+                    LedgerEntry.created_at < cutoff
+                ).group_by(LedgerEntry.account_id)
+            }
+            bases = {row.account_id: row for row in db.session.query(previous)}
+
+            rows = []
+            for account in accounts:
+                if account.id in done:
+                    continue
+                base = bases.get(account.id)
+                delta = deltas.get(account.id)
+                closing = _to_decimal(base.closing_balance if base else account.opening_balance)
+                last_entry_id = base.last_entry_id if base else 0
+                if delta:
+                    closing += _to_decimal(delta.delta)
+                    last_entry_id = max(last_entry_id, delta.last_entry_id)
+                rows.append({
+                    'account_id': account.id,
+                    'business_date': business_date,
+                    'closing_balance': closing,
+                    'last_entry_id': last_entry_id
+                })
+
+            if rows:
+                db.session.execute(insert(DailyBalance), rows)
+                written += len(rows)
+            db.session.commit()
+
+        return written
+
+    @staticmethod
+    def get_balances(accounts) -> dict:
+        """
+        Compute current balances for many accounts with two grouped queries per batch
+
+        Args:
+            accounts: Iterable of Account objects
+
+        Returns:
+            Dict mapping account id -> Decimal balance
+        """
+        accounts = list(accounts)
+        balances = {}
+
+        for start in range(0, len(accounts), BATCH_SIZE):
+            batch = accounts[start:start + BATCH_SIZE]
+            ids = [account.id for account in batch]
+
+            latest = db.session.query(
+                BalanceCheckpoint.account_id,
+                func.max(BalanceCheckpoint.last_entry_id).label('last_entry_id')
+            ).filter(
+                BalanceCheckpoint.account_id.in_(ids)
+            ).group_by(BalanceCheckpoint.account_id).subquery()
+
+            checkpoints = {
+                cp.account_id: cp for cp in BalanceCheckpoint.query.join(
+                    latest,
+                    (BalanceCheckpoint.account_id == latest.c.account_id) &
+                    (BalanceCheckpoint.last_entry_id == latest.c.last_entry_id)
+                )
+            }
+
+            deltas = dict(db.session.query(
+                LedgerEntry.account_id,
+                func.sum(_signed_amount())
+            ).outerjoin(
+                latest, LedgerEntry.account_id == latest.c.account_id
+            ).filter(
+                LedgerEntry.account_id.in_(ids),
+                LedgerEntry.id > func.coalesce(latest.c.last_entry_id, 0)
+            ).group_by(LedgerEntry.account_id).all())
+
+            for account in batch:
+                checkpoint = checkpoints.get(account.id)
+                base = checkpoint.balance if checkpoint else account.opening_balance
+                balances[account.id] = _to_decimal(base) + _to_decimal(deltas.get(account.id))
+
+        return balances
+
+    @staticmethod
+    def checkpoint_if_due(account_ids, interval: int = None):
+        """
+        Write a checkpoint for accounts with at least `interval` entries since the last one
+
+        Args:
+            account_ids: Account ids to inspect
+            interval: Entries between checkpoints (defaults to CHECKPOINT_INTERVAL)
+
+        Returns:
+            List of BalanceCheckpoint objects written
+        """
+        interval = interval or CHECKPOINT_INTERVAL
+        written = []
+        for account_id in set(account_ids):
+            checkpoint = LedgerService._latest_checkpoint(account_id)
+            after_id = checkpoint.last_entry_id if checkpoint else 0
+
+            pending = LedgerEntry.query.filter(
+                LedgerEntry.account_id == account_id,
+                LedgerEntry.id > after_id
+            ).count()
+            if pending >= interval:
+                written.append(LedgerService.write_checkpoint(account_id, checkpoint))
+        return written
+
+    @staticmethod
+    def hot_account_ids(account_ids=None) -> set:
+        """Ids of hot accounts (restricted to account_ids when given)"""
+        query = db.session.query(HotAccount.account_id)
+        if account_ids is not None:
+            if not account_ids:
+                return set()
+            query = query.filter(HotAccount.account_id.in_(list(account_ids)))
+        return {account_id for (account_id,) in query}
+
+    @staticmethod
+    def cached_hot_account_ids() -> frozenset:
+        """
+        Hot account ids as of the last refresh_hot() (loaded on first use)
+
+        Read by every posting, so it avoids a query per transfer. It is
+        refreshed by set_hot() and by each consolidation run, which picks
+        up accounts marked hot by another process (e.g. hot_accounts.py).
+        """
+        hot = LedgerService._hot.get(db.engine)
+        return LedgerService.refresh_hot() if hot is None else hot
+
+    @staticmethod
+    def refresh_hot() -> frozenset:
+        """Reload the cached hot account ids from the database"""
+        hot = frozenset(LedgerService.hot_account_ids())
+        LedgerService._hot[db.engine] = hot
+        return hot
+
+    @staticmethod
+    def set_hot(account, hot: bool = True):
+        """
+        Opt an account in or out of deferred checkpointing
+
+        Opting out writes a checkpoint first, so per-transfer checkpointing
+        resumes from an up-to-date balance.
+        """
+        row = db.session.get(HotAccount, account.id)
+        if hot and row is None:
+            db.session.add(HotAccount(account_id=account.id))
+        elif not hot and row is not None:
+            LedgerService.write_checkpoint(account.id)
+            db.session.delete(row)
+        db.session.commit()
+        LedgerService.refresh_hot()
+
+    @staticmethod
+    def consolidate(account_ids=None) -> int:
+        """
+        Fold the entries of hot accounts into fresh checkpoints
+
+        Between runs a hot account's balance is its last checkpoint plus the
+        entries since, exactly as for any other account, so reads stay
+        correct however long consolidation lags; it only bounds how many
+        entries a read has to sum.
+
+        Args:
+            account_ids: Accounts to consolidate (defaults to every hot account)
+
+        Returns:
+            int: Checkpoints written
+        """
+        ids = LedgerService.refresh_hot() if account_ids is None else set(account_ids)
+        written = 0
+        for account_id in sorted(ids):
+            previous = LedgerService._latest_checkpoint(account_id)
+            if LedgerService.write_checkpoint(account_id, previous) is not previous:
+                written += 1
+        db.session.commit()
+        return written
+
+    @staticmethod
+    def start_consolidator(app, interval: int = None):
+        """
+        Run consolidate() periodically in a daemon thread
+
+        Args:
+            app: Flask application providing the database context
+            interval: Seconds between runs (defaults to BALANCE_CONSOLIDATE_INTERVAL)
+
+        Returns:
+            threading.Thread running the loop (the existing one if already started)
+        """
+        if LedgerService._consolidator and LedgerService._consolidator.is_alive():
+            return LedgerService._consolidator
+
+        interval = interval or app.config.get('BALANCE_CONSOLIDATE_INTERVAL', CONSOLIDATE_INTERVAL)
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    with app.app_context():
+                        LedgerService.consolidate()
+                except Exception as e:
+                    app.logger.error(f"Hot account consolidation failed: {e}")
+
+        thread = threading.Thread(target=run, name='ledger-consolidator', daemon=True)
+        thread.stop = stop
+        thread.start()
+        LedgerService._consolidator = thread
+        return thread
+
+    @staticmethod
+    def write_checkpoint(account_id: int, previous=None):
+        """
+        Fold all entries of an account into a new checkpoint
+
+        Args:
+            account_id: Account to checkpoint
+            previous: Latest existing checkpoint, if already loaded
+
+        Returns:
+            BalanceCheckpoint object, or the previous one if nothing changed
+        """
+        previous = previous or LedgerService._latest_checkpoint(account_id)
+        if previous:
+            base, after_id = _to_decimal(previous.balance), previous.last_entry_id
+        else:
+            account = db.session.get(Account, account_id)
+            base, after_id = _to_decimal(account.opening_balance), 0
+
+        delta, last_id = LedgerService._delta_since(account_id, after_id)
+        if last_id is None:
+            return previous
+
+        last_entry = db.session.get(LedgerEntry, last_id)
+        checkpoint = BalanceCheckpoint(
+            account_id=account_id,
+            last_entry_id=last_id,
+            balance=base + delta,
+            created_at=last_entry.created_at
+        )
+        db.session.add(checkpoint)
+        db.session.flush()
+        return checkpoint
+
+    @staticmethod
+    def get_entries(account_id: int, limit: int = 50):
+        """Most recent ledger entries for an account"""
+        return LedgerEntry.query.filter_by(
+            account_id=account_id
+        ).order_by(LedgerEntry.id.desc()).limit(limit).all()
@@ -0,0 +1,217 @@
+"""
+Metrics Service - In-memory per-second operational metrics for the live dashboard
+"""
+
+from collections import deque
+from contextlib import contextmanager
+import threading
+import time
+
+# Seconds of per-second buckets kept in memory
+WINDOW_SECONDS = 300
+
+# Upper bounds (ms) of the request latency histogram; the last bucket is open-ended
+LATENCY_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+def _new_bucket(second: int) -> dict:
+    return {
+        'ts': second,
+        'requests': 0,
+        'errors': 0,
+        'client_errors': 0,
+        'latency': [0] * (len(LATENCY_BOUNDS_MS) + 1),
+        'latency_sum_ms': 0.0,
+        'db_writes': 0,
+        'db_write_ms': 0.0,
+    }
+
+class PeerCall:
+    """Outcome of one call to a peer bank; set ok = False for a failed response"""
+
+    def __init__(self):
+        self.ok = True
+
+class MetricsService:
+
+    _lock = threading.Lock()
+    _buckets = deque(maxlen=WINDOW_SECONDS)
+    _peers = {}
+    _gauges = {}
+
+    @staticmethod
+    def _bucket(now: float) -> dict:
+        """Current second's bucket; caller holds the lock"""
+        second = int(now)
+        buckets = MetricsService._buckets
+        if not buckets or buckets[-1]['ts'] != second:
+            buckets.append(_new_bucket(second))
+        return buckets[-1]
+
+    @staticmethod
+    def record_request(duration_ms: float, status_code: int):
+        """Count one handled API request"""
+        index = len(LATENCY_BOUNDS_MS)
+        for i, bound in enumerate(LATENCY_BOUNDS_MS):
+            if duration_ms <= bound:
+                index = i
+                break
+
+        with MetricsService._lock:
+            bucket = MetricsService._bucket(time.time())
+            bucket['requests'] += 1
+            bucket['latency'][index] += 1
+            bucket['latency_sum_ms'] += duration_ms
+            if status_code >= 500:
+                bucket['errors'] += 1
+            elif status_code >= 400:
+                bucket['client_errors'] += 1
+
+    @staticmethod
+    def record_db_write(duration_ms: float):
+        """Count one write statement; its duration includes any time spent waiting on locks"""
+        with MetricsService._lock:
+            bucket = MetricsService._bucket(time.time())
+            bucket['db_writes'] += 1
+            bucket['db_write_ms'] += duration_ms
+
+    @staticmethod
+    def record_peer(bank_code: str, ok: bool, duration_ms: float):
+        """Update the health of a peer bank (or BCCR) after a call"""
+        now = time.time()
+        with MetricsService._lock:
+            peer = MetricsService._peers.setdefault(bank_code, {
+                'calls': 0, 'failures': 0, 'consecutive_failures': 0,
+                'avg_latency_ms': None, 'last_ok': None, 'last_failure': None
+            })
+            peer['calls'] += 1
+            # Exponentially weighted so the figure follows recent behaviour
+            avg = peer['avg_latency_ms']
+            peer['avg_latency_ms'] = duration_ms if avg is None else 0.8 * avg + 0.2 * duration_ms
+            if ok:
+                peer['consecutive_failures'] = 0
+                peer['last_ok'] = now
+            else:
+                peer['failures'] += 1
+                peer['consecutive_failures'] += 1
+                peer['last_failure'] = now
+
+    @staticmethod
+    @contextmanager
+    def peer_call(bank_code: str):
+        """
+        Time a call to a peer bank and record its outcome
+
+        Exceptions count as failures; the caller may also mark a bad
+        response with ``call.ok = False``.
+        """
+        call = PeerCall()
+        started = time.perf_counter()
+        try:
+            yield call
+        except Exception:
+            call.ok = False
+            raise
+        finally:
+            MetricsService.record_peer(bank_code, call.ok, (time.perf_counter() - started) * 1000)
+
+    @staticmethod
+    def register_gauge(name: str, read):
+        """
+        Expose a point-in-time value (e.g. a queue depth)
+
+        Args:
+            name: Gauge name shown on the dashboard
+            read: Zero-argument callable returning a number
+        """
+        with MetricsService._lock:
+            MetricsService._gauges[name] = read
+
+    @staticmethod
+    def snapshot(since: int = None) -> dict:
+        """
+        Metrics for polling clients
+
+        Only completed seconds are returned, so a bucket never changes once
+        a client has fetched it and clients can ask for just the seconds
+        after the last one they received.
+
+        Args:
+            since: Last bucket timestamp already received by the client
+
+        Returns:
+            dict: Completed buckets newer than ``since``, peer health and gauges
+        """
+        current = int(time.time())
+        with MetricsService._lock:
+            buckets = [
+                dict(bucket, latency=list(bucket['latency']))
+                for bucket in MetricsService._buckets
+                if bucket['ts'] < current and (since is None or bucket['ts'] > since)
+            ]
+            peers = {code: dict(peer) for code, peer in MetricsService._peers.items()}
+            gauges = dict(MetricsService._gauges)
+
+        values = {}
+        for name, read in gauges.items():
+            try:
+                values[name] = read()
+            except Exception:
+                values[name] = None
+
+        return {
+            'now': current,
+            'latency_bounds_ms': list(LATENCY_BOUNDS_MS),
+            'buckets': buckets,
+            'peers': peers,
+            'gauges': values
+        }
+
+    @staticmethod
+    def summarize(buckets: list, seconds: int = None, bounds=LATENCY_BOUNDS_MS) -> dict:
+        """
+        Aggregate per-second buckets into rates and latency percentiles
+
+        Percentiles are reported as the upper bound of the histogram bucket
+        they fall into (None for the open-ended last bucket).
+
+        Args:
+            buckets: Buckets from snapshot()
+            seconds: Length of the period covered; idle seconds have no
+                bucket, so pass it to get true per-second rates
+            bounds: Latency histogram bounds the buckets were recorded with
+        """
+        seconds = max(1, seconds or len(buckets))
+        requests = sum(b['requests'] for b in buckets)
+        errors = sum(b['errors'] for b in buckets)
+        histogram = [sum(counts) for counts in zip(*(b['latency'] for b in buckets))] if buckets else []
+
+        def percentile(q: float):
+            if not requests:
+                return None
+            target, seen = q * requests, 0
+            for index, count in enumerate(histogram):
+                seen += count
+                if seen >= target:
+                    return bounds[index] if index < len(bounds) else None
+            return None
+
+        db_writes = sum(b['db_writes'] for b in buckets)
+        return {
+            'tps': requests / seconds,
+            'requests': requests,
+            'error_rate': errors / requests if requests else 0.0,
+            'client_error_rate': sum(b['client_errors'] for b in buckets) / requests if requests else 0.0,
+            'avg_latency_ms': sum(b['latency_sum_ms'] for b in buckets) / requests if requests else None,
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'db_writes_per_sec': db_writes / seconds,
+            'db_write_wait_ms': sum(b['db_write_ms'] for b in buckets) / seconds,
+        }
+
+    @staticmethod
+    def reset():
+        """Forget all recorded metrics (gauges stay registered)"""
+        with MetricsService._lock:
+            MetricsService._buckets.clear()
+            MetricsService._peers.clear()
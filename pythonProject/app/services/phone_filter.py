@@ -0,0 +1,99 @@
+"""
+Phone Filter - Bloom filter of known SINPE numbers for rejecting unregistered phones early
+"""
+
+from flask import current_app, has_app_context
+from app.models import db, SinpeSubscription
+from app.utils.bloom_filter import BloomFilter, FLAG_COMPLETE
+from sqlalchemy import event
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Target false-positive rate (a false positive only costs the normal database lookup)
+FP_RATE = 0.01
+
+# Spare capacity for numbers added between rebuilds
+HEADROOM = 1.25
+
+class PhoneFilter:
+    """
+    Bloom filter over every number in sinpe_subscription
+
+    Only trusted while the subscription mirror is authoritative: the
+    filter is rebuilt after each mirror sync and flagged complete when the
+    mirror was complete at build time. A number the filter has never seen
+    is then known to be unregistered without a database lookup. Numbers
+    subscribed locally are added in place as they are inserted.
+    """
+
+    _filters = {}
+
+    @staticmethod
+    def init_app(app):
+        """Track numbers subscribed locally (registered once per process)"""
+        if not event.contains(SinpeSubscription, 'after_insert', _subscription_inserted):
+            event.listen(SinpeSubscription, 'after_insert', _subscription_inserted)
+
+    @staticmethod
+    def _get():
+        path = current_app.config.get('PHONE_FILTER_PATH')
+        if not path:
+            return None
+        bloom = PhoneFilter._filters.get(path)
+        if bloom is None:
+            try:
+                bloom = PhoneFilter._filters[path] = BloomFilter(path)
+            except ValueError as e:
+                logger.error(f"Ignoring phone filter: {e}")
+                return None
+        return bloom
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Rebuild the filter from sinpe_subscription
+
+        Returns:
+            int: Numbers in the new filter (0 if no filter is configured)
+        """
+        from app.services.subscription_mirror import SubscriptionMirror
+
+        path = current_app.config.get('PHONE_FILTER_PATH')
+        if not path:
+            return 0
+
+        flags = FLAG_COMPLETE if SubscriptionMirror.is_authoritative() else 0
+        expected = int(SinpeSubscription.query.count() * HEADROOM)
+        numbers = (number for (number,) in db.session.query(SinpeSubscription.sinpe_number).yield_per(10000))
+        bloom = BloomFilter.build(path, numbers, expected, current_app.config.get('PHONE_FILTER_FP_RATE', FP_RATE), flags)
+        PhoneFilter._filters[path] = bloom
+        return bloom.count
+
+    @staticmethod
+    def definitely_unregistered(phone: str) -> bool:
+        """
+        True only if the filter is complete, recent and has never seen the number
+
+        Any doubt (no filter, stale filter, possible match) returns False so
+        the caller falls back to the normal lookups.
+        """
+        bloom = PhoneFilter._get()
+        if bloom is None or not bloom.loaded or not bloom.flags & FLAG_COMPLETE:
+            return False
+        max_age = 3 * current_app.config.get('BCCR_SYNC_INTERVAL', 300)
+        if time.time() - bloom.built_at > max_age:
+            return False
+        return phone not in bloom
+
+    @staticmethod
+    def add(phone: str):
+        """Add a newly subscribed number so the filter keeps accepting it"""
+        bloom = PhoneFilter._get()
+        if bloom is not None:
+            bloom.add(phone)
+
+def _subscription_inserted(mapper, connection, target):
+    if has_app_context():
+        PhoneFilter.add(target.sinpe_number)
@@ -0,0 +1,309 @@
+"""
+Profiler - Per-request cProfile or stack-sampling profiles, with hot functions aggregated across requests
+"""
+
+from collections import deque
+import cProfile
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds between stack samples of the sampling profiler
+SAMPLE_INTERVAL = 0.001
+
+# Stack samples kept per request (about a minute at the default interval)
+MAX_SAMPLES = 60000
+
+# Profiles kept on disk; older files are deleted
+KEEP_PROFILES = 200
+
+# Distinct functions aggregated; beyond this the coldest half is dropped
+MAX_FUNCTIONS = 5000
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def function_label(filename: str, line: int, name: str) -> str:
+    """'path:line(name)', with paths inside the project made relative"""
+    if filename.startswith(_ROOT + os.sep):
+        filename = os.path.relpath(filename, _ROOT)
+    return f"{filename}:{line}({name})"
+
+
+class SamplingProfiler:
+    """
+    Records the call stack of one thread at a fixed interval
+
+    Cheaper than cProfile for the profiled thread (nothing runs on each
+    call) and kept as a timeline, which exports to speedscope's sampled
+    format. Each sample is weighted by the real time since the previous one.
+    """
+
+    def __init__(self, thread_id: int = None, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval) and len(self.samples) < MAX_SAMPLES:
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            stack.reverse()
+            weight = (now - last) * 1000
+            last = now
+            # Consecutive identical stacks are merged into one longer sample
+            if self.samples and self.samples[-1][0] == stack:
+                self.samples[-1][1] += weight
+            else:
+                self.samples.append([stack, weight])
+
+    def functions(self) -> dict:
+        """(file, line, name) -> (self ms, total ms, calls); calls are unknown when sampling"""
+        result = {}
+        for stack, weight in self.samples:
+            for key in set(stack):
+                own, total, _ = result.get(key, (0.0, 0.0, None))
+                result[key] = (own, total + weight, None)
+            own, total, _ = result[stack[-1]]
+            result[stack[-1]] = (own + weight, total, None)
+        return result
+
+    def to_speedscope(self, name: str) -> dict:
+        frames, index = [], {}
+        samples = []
+        for stack, _ in self.samples:
+            row = []
+            for key in stack:
+                if key not in index:
+                    index[key] = len(frames)
+                    frames.append({'name': key[2], 'file': key[0], 'line': key[1]})
+                row.append(index[key])
+            samples.append(row)
+        weights = [round(weight, 3) for _, weight in self.samples]
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'banco-sinpe',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': round(sum(weights), 3),
+                'samples': samples,
+                'weights': weights,
+            }],
+        }
+
+
+class RequestProfile:
+    """A profile in progress for one request"""
+
+    def __init__(self, mode: str, interval: float = SAMPLE_INTERVAL):
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.duration_ms = None
+        if mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.profiler = SamplingProfiler(interval=interval)
+            self.profiler.start()
+
+    def stop(self):
+        if self.mode == 'cprofile':
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+        self.duration_ms = (time.perf_counter() - self.started) * 1000
+
+    def functions(self) -> dict:
+        if self.mode != 'cprofile':
+            return self.profiler.functions()
+        stats = pstats.Stats(self.profiler).stats
+        return {key: (tt * 1000, ct * 1000, nc) for key, (cc, nc, tt, ct, callers) in stats.items()}
+
+
+class Profiler:
+    """
+    Request profiles stored by request id, and hot functions across all of them
+
+    Deterministic profiles use cProfile and are saved as .pstats (open with
+    snakeviz or pstats); sampled profiles are saved as speedscope JSON.
+    Only one cProfile runs at a time in the process (the interpreter allows
+    a single active profiler on newer Pythons); a request asking for one
+    while another is running is sampled instead. Only the request thread is
+    profiled: work handed to transfer lanes or the group committer shows
+    as time spent waiting for its result.
+    """
+
+    directory = None
+    keep = KEEP_PROFILES
+    _lock = threading.Lock()
+    _cprofile = threading.Lock()
+    _profiles = deque()
+    _functions = {}
+    _requests = 0
+
+    @staticmethod
+    def configure(directory: str = None, keep: int = KEEP_PROFILES):
+        """Set the directory profiles are written to (None keeps only the aggregate)"""
+        Profiler.directory = directory
+        Profiler.keep = keep
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def start(mode: str = 'cprofile', interval: float = SAMPLE_INTERVAL) -> RequestProfile:
+        """Start profiling the current thread ('cprofile' or 'sample')"""
+        if mode == 'cprofile':
+            if Profiler._cprofile.acquire(blocking=False):
+                try:
+                    return RequestProfile('cprofile')
+                except Exception:
+                    Profiler._cprofile.release()
+                    raise
+            mode = 'sample'
+        return RequestProfile(mode, interval)
+
+    @staticmethod
+    def finish(profile: RequestProfile, request_id: str, label: str, trace_id: str = None) -> dict:
+        """
+        Stop a profile, save it under the request id and add it to the aggregate
+
+        Args:
+            profile: Profile started by start()
+            request_id: Id unique to the request, naming the stored file
+            label: Request description ('GET /api/accounts')
+            trace_id: Trace the request belongs to, kept for correlation
+
+        Returns:
+            dict: Metadata of the stored profile
+        """
+        try:
+            profile.stop()
+        finally:
+            if profile.mode == 'cprofile':
+                Profiler._cprofile.release()
+
+        entry = {
+            'id': request_id,
+            'trace_id': trace_id,
+            'request': label,
+            'mode': profile.mode,
+            'duration_ms': round(profile.duration_ms, 3),
+            'ts': time.time(),
+            'file': None,
+        }
+        if Profiler.directory:
+            try:
+                entry['file'] = Profiler._save(profile, request_id, label)
+            except OSError as e:
+                logger.warning(f"Could not save profile {request_id}: {e}")
+
+        functions = profile.functions()
+        with Profiler._lock:
+            Profiler._requests += 1
+            for (filename, line, name), (own, total, calls) in functions.items():
+                stats = Profiler._functions.setdefault((filename, line, name), {
+                    'function': function_label(filename, line, name),
+                    'self_ms': 0.0, 'total_ms': 0.0, 'calls': 0, 'requests': 0
+                })
+                stats['self_ms'] += own
+                stats['total_ms'] += total
+                stats['calls'] += calls or 0
+                stats['requests'] += 1
+            if len(Profiler._functions) > MAX_FUNCTIONS:
+                hottest = sorted(Profiler._functions.items(), key=lambda item: item[1]['self_ms'], reverse=True)
+                Profiler._functions = dict(hottest[:MAX_FUNCTIONS // 2])
+
+            Profiler._profiles.append(entry)
+            expired = []
+            while len(Profiler._profiles) > Profiler.keep:
+                expired.append(Profiler._profiles.popleft())
+
+        for old in expired:
+            if old['file']:
+                try:
+                    os.remove(os.path.join(Profiler.directory, old['file']))
+                except OSError:
+                    pass
+        return entry
+
+    @staticmethod
+    def _save(profile: RequestProfile, request_id: str, label: str) -> str:
+        if profile.mode == 'cprofile':
+            filename = f"{request_id}.pstats"
+            profile.profiler.dump_stats(os.path.join(Profiler.directory, filename))
+        else:
+            filename = f"{request_id}.speedscope.json"
+            with open(os.path.join(Profiler.directory, filename), 'w') as f:
+                json.dump(profile.profiler.to_speedscope(label), f, separators=(',', ':'))
+        return filename
+
+    @staticmethod
+    def path(request_id: str):
+        """File of a stored profile, or None if unknown (only ids listed are served)"""
+        with Profiler._lock:
+            for entry in Profiler._profiles:
+                if entry['id'] == request_id and entry['file']:
+                    return os.path.join(Profiler.directory, entry['file'])
+        return None
+
+    @staticmethod
+    def reset():
+        with Profiler._lock:
+            Profiler._functions = {}
+            Profiler._requests = 0
+
+    @staticmethod
+    def snapshot(sort: str = 'self', limit: int = 30) -> dict:
+        """
+        Hottest functions across profiled requests and the stored profiles
+
+        Args:
+            sort: Order by 'self' (time in the function itself) or 'total'
+                (including callees)
+            limit: Number of functions returned
+        """
+        key = 'total_ms' if sort == 'total' else 'self_ms'
+        with Profiler._lock:
+            functions = [dict(stats) for stats in Profiler._functions.values()]
+            profiles = list(Profiler._profiles)
+            requests = Profiler._requests
+
+        functions.sort(key=lambda stats: stats[key], reverse=True)
+        for stats in functions:
+            stats['self_ms'] = round(stats['self_ms'], 3)
+            stats['total_ms'] = round(stats['total_ms'], 3)
+
+        return {
+            'requests': requests,
+            'functions': functions[:limit],
+            'profiles': profiles[::-1],
+        }
@@ -0,0 +1,219 @@
+"""
+Query Stats - Per-fingerprint SQL timing with plans captured for slow statements
+"""
+
+from collections import deque
+from functools import lru_cache
+import hashlib
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this (ms) are logged and get their plan captured
+SLOW_QUERY_MS = 100
+
+# Distinct fingerprints tracked; beyond this the one with the least total time is dropped
+MAX_FINGERPRINTS = 1000
+
+# Slow statements kept for the recent list
+RECENT_SLOW = 100
+
+# Seconds before a slow fingerprint's plan is captured again (it may change after new indexes)
+PLAN_TTL = 300
+
+# Longest statement text kept for a sample
+MAX_STATEMENT_LENGTH = 2000
+
+_EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\$\d+")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a statement so that runs differing only in values group together
+
+    Literals and bind placeholders become ?, lists of them (IN lists,
+    multi-row VALUES) become (...), and whitespace is collapsed.
+    """
+    text = _STRING.sub('?', statement)
+    text = _NUMBER.sub('?', text)
+    text = _PLACEHOLDER.sub('?', text)
+    text = _LIST.sub('(...)', text)
+    text = _ROWS.sub('(...)', text)
+    return _SPACE.sub(' ', text).strip()
+
+
+def explain(conn, statement: str, parameters) -> list:
+    """
+    Plan of a statement, one line per step
+
+    Uses EXPLAIN QUERY PLAN on SQLite and EXPLAIN elsewhere (which plans
+    without running the statement). Runs on a separate cursor of the
+    same DBAPI connection, so it sees the same transaction.
+    """
+    sqlite = conn.dialect.name == 'sqlite'
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(('EXPLAIN QUERY PLAN ' if sqlite else 'EXPLAIN ') + statement, parameters)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    if not sqlite:
+        return [str(row[0]) for row in rows]
+
+    # SQLite rows are (id, parent, notused, detail); indent each step under its parent
+    depth = {0: -1}
+    lines = []
+    for step_id, parent, _, detail in rows:
+        depth[step_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[step_id] + detail)
+    return lines
+
+
+class QueryStats:
+    """
+    Aggregated statistics of every SQL statement run by the application
+
+    Statements are grouped by fingerprint. Statements slower than
+    SLOW_QUERY_MS are logged, kept in a recent list, and the first (or
+    slowest) one of each fingerprint has its plan captured with EXPLAIN.
+    """
+
+    threshold_ms = SLOW_QUERY_MS
+    capture_plans = True
+    _lock = threading.Lock()
+    _stats = {}
+    _recent = deque(maxlen=RECENT_SLOW)
+
+    @staticmethod
+    def configure(threshold_ms: float = SLOW_QUERY_MS, capture_plans: bool = True):
+        QueryStats.threshold_ms = threshold_ms
+        QueryStats.capture_plans = capture_plans
+
+    @staticmethod
+    def reset():
+        with QueryStats._lock:
+            QueryStats._stats.clear()
+            QueryStats._recent.clear()
+
+    @staticmethod
+    def record(conn, statement: str, parameters, duration_ms: float, executemany: bool = False,
+               error: str = None):
+        """Count one executed statement; explains it when it is slow"""
+        text = fingerprint(statement)
+        slow = duration_ms >= QueryStats.threshold_ms
+        now = time.time()
+
+        with QueryStats._lock:
+            stats = QueryStats._stats.get(text)
+            if stats is None:
+                if len(QueryStats._stats) >= MAX_FINGERPRINTS:
+                    QueryStats._evict()
+                stats = QueryStats._stats[text] = {
+                    'id': hashlib.sha1(text.encode()).hexdigest()[:12],
+                    'fingerprint': text,
+                    'calls': 0,
+                    'errors': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'slow_calls': 0,
+                    'last_seen': None,
+                    'slowest': None,
+                    'plan': None,
+                    'plan_captured_at': None,
+                }
+            stats['calls'] += 1
+            stats['total_ms'] += duration_ms
+            stats['max_ms'] = max(stats['max_ms'], duration_ms)
+            stats['last_seen'] = now
+            if error:
+                stats['errors'] += 1
+            if not slow:
+                return
+
+            stats['slow_calls'] += 1
+            from app.services.tracing import Tracer
+            span = Tracer.current()
+            sample = {
+                'statement': statement[:MAX_STATEMENT_LENGTH],
+                'parameters': repr(parameters)[:MAX_STATEMENT_LENGTH],
+                'duration_ms': round(duration_ms, 3),
+                'ts': now,
+                'trace_id': span.trace_id if span is not None else None,
+                'error': error,
+            }
+            slowest = stats['slowest'] is None or duration_ms > stats['slowest']['duration_ms']
+            if slowest:
+                stats['slowest'] = sample
+            QueryStats._recent.append(dict(sample, id=stats['id']))
+
+            captured = stats['plan_captured_at']
+            wants_plan = (
+                QueryStats.capture_plans and not executemany and not error
+                and statement.lstrip()[:6].upper().startswith(_EXPLAINABLE)
+                and (captured is None or slowest or now - captured > PLAN_TTL)
+            )
+            if wants_plan:
+                # Claimed under the lock so concurrent slow runs explain only once
+                stats['plan_captured_at'] = now
+
+        logger.warning(f"Slow query ({duration_ms:.1f} ms): {text}")
+        if not wants_plan:
+            return
+        try:
+            plan = explain(conn, statement, parameters)
+        except Exception as e:
+            plan = [f"EXPLAIN failed: {e}"]
+        with QueryStats._lock:
+            stats['plan'] = plan
+
+    @staticmethod
+    def _evict():
+        """Drop the fingerprint with the least total time; caller holds the lock"""
+        coldest = min(QueryStats._stats, key=lambda text: QueryStats._stats[text]['total_ms'])
+        del QueryStats._stats[coldest]
+
+    @staticmethod
+    def snapshot(sort: str = 'total', limit: int = 20) -> dict:
+        """
+        Top fingerprints and the most recent slow statements
+
+        Args:
+            sort: Order by 'total', 'mean', 'max', 'calls' or 'slow' (slow calls)
+            limit: Number of fingerprints returned
+        """
+        keys = {
+            'total': 'total_ms', 'mean': 'mean_ms', 'max': 'max_ms', 'calls': 'calls', 'slow': 'slow_calls'
+        }
+        key = keys.get(sort, 'total_ms')
+        with QueryStats._lock:
+            queries = [
+                dict(stats, plan=list(stats['plan']) if stats['plan'] else None,
+                     mean_ms=stats['total_ms'] / stats['calls'])
+                for stats in QueryStats._stats.values()
+            ]
+            recent = list(QueryStats._recent)
+
+        queries.sort(key=lambda stats: stats[key], reverse=True)
+        for stats in queries:
+            stats['total_ms'] = round(stats['total_ms'], 3)
+            stats['mean_ms'] = round(stats['mean_ms'], 3)
+            stats['max_ms'] = round(stats['max_ms'], 3)
+
+        return {
+            'threshold_ms': QueryStats.threshold_ms,
+            'fingerprints': len(queries),
+            'queries': queries[:limit],
+            'recent_slow': recent[::-1],
+        }
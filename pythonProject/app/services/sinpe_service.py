@@ -5,9 +5,16 @@ SINPE Service - Core business logic for SINPE transfers
 from app.models import db, User, Account, UserAccount, PhoneLink, SinpeSubscription, Transaction
 from app.utils.hmac_generator import generate_nack_response, generate_ack_response
 from app.services.bccr_service import BCCRService
+from app.services.ledger_service import LedgerService
+from app.services.metrics_service import MetricsService
+from app.services.bank_registry import BankRegistry, canonical_code, wire_code
+from app.services.subscription_mirror import SubscriptionMirror
+from app.services.phone_filter import PhoneFilter
+from app.services.transfer_executor import run_serialized
+from app.services.group_commit import GroupCommitter
+from app.services.tracing import Tracer
 from decimal import Decimal
 import uuid
-import requests
 import json
 from datetime import datetime
 from flask import current_app, g
@@ -56,6 +63,93 @@ class SinpeService:
         return SinpeSubscription.query.filter_by(sinpe_number=phone).first()
     
     @staticmethod
+    def find_phone_subscriptions(phones: list) -> dict:
+        """
+        Find many phone subscriptions with one IN query per chunk
+        
+        Args:
+            phones: Phone numbers to search for
+            
+        Returns:
+            dict: phone -> SinpeSubscription for the numbers found
+        """
+        phones = list(dict.fromkeys(phones))
+        found = {}
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(phones), 500):
+            chunk = phones[start:start + 500]
+            for subscription in SinpeSubscription.query.filter(SinpeSubscription.sinpe_number.in_(chunk)):
+                found[subscription.sinpe_number] = subscription
+        return found
+    
+    @staticmethod
+    def validate_phone_numbers(phones: list) -> list:
+        """
+        Resolve many phone numbers: local subscriptions first, then one BCCR
+        query for the rest
+        
+        Every number gets its own status, so one bad or unknown number never
+        fails the batch:
+            registered      - found locally or in BCCR (name, bank_code, bank_name, source)
+            not_registered  - not found anywhere
+            invalid         - not an 8-digit phone number
+            unavailable     - not found locally and BCCR could not be reached
+        
+        Args:
+            phones: Phone numbers as supplied by the client
+            
+        Returns:
+            list: One result per distinct number, in request order
+        """
+        registry = BankRegistry.current()
+        results = {}
+        for phone in phones:
+            clean = ''.join(filter(str.isdigit, str(phone)))
+            key = clean if len(clean) == 8 else str(phone)
+            if key not in results:
+                results[key] = {'phone': key, 'status': 'registered' if len(clean) == 8 else 'invalid'}
+        
+        valid = []
+        for phone, result in results.items():
+            if result['status'] != 'registered':
+                continue
+            if PhoneFilter.definitely_unregistered(phone):
+                result['status'] = 'not_registered'
+            else:
+                valid.append(phone)
+        
+        local = SinpeService.find_phone_subscriptions(valid)
+        for phone, subscription in local.items():
+            results[phone].update(
+                name=subscription.sinpe_client_name,
+                bank_code=wire_code(subscription.sinpe_bank_code),
+                bank_name=registry.name_for(subscription.sinpe_bank_code),
+                source='local'
+            )
+        
+        misses = [phone for phone in valid if phone not in local]
+        if not misses or SubscriptionMirror.is_authoritative():
+            # A complete, recent mirror of BCCR makes a local miss final
+            remote = {}
+        else:
+            remote = BCCRService.validate_sinpe_numbers(misses)
+        for phone in misses:
+            if remote is None:
+                results[phone]['status'] = 'unavailable'
+            elif phone in remote:
+                results[phone].update(
+                    name=remote[phone]['name'],
+                    bank_code=remote[phone]['bank_code'],
+                    bank_name=registry.name_for(remote[phone]['bank_code']),
+                    source='bccr'
+                )
+            else:
+                results[phone]['status'] = 'not_registered'
+        
+        return list(results.values())
+    
+    @staticmethod
+    @Tracer.traced('SinpeService.process_sinpe_transfer')
     def process_sinpe_transfer(data: dict, current_user=None) -> dict:
         """
         Process SINPE transfer between accounts
@@ -77,20 +171,21 @@ class SinpeService:
                 return generate_nack_response("Sender account not found")
             
             # Verify account ownership
-            user_account = UserAccount.query.filter_by(
-                user_id=current_user.id,
-                account_id=sender_account.id
-            ).first()
+            with Tracer.span('ownership_check'):
+                user_account = UserAccount.query.filter_by(
+                    user_id=current_user.id,
+                    account_id=sender_account.id
+                ).first()
             if not user_account:
                 return generate_nack_response("No permission to use this account")
             
             # Check if this is an external transfer
+            registry = BankRegistry.current()
             receiver_bank = data['receiver']['bank_code']
-            if receiver_bank.lstrip('0') != "666":  # Compare without leading zeros
-                # External transfer - forward to other bank
-                # Ensure bank codes are properly formatted
-                data['sender']['bank_code'] = "666"  # BCCR format without leading 0
-                data['receiver']['bank_code'] = receiver_bank.lstrip('0')  # Remove leading 0 for BCCR
+            if not registry.is_local(receiver_bank):
+                # External transfer - forward to other bank with BCCR-format codes
+                data['sender']['bank_code'] = registry.local.wire_code
+                data['receiver']['bank_code'] = wire_code(receiver_bank)
                 return SinpeService._handle_external_transfer(data)
             
             # Local transfer
@@ -103,10 +198,6 @@ class SinpeService:
             if sender_account.balance < amount:
                 return generate_nack_response("Insufficient funds")
             
-            # Process transfer
-            sender_account.balance -= amount
-            receiver_account.balance += amount
-            
             # Create transaction record
             transaction = Transaction(
                 transaction_id=data['transaction_id'],
@@ -119,21 +210,30 @@ class SinpeService:
             )
             
             db.session.add(transaction)
-            db.session.commit()
+            
+            # Process transfer
+            LedgerService.post_transfer(
+                transaction.transaction_id, sender_account, receiver_account, amount, transaction.description
+            )
+            GroupCommitter.commit()
             
             return generate_ack_response({
                 'transaction': transaction.to_dict()
             })
             
         except Exception as e:
-            db.session.rollback()
+            GroupCommitter.rollback()
             return generate_nack_response(str(e))
     
     @staticmethod
+    @Tracer.traced('SinpeService.send_sinpe_movil')
     def send_sinpe_movil(sender_phone: str, receiver_phone: str, amount: float, currency: str = "CRC", description: str = "", current_user=None):
         """
         Process SINPE mobile transfer
         
+        Runs in the calling thread, outside the per-account lanes; use
+        execute_sinpe_movil wherever other transfers may run concurrently.
+        
         Args:
             sender_phone: Sender's phone number
             receiver_phone: Receiver's phone number
@@ -145,6 +245,30 @@ class SinpeService:
         Returns:
             Transaction object
             
+        Raises:
+            Exception: If transfer cannot be processed
+        """
+        plan = SinpeService._resolve_sinpe_movil(sender_phone, receiver_phone, amount, current_user)
+        if plan['external'] is None:
+            return SinpeService._post_sinpe_movil(plan, sender_phone, receiver_phone, amount, currency, description)
+        
+        transaction = SinpeService._post_sinpe_movil(
+            plan, sender_phone, receiver_phone, amount, currency, description, status='pending'
+        )
+        return SinpeService._complete_external_sinpe_movil(
+            plan, transaction.transaction_id, sender_phone, receiver_phone, amount, currency, description
+        )
+    
+    @staticmethod
+    def _resolve_sinpe_movil(sender_phone: str, receiver_phone: str, amount: float, current_user=None) -> dict:
+        """
+        Validate a SINPE mobile transfer and find both sides, without writing anything
+        
+        Returns:
+            dict: from_account_id, to_account_id, lane_key (sender account
+                number, else receiver phone) and external (receiver bank_code
+                and name when the receiver is at another bank, else None)
+            
         Raises:
             Exception: If transfer cannot be processed
         """
@@ -162,14 +286,14 @@ class SinpeService:
             # Create temporary subscription for external number
             subscription = SinpeSubscription(
                 sinpe_number=bccr_result['phone'],
-                sinpe_bank_code=f"0{bccr_result['bank_code']}",  # Add leading zero for routing
+                sinpe_bank_code=canonical_code(bccr_result['bank_code']),
                 sinpe_client_name=bccr_result['name']
             )
         
         # 2. Get receiver account info
         receiver_link = PhoneLink.query.filter_by(phone=receiver_phone).first()
         to_account = None
-        is_external_transfer = False
+        external = None
         
         if receiver_link:
             # Local receiver
@@ -178,13 +302,10 @@ class SinpeService:
                 raise Exception("La cuenta destino no existe.")
         else:
             # External receiver - need to handle inter-bank transfer
-            is_external_transfer = True
-            if not subscription:
-                raise Exception("No se puede procesar transferencia externa sin información del banco destino.")
+            external = {'bank_code': subscription.sinpe_bank_code, 'name': subscription.sinpe_client_name}
         
         # 3. Check sender account
         sender_link = PhoneLink.query.filter_by(phone=sender_phone).first()
-        from_account_id = None
         from_account = None
         
         if sender_link:
@@ -194,59 +315,157 @@ class SinpeService:
                 
             # Validate user ownership if current_user is provided
             if current_user:
-                user_account = UserAccount.query.filter_by(
-                    user_id=current_user.id, 
-                    account_id=from_account.id
-                ).first()
+                with Tracer.span('ownership_check'):
+                    user_account = UserAccount.query.filter_by(
+                        user_id=current_user.id, 
+                        account_id=from_account.id
+                    ).first()
                 if not user_account:
                     raise Exception("No tiene permisos para usar esta cuenta.")
-                
-            if from_account.balance < Decimal(str(amount)):
-                raise Exception("Fondos insuficientes en la cuenta origen.")
-                
-            from_account_id = from_account.id
         else:
             # External sender - this is an incoming transfer
             if not current_user:
                 raise Exception("Se requiere autenticación para transferencias externas.")
         
-        # 4. Process transfer based on type
-        transaction_id = str(uuid.uuid4())
+        return {
+            'from_account_id': from_account.id if from_account else None,
+            'to_account_id': to_account.id if to_account else None,
+            'lane_key': sender_link.account_number if sender_link else receiver_phone,
+            'external': external
+        }
+    
+    @staticmethod
+    def _post_sinpe_movil(plan: dict, sender_phone: str, receiver_phone: str, amount: float, currency: str,
+                          description: str, status: str = "completed"):
+        """
+        Check the sender's funds, record the transaction and post it to the ledger
         
-        if is_external_transfer:
-            # Handle external transfer
-            result = SinpeService._process_external_transfer(
-                sender_phone, receiver_phone, amount, currency, description, transaction_id
-            )
-            if not result['success']:
-                raise Exception(result['error'])
-        else:
-            # Local transfer
-            if from_account:
-                # Deduct funds from sender
-                from_account.balance -= Decimal(str(amount))
-            
-            # Credit funds to receiver
-            to_account.balance += Decimal(str(amount))
+        The only step that must be serialized per sender account; for an
+        external receiver it runs with status 'pending' before the peer is
+        called, so the debit is reserved while the peer answers.
+        
+        Returns:
+            Transaction object
+        """
+        from_account = db.session.get(Account, plan['from_account_id']) if plan['from_account_id'] else None
+        to_account = db.session.get(Account, plan['to_account_id']) if plan['to_account_id'] else None
         
-        # 5. Create transaction record
+        if from_account and from_account.balance < Decimal(str(amount)):
+            raise Exception("Fondos insuficientes en la cuenta origen.")
+        
+        transaction_id = str(uuid.uuid4())
         transaction = Transaction(
             transaction_id=transaction_id,
-            from_account_id=from_account_id,
-            to_account_id=to_account.id if to_account else None,
+            from_account_id=plan['from_account_id'],
+            to_account_id=plan['to_account_id'],
             amount=Decimal(str(amount)),
             currency=currency,
             description=description,
             sender_phone=sender_phone,
             receiver_phone=receiver_phone,
-            status="completed"
+            status=status
         )
         
         db.session.add(transaction)
-        db.session.commit()
+        
+        # Debit sender and credit receiver (external sides go to the clearing leg)
+        LedgerService.post_transfer(transaction_id, from_account, to_account, amount, description)
+        GroupCommitter.commit()
         
         return transaction
     
+    @staticmethod
+    def _complete_external_sinpe_movil(plan: dict, transaction_id: str, sender_phone: str, receiver_phone: str,
+                                       amount: float, currency: str, description: str):
+        """
+        Send a reserved transfer to the receiver's bank and settle it
+        
+        On success the transaction is completed; otherwise it is marked
+        failed, the reserved debit is credited back and the peer's error
+        is raised. Runs in the calling thread: it waits on the network and
+        holds no transfer lane.
+        
+        Returns:
+            Transaction object
+        """
+        result = SinpeService._process_external_sinpe_movil(
+            sender_phone, receiver_phone, amount, currency, description, transaction_id, plan['external']
+        )
+        
+        transaction = Transaction.query.filter_by(transaction_id=transaction_id).one()
+        if result['success']:
+            transaction.status = 'completed'
+            db.session.commit()
+            return transaction
+        
+        transaction.status = 'failed'
+        if plan['from_account_id'] is not None:
+            # A credit needs no lane: it cannot overdraw the account
+            from_account = db.session.get(Account, plan['from_account_id'])
+            LedgerService.post_transfer(transaction_id, None, from_account, amount, f"Reversal: {description}")
+        db.session.commit()
+        raise Exception(result['error'])
+    
+    @staticmethod
+    def execute_sinpe_movil(sender_phone: str, receiver_phone: str, amount: float, currency: str = "CRC", description: str = "", current_user=None) -> dict:
+        """
+        Run the postings of a SINPE mobile transfer on the sender account's transfer lane
+
+        Transfers debiting the same account are serialized, so the balance
+        check and the postings of one cannot interleave with another's.
+        Only that step runs on the lane (or in the group commit): the
+        receiver lookup, which may query BCCR, runs before it, and for a
+        receiver at another bank the peer call runs after it in the calling
+        thread, against the debit reserved on the lane. A slow peer thus
+        delays only its own transfers.
+
+        Returns:
+            dict: The created transaction
+
+        Raises:
+            LaneFullError: If the account's lane is full
+            Exception: If transfer cannot be processed
+        """
+        plan = SinpeService._resolve_sinpe_movil(sender_phone, receiver_phone, amount, current_user)
+        status = 'completed' if plan['external'] is None else 'pending'
+
+        def run():
+            return SinpeService._post_sinpe_movil(
+                plan, sender_phone, receiver_phone, amount, currency, description, status
+            ).to_dict()
+
+        transaction = run_serialized(plan['lane_key'], run)
+        if plan['external'] is None:
+            return transaction
+        return SinpeService._complete_external_sinpe_movil(
+            plan, transaction['transaction_id'], sender_phone, receiver_phone, amount, currency, description
+        ).to_dict()
+
+    @staticmethod
+    def execute_sinpe_transfer(data: dict, current_user=None) -> dict:
+        """
+        Run process_sinpe_transfer on the sender account's transfer lane
+
+        Transfers to other banks post nothing locally and wait on the peer,
+        so they run in the calling thread instead of holding a lane.
+
+        Returns:
+            dict: Response with ACK/NACK status
+
+        Raises:
+            LaneFullError: If the account's lane is full
+        """
+        if not BankRegistry.current().is_local(data['receiver']['bank_code']):
+            return SinpeService.process_sinpe_transfer(data, current_user)
+
+        user_id = current_user.id if current_user else None
+
+        def run():
+            user = db.session.get(User, user_id) if user_id is not None else None
+            return SinpeService.process_sinpe_transfer(data, user)
+
+        return run_serialized(data['sender']['account_number'], run)
+    
     @staticmethod
     def validate_phone_number(phone: str) -> bool:
         """
@@ -301,29 +520,35 @@ class SinpeService:
         Returns:
             dict: Response with ACK/NACK status
         """
+        import requests
+        
         try:
-            # Get bank configuration - use bank code with leading 0 for routing
-            banks_config = current_app.config.get('BANKS', {})
-            target_bank_code = f"0{data['receiver']['bank_code']}"  # Add leading 0 for routing
-            target_bank = banks_config.get(target_bank_code)
+            registry = BankRegistry.current()
+            target_bank = registry.resolve(data['receiver']['bank_code'])
             
             if not target_bank:
-                return generate_nack_response(f"Invalid bank code: {target_bank_code}")
+                return generate_nack_response(f"Invalid bank code: {canonical_code(data['receiver']['bank_code'])}")
             
             # Send request to target bank
             headers = {
                 'Content-Type': 'application/json',
-                'X-Bank-Code': '0666'
+                'X-Bank-Code': registry.local.code
             }
             
-            response = requests.post(
-                f"{target_bank['url']}/api/sinpe-transfer",
-                json=data,
-                headers=headers,
-                timeout=10
-            )
+            with Tracer.span('POST /api/sinpe-transfer', 'client', **{'peer.bank': target_bank.code}) as span, \
+                    MetricsService.peer_call(target_bank.code) as call:
+                response = requests.post(
+                    f"{target_bank.url}/api/sinpe-transfer",
+                    json=data,
+                    headers=Tracer.inject(headers),
+                    timeout=target_bank.timeouts
+                )
+                call.ok = response.status_code < 500
+                if span:
+                    span.set('http.status_code', response.status_code)
             
             if response.status_code == 201:
+                BCCRService.log_sinpe_transfer(data)
                 return response.json()
             else:
                 return generate_nack_response(response.json().get('error', 'External transfer failed'))
@@ -344,23 +569,32 @@ class SinpeService:
         Returns:
             True if valid, False otherwise
         """
+        import requests
+        
         try:
             # Get BCCR configuration
-            banks_config = current_app.config.get('BANKS', {})
-            bccr_url = banks_config.get('CB', {}).get('url')
+            bccr = BankRegistry.current().get('CB')
             
-            if not bccr_url:
+            if not bccr or not bccr.url:
                 return False
                 
             # Make request to BCCR validation endpoint
-            response = requests.get(f"{bccr_url}/api/validate/{phone}", timeout=5)
+            with Tracer.span('GET /api/validate', 'client', **{'peer.bank': bccr.code}) as span, \
+                    MetricsService.peer_call(bccr.code) as call:
+                response = requests.get(
+                    f"{bccr.url}/api/validate/{phone}", headers=Tracer.inject({}), timeout=bccr.timeouts
+                )
+                call.ok = response.status_code < 500
+                if span:
+                    span.set('http.status_code', response.status_code)
             return response.status_code == 200
             
         except Exception:
             return False
     
     @staticmethod
-    def _process_external_sinpe_movil(data: dict) -> dict:
+    def _process_external_sinpe_movil(sender_phone: str, receiver_phone: str, amount: float, currency: str,
+                                      description: str, transaction_id: str, receiver_bank: dict) -> dict:
         """
         Process external inter-bank transfer
         
@@ -371,19 +605,17 @@ class SinpeService:
             currency: Currency code
             description: Transfer description
             transaction_id: Unique transaction ID
+            receiver_bank: Receiver's bank_code and name
             
         Returns:
             Dict with success status and message
         """
+        import requests
+        
         try:
-            # Get receiver bank info
-            subscription = SinpeSubscription.query.filter_by(sinpe_number=receiver_phone).first()
-            if not subscription:
-                return {'success': False, 'error': 'Información del banco destino no disponible'}
-            
             # Get bank configuration
-            banks_config = current_app.config.get('BANKS', {})
-            target_bank = banks_config.get(subscription.sinpe_bank_code)
+            registry = BankRegistry.current()
+            target_bank = registry.resolve(receiver_bank['bank_code'])
             
             if not target_bank:
                 return {'success': False, 'error': 'Banco destino no configurado'}
@@ -397,13 +629,13 @@ class SinpeService:
                 "transaction_id": transaction_id,
                 "sender": {
                     "phone": sender_phone,
-                    "bank_code": "666",  # Local bank code (without leading 0 for BCCR)
+                    "bank_code": registry.local.wire_code,
                     "name": "My Bank"
                 },
                 "receiver": {
                     "phone": receiver_phone,
-                    "bank_code": subscription.sinpe_bank_code.lstrip('0'),  # Remove leading 0 for BCCR
-                    "name": subscription.sinpe_client_name
+                    "bank_code": wire_code(receiver_bank['bank_code']),
+                    "name": receiver_bank['name']
                 },
                 "amount": {
                     "value": amount,
@@ -419,16 +651,21 @@ class SinpeService:
             # Send request to target bank
             headers = {
                 'Content-Type': 'application/json',
-                'X-Bank-Code': '0666',  # Use full bank code with leading 0 for routing
+                'X-Bank-Code': registry.local.code,
                 'X-SINPE-Token': 'sinpe-transfer-token'
             }
             
-            response = requests.post(
-                f"{target_bank['url']}/api/sinpe-movil",
-                json=payload,
-                headers=headers,
-                timeout=10
-            )
+            with Tracer.span('POST /api/sinpe-movil', 'client', **{'peer.bank': target_bank.code}) as span, \
+                    MetricsService.peer_call(target_bank.code) as call:
+                response = requests.post(
+                    f"{target_bank.url}/api/sinpe-movil",
+                    json=payload,
+                    headers=Tracer.inject(headers),
+                    timeout=target_bank.timeouts
+                )
+                call.ok = response.status_code < 500
+                if span:
+                    span.set('http.status_code', response.status_code)
             
             if response.status_code == 201:
                 return {'success': True, 'message': 'Transferencia externa exitosa'}
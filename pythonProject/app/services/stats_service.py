@@ -0,0 +1,408 @@
+"""
+Stats Service - Trigger-maintained database counters with background reconciliation
+"""
+
+from app.models import (
+    db, User, Account, PhoneLink, SinpeSubscription, Transaction, TransactionArchive, LedgerEntry, StatCounter
+)
+from sqlalchemy import func, case, delete, or_, text
+from decimal import Decimal
+from datetime import datetime, timedelta
+import logging
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+# Seconds between exact recounts run by the background reconciler
+RECONCILE_INTERVAL = 3600
+
+# Per-day transaction counters older than this are dropped by the reconciler
+DAY_COUNTER_RETENTION = 7
+
+# Rows each counter is spread over ('key#0' .. 'key#15'); a trigger adds to a
+# random one, so concurrent writers rarely update the same row
+COUNTER_SHARDS = 16
+
+# Seconds an exact recount is reused where counters are not maintained (non-SQLite)
+RECOUNT_CACHE_SECONDS = 60
+
+# Tables whose row counts are maintained, keyed by counter name
+COUNTED_TABLES = {
+    'users': User.__tablename__,
+    'accounts': Account.__tablename__,
+    'phone_links': PhoneLink.__tablename__,
+    'sinpe_subscriptions': SinpeSubscription.__tablename__,
+    'transactions': Transaction.__tablename__,
+    'transactions_archive': TransactionArchive.__tablename__,
+}
+
+def _bump(key_sql: str, delta_sql: str) -> str:
+    """Trigger statement adding delta_sql to a random shard of the counter named by key_sql"""
+    return (
+        f"INSERT INTO stat_counters (key, value) "
+        f"VALUES ({key_sql} || '#' || (random() & {COUNTER_SHARDS - 1}), {delta_sql}) "
+        f"ON CONFLICT(key) DO UPDATE SET value = value + excluded.value;"
+    )
+
+def counter_name(key: str) -> str:
+    """Counter a stored row belongs to ('rows:users#3' -> 'rows:users')"""
+    return key.partition('#')[0]
+
+def _trigger(name: str, event: str, table: str, body: list, when: str = None) -> str:
+    condition = f" WHEN {when}" if when else ""
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table}{condition} "
+        f"BEGIN {' '.join(body)} END"
+    )
+
+def _signed(row: str) -> str:
+    return f"(CASE {row}.direction WHEN 'credit' THEN {row}.amount ELSE -{row}.amount END)"
+
+def _account_currency(row: str) -> str:
+    return f"'balance:' || COALESCE((SELECT currency FROM accounts WHERE id = {row}.account_id), 'UNKNOWN')"
+
+def _trigger_ddl() -> dict:
+    """CREATE TRIGGER statements (SQLite) keyed by trigger name"""
+    triggers = {}
+
+    for key, table in COUNTED_TABLES.items():
+        if table in ('accounts', 'transactions', 'transactions_archive'):
+            continue
+        triggers[f'stat_{table}_insert'] = _trigger(
+            f'stat_{table}_insert', 'INSERT', table, [_bump(f"'rows:{key}'", '1')])
+        triggers[f'stat_{table}_delete'] = _trigger(
+            f'stat_{table}_delete', 'DELETE', table, [_bump(f"'rows:{key}'", '-1')])
+
+    # Accounts: row count and opening balance per currency
+    triggers['stat_accounts_insert'] = _trigger('stat_accounts_insert', 'INSERT', 'accounts', [
+        _bump("'rows:accounts'", '1'),
+        _bump("'balance:' || NEW.currency", 'COALESCE(NEW.balance, 0)'),
+    ])
+    triggers['stat_accounts_delete'] = _trigger('stat_accounts_delete', 'DELETE', 'accounts', [
+        _bump("'rows:accounts'", '-1'),
+        _bump("'balance:' || OLD.currency", '-COALESCE(OLD.balance, 0)'),
+    ])
+    triggers['stat_accounts_update'] = _trigger('stat_accounts_update', 'UPDATE OF balance, currency', 'accounts', [
+        _bump("'balance:' || OLD.currency", '-COALESCE(OLD.balance, 0)'),
+        _bump("'balance:' || NEW.currency", 'COALESCE(NEW.balance, 0)'),
+    ])
+
+    # Ledger entries move account balances (the clearing leg has no account)
+    triggers['stat_ledger_entries_insert'] = _trigger(
+        'stat_ledger_entries_insert', 'INSERT', 'ledger_entries',
+        [_bump(_account_currency('NEW'), _signed('NEW'))], when='NEW.account_id IS NOT NULL')
+    triggers['stat_ledger_entries_delete'] = _trigger(
+        'stat_ledger_entries_delete', 'DELETE', 'ledger_entries',
+        [_bump(_account_currency('OLD'), f"-{_signed('OLD')}")], when='OLD.account_id IS NOT NULL')
+
+    # Transactions: row count, per-status and per-day counts
+    triggers['stat_transactions_insert'] = _trigger('stat_transactions_insert', 'INSERT', 'transactions', [
+        _bump("'rows:transactions'", '1'),
+        _bump("'status:' || COALESCE(NEW.status, 'pending')", '1'),
+        _bump("'day:' || COALESCE(date(NEW.created_at), 'unknown')", '1'),
+    ])
+    triggers['stat_transactions_delete'] = _trigger('stat_transactions_delete', 'DELETE', 'transactions', [
+        _bump("'rows:transactions'", '-1'),
+        _bump("'status:' || COALESCE(OLD.status, 'pending')", '-1'),
+        _bump("'day:' || COALESCE(date(OLD.created_at), 'unknown')", '-1'),
+    ])
+    triggers['stat_transactions_update'] = _trigger('stat_transactions_update', 'UPDATE OF status', 'transactions', [
+        _bump("'status:' || COALESCE(OLD.status, 'pending')", '-1'),
+        _bump("'status:' || COALESCE(NEW.status, 'pending')", '1'),
+    ])
+
+    # Archived transactions keep counting towards the per-status and per-day totals
+    triggers['stat_transactions_archive_insert'] = _trigger(
+        'stat_transactions_archive_insert', 'INSERT', 'transactions_archive', [
+            _bump("'rows:transactions_archive'", '1'),
+            _bump("'status:' || COALESCE(NEW.status, 'pending')", '1'),
+            _bump("'day:' || COALESCE(date(NEW.created_at), 'unknown')", '1'),
+        ])
+    triggers['stat_transactions_archive_delete'] = _trigger(
+        'stat_transactions_archive_delete', 'DELETE', 'transactions_archive', [
+            _bump("'rows:transactions_archive'", '-1'),
+            _bump("'status:' || COALESCE(OLD.status, 'pending')", '-1'),
+            _bump("'day:' || COALESCE(date(OLD.created_at), 'unknown')", '-1'),
+        ])
+
+    return triggers
+
+TRIGGERS = _trigger_ddl()
+
+class StatsService:
+
+    _reconciler = None
+    _installed = weakref.WeakSet()  # engines whose counter triggers are known to exist
+    _recounts = weakref.WeakKeyDictionary()  # engine -> (expires, today, counts) without triggers
+
+    @staticmethod
+    def counters_supported() -> bool:
+        """Counters are maintained by SQLite triggers"""
+        return db.engine.dialect.name == 'sqlite'
+
+    @staticmethod
+    def counters_installed() -> bool:
+        """Check that every counter trigger exists"""
+        if not StatsService.counters_supported():
+            return False
+        installed = db.session.execute(text(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'stat\\_%' ESCAPE '\\'"
+        )).scalar()
+        return installed == len(TRIGGERS)
+
+    @staticmethod
+    def install_counters(recheck: bool = False) -> bool:
+        """
+        Create the counter triggers (idempotent) and seed them with an exact recount
+
+        Once the triggers are known to exist on an engine this is a no-op
+        without a query; pass recheck=True after dropping tables.
+
+        Returns:
+            bool: True if triggers were (re)installed, False if already present
+                  or unsupported by the database
+        """
+        if not StatsService.counters_supported():
+            return False
+        engine = db.engine
+        if recheck:
+            StatsService._installed.discard(engine)
+        elif engine in StatsService._installed:
+            return False
+        if StatsService.counters_installed():
+            StatsService._installed.add(engine)
+            return False
+
+        StatCounter.__table__.create(engine, checkfirst=True)
+        for ddl in TRIGGERS.values():
+            db.session.execute(text(ddl))
+        db.session.commit()
+        StatsService._installed.add(engine)
+        StatsService.reconcile()
+        return True
+
+    @staticmethod
+    def recount(today=None, session=None) -> dict:
+        """
+        Compute every counter exactly with grouped full-table queries
+
+        Per-day counters are only computed for the DAY_COUNTER_RETENTION
+        days ending today.
+
+        Args:
+            today: Last day of the per-day counters (defaults to UTC today)
+            session: Session to read with (defaults to db.session)
+
+        Returns:
+            dict: Counter key -> Decimal value
+        """
+        session = session or db.session
+        today = today or datetime.utcnow().date()
+        first_day = today - timedelta(days=DAY_COUNTER_RETENTION - 1)
+        counts = {}
+        for key, model in (('users', User), ('accounts', Account), ('phone_links', PhoneLink),
+                           ('sinpe_subscriptions', SinpeSubscription), ('transactions', Transaction),
+                           ('transactions_archive', TransactionArchive)):
+            counts[f'rows:{key}'] = Decimal(session.query(func.count()).select_from(model).scalar())
+
+        for currency, total in session.query(
+            Account.currency, func.coalesce(func.sum(Account.opening_balance), 0)
+        ).group_by(Account.currency):
+            counts[f'balance:{currency}'] = Decimal(str(total))
+
+        signed = case((LedgerEntry.direction == 'credit', LedgerEntry.amount), else_=-LedgerEntry.amount)
+        for currency, total in session.query(
+            Account.currency, func.sum(signed)
+        ).select_from(LedgerEntry).join(Account, LedgerEntry.account_id == Account.id).group_by(Account.currency):
+            key = f'balance:{currency}'
+            counts[key] = counts.get(key, Decimal('0')) + Decimal(str(total or 0))
+
+        for model in (Transaction, TransactionArchive):
+            for status, count in session.query(
+                func.coalesce(model.status, 'pending'), func.count()
+            ).group_by(func.coalesce(model.status, 'pending')):
+                key = f'status:{status}'
+                counts[key] = counts.get(key, Decimal('0')) + count
+
+            for day, count in session.query(
+                func.date(model.created_at), func.count()
+            ).filter(
+                model.created_at >= datetime.combine(first_day, datetime.min.time()),
+                model.created_at < datetime.combine(today + timedelta(days=1), datetime.min.time())
+            ).group_by(func.date(model.created_at)):
+                key = f"day:{day or 'unknown'}"
+                counts[key] = counts.get(key, Decimal('0')) + count
+
+        return counts
+
+    @staticmethod
+    def reconcile(today=None) -> int:
+        """
+        Correct the maintained counters to an exact recount
+
+        The stored counters and the recount are read in one read-only
+        snapshot, so writers are never blocked while tables are scanned.
+        The difference between the two is staged in a temporary table and
+        then added to the counters in one short write; increments made by
+        triggers after the snapshot are kept, so nothing is lost to the
+        swap. Per-day counters older than DAY_COUNTER_RETENTION days are
+        dropped.
+
+        Args:
+            today: Last day whose per-day counter is kept (defaults to UTC today)
+
+        Returns:
+            int: Number of counters whose stored value had drifted
+        """
+        today = today or datetime.utcnow().date()
+        first_day, last_day = f"day:{today - timedelta(days=DAY_COUNTER_RETENTION - 1)}", f"day:{today}"
+        in_window = lambda key: not key.startswith('day:') or first_day <= key <= last_day
+
+        db.session.commit()
+        connection = db.session.connection()
+        try:
+            # pysqlite only opens a transaction before writes; reads need an explicit one to share a snapshot
+            connection.exec_driver_sql('BEGIN')
+            stored = {}
+            for row in StatCounter.query:
+                key = counter_name(row.key)
+                if in_window(key):
+                    stored[key] = stored.get(key, Decimal('0')) + Decimal(str(row.value))
+            exact = StatsService.recount(today)
+        finally:
+            db.session.rollback()
+
+        cents = Decimal('0.01')
+        corrections = {
+            key: (exact.get(key, Decimal('0')) - stored.get(key, Decimal('0'))).quantize(cents)
+            for key in set(stored) | set(exact)
+        }
+        corrections = {key: delta for key, delta in corrections.items() if delta}
+
+        try:
+            # The staging table is temporary: filling it takes no lock on the database
+            db.session.execute(text(
+                "CREATE TEMP TABLE IF NOT EXISTS stat_counters_staging (key TEXT PRIMARY KEY, value NUMERIC NOT NULL)"
+            ))
+            db.session.execute(text("DELETE FROM stat_counters_staging"))
+            if corrections:
+                db.session.execute(
+                    text("INSERT INTO stat_counters_staging (key, value) VALUES (:key, :value)"),
+                    [{'key': f'{key}#0', 'value': str(delta)} for key, delta in corrections.items()]
+                )
+            db.session.execute(text(
+                "INSERT INTO stat_counters (key, value) SELECT key, value FROM stat_counters_staging WHERE true "
+                "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value"
+            ))
+            # '#' sorts before '$': 'day:<last>#n' < 'day:<last>$'
+            db.session.execute(delete(StatCounter).where(
+                StatCounter.key.like('day:%'),
+                or_(StatCounter.key < first_day, StatCounter.key > f'{last_day}$')
+            ))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if corrections and stored:
+            logger.warning(f"Stat counters reconciled, {len(corrections)} had drifted")
+        return len(corrections)
+
+    @staticmethod
+    def get_counters(keys=(), prefixes=()) -> dict:
+        """
+        Maintained counters by exact key and by key prefix, summed over their shards
+
+        Keys and prefixes are read as primary-key ranges, so the read does
+        not grow with counters under other prefixes (e.g. one per day).
+        """
+        ranges = [(f'{key}#', f'{key}$') for key in keys]
+        ranges += [(prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)) for prefix in prefixes]
+        if not ranges:
+            return {}
+        conditions = [(StatCounter.key >= low) & (StatCounter.key < high) for low, high in ranges]
+        counters = {}
+        for row in StatCounter.query.filter(or_(*conditions)):
+            key = counter_name(row.key)
+            counters[key] = counters.get(key, Decimal('0')) + Decimal(str(row.value))
+        return counters
+
+    @staticmethod
+    def cached_recount(today) -> dict:
+        """Exact recount, reused for RECOUNT_CACHE_SECONDS (for databases without counters)"""
+        engine = db.engine
+        cached = StatsService._recounts.get(engine)
+        if cached is None or cached[0] < time.monotonic() or cached[1] != today:
+            cached = (time.monotonic() + RECOUNT_CACHE_SECONDS, today, StatsService.recount(today))
+            StatsService._recounts[engine] = cached
+        return cached[2]
+
+    @staticmethod
+    def get_stats(today=None) -> dict:
+        """
+        Database statistics served from the maintained counters
+
+        Falls back to an exact recount, cached for RECOUNT_CACHE_SECONDS,
+        when the database cannot maintain counters (non-SQLite).
+
+        Args:
+            today: Date whose transactions are reported (defaults to UTC today)
+
+        Returns:
+            dict: Flat mapping of statistic name -> value
+        """
+        today = today or datetime.utcnow().date()
+        if StatsService.counters_supported():
+            StatsService.install_counters()
+            counters = StatsService.get_counters(
+                [f'rows:{key}' for key in COUNTED_TABLES] + [f'day:{today.isoformat()}'],
+                prefixes=('status:', 'balance:')
+            )
+        else:
+            counters = StatsService.cached_recount(today)
+
+        stats = {key: int(counters.get(f'rows:{key}', 0)) for key in COUNTED_TABLES}
+        stats['transactions_today'] = int(counters.get(f'day:{today.isoformat()}', 0))
+
+        for key in sorted(counters):
+            value = counters[key]
+            if key.startswith('status:'):
+                stats[f"transactions_{key[len('status:'):]}"] = int(value)
+            elif key.startswith('balance:'):
+                stats[f"total_balance_{key[len('balance:'):].lower()}"] = \
+                    Decimal(str(value)).quantize(Decimal('0.01'))
+        return stats
+
+    @staticmethod
+    def start_reconciler(app, interval: int = None):
+        """
+        Run reconcile() periodically in a daemon thread
+
+        Args:
+            app: Flask application providing the database context
+            interval: Seconds between runs (defaults to STATS_RECONCILE_INTERVAL)
+
+        Returns:
+            threading.Thread running the loop (the existing one if already started)
+        """
+        if StatsService._reconciler and StatsService._reconciler.is_alive():
+            return StatsService._reconciler
+
+        interval = interval or app.config.get('STATS_RECONCILE_INTERVAL', RECONCILE_INTERVAL)
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    with app.app_context():
+                        StatsService.reconcile()
+                except Exception as e:
+                    app.logger.error(f"Stat counter reconciliation failed: {e}")
+
+        thread = threading.Thread(target=run, name='stats-reconciler', daemon=True)
+        thread.stop = stop
+        thread.start()
+        StatsService._reconciler = thread
+        return thread
@@ -0,0 +1,287 @@
+"""
+Subscription Mirror - Keep a local copy of BCCR's SINPE subscription directory
+"""
+
+from flask import current_app
+from app.models import db, SinpeSubscription, SyncState
+from app.services.bank_registry import BankRegistry, canonical_code
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+SYNC_NAME = 'bccr_subscriptions'
+
+# Seconds between incremental syncs
+SYNC_INTERVAL = 300
+
+# BCCR column that increases whenever a subscription row changes
+WATERMARK_COLUMN = 'updated_at'
+
+# Rows fetched from the server-side cursor and applied per local transaction
+BATCH_SIZE = 5000
+
+class SubscriptionMirror:
+    """
+    Mirror of BCCR sinpe_subscriptions in the local sinpe_subscription table
+
+    The first run streams every active subscription through a server-side
+    (named) cursor, so memory stays flat however large the directory is,
+    and removes mirrored numbers BCCR no longer lists. Later runs only fetch
+    rows whose watermark column is at or after the highest value already
+    applied, upserting active rows and deleting the rest. Subscriptions of
+    this bank are owned locally and never touched.
+    """
+
+    _thread = None
+
+    @staticmethod
+    def state() -> SyncState:
+        state = db.session.get(SyncState, SYNC_NAME)
+        if state is None:
+            state = SyncState(name=SYNC_NAME, rows=0)
+            db.session.add(state)
+        return state
+
+    @staticmethod
+    def _fetch(where: str = '', params: tuple = (), batch_size: int = BATCH_SIZE):
+        """Yield batches of BCCR subscription rows from a server-side cursor"""
+        from psycopg2.extras import DictCursor
+        from app.services.bccr_service import BCCRService
+
+        column = current_app.config.get('BCCR_SYNC_WATERMARK_COLUMN', WATERMARK_COLUMN)
+        with BCCRService.get_db_connection() as conn:
+            with conn.cursor(name='sinpe_subscription_mirror', cursor_factory=DictCursor) as cur:
+                cur.itersize = batch_size
+                cur.execute(f"""
+                    SELECT phone_number, bank_code, client_name, status, {column} AS changed_at
+                    FROM sinpe_subscriptions
+                    {where}
+                    ORDER BY {column}
+                """, params)
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    @staticmethod
+    def _upsert(values: list) -> int:
+        """Insert or update subscriptions; returns rows written"""
+        if not values:
+            return 0
+        stmt = insert(SinpeSubscription)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['sinpe_number'],
+            set_={
+                'sinpe_bank_code': stmt.excluded.sinpe_bank_code,
+                'sinpe_client_name': stmt.excluded.sinpe_client_name
+            }
+        )
+        try:
+            with db.session.begin_nested():
+                db.session.execute(stmt, values)
+            return len(values)
+        except IntegrityError:
+            # A client name already used by another number; apply row by row and skip those
+            written = 0
+            for value in values:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(stmt, [value])
+                    written += 1
+                except IntegrityError:
+                    logger.warning(f"Skipping mirrored subscription {value['sinpe_number']}: client name already in use")
+            return written
+
+    @staticmethod
+    def _delete(numbers: list, local_code: str) -> int:
+        deleted = 0
+        for start in range(0, len(numbers), 500):
+            result = db.session.execute(
+                delete(SinpeSubscription)
+                .where(SinpeSubscription.sinpe_number.in_(numbers[start:start + 500]))
+                .where(SinpeSubscription.sinpe_bank_code != local_code)
+            )
+            deleted += result.rowcount
+        return deleted
+
+    @staticmethod
+    def _apply(rows: list, local_code: str) -> tuple:
+        """
+        Apply one batch of BCCR rows
+
+        Returns:
+            tuple: (rows upserted, rows deleted, highest watermark in the batch)
+        """
+        values, removed, watermark = [], [], None
+        for row in rows:
+            if row['changed_at'] is not None:
+                watermark = max(watermark, row['changed_at']) if watermark is not None else row['changed_at']
+            bank_code = canonical_code(row['bank_code'])
+            if bank_code == local_code:
+                continue
+            if row['status'] == 'active':
+                values.append({
+                    'sinpe_number': row['phone_number'],
+                    'sinpe_bank_code': bank_code,
+                    'sinpe_client_name': row['client_name']
+                })
+            else:
+                removed.append(row['phone_number'])
+
+        upserted = SubscriptionMirror._upsert(values)
+        deleted = SubscriptionMirror._delete(removed, local_code)
+        return upserted, deleted, watermark
+
+    @staticmethod
+    def _advance(state: SyncState, watermark):
+        if watermark is not None:
+            value = watermark.isoformat() if hasattr(watermark, 'isoformat') else str(watermark)
+            if state.watermark is None or value > state.watermark:
+                state.watermark = value
+
+    @staticmethod
+    def full_sync(batch_size: int = BATCH_SIZE) -> dict:
+        """
+        Load every active BCCR subscription and drop mirrored numbers BCCR no longer has
+
+        Returns:
+            dict: Rows upserted and deleted
+        """
+        local_code = BankRegistry.current().local.code
+        state = SubscriptionMirror.state()
+        seen = set()
+        upserted = deleted = 0
+
+        for rows in SubscriptionMirror._fetch("WHERE status = 'active'", (), batch_size):
+            seen.update(row['phone_number'] for row in rows)
+            written, removed, watermark = SubscriptionMirror._apply(rows, local_code)
+            upserted += written
+            deleted += removed
+            SubscriptionMirror._advance(state, watermark)
+            db.session.commit()
+
+        stale = [
+            number for (number,) in db.session.query(SinpeSubscription.sinpe_number)
+            .filter(SinpeSubscription.sinpe_bank_code != local_code)
+            if number not in seen
+        ]
+        deleted += SubscriptionMirror._delete(stale, local_code)
+
+        state = SubscriptionMirror.state()
+        state.completed_at = state.last_run_at = datetime.utcnow()
+        state.last_error = None
+        state.rows = SinpeSubscription.query.count()
+        db.session.commit()
+        return {'upserted': upserted, 'deleted': deleted}
+
+    @staticmethod
+    def sync_changes(batch_size: int = BATCH_SIZE) -> dict:
+        """
+        Apply BCCR rows changed since the stored watermark
+
+        Rows exactly at the watermark are fetched again; re-applying them is
+        harmless and covers rows committed with the same timestamp after the
+        previous run.
+
+        Returns:
+            dict: Rows upserted and deleted
+        """
+        local_code = BankRegistry.current().local.code
+        state = SubscriptionMirror.state()
+        upserted = deleted = 0
+
+        column = current_app.config.get('BCCR_SYNC_WATERMARK_COLUMN', WATERMARK_COLUMN)
+        where, params = (f"WHERE {column} >= %s", (state.watermark,)) if state.watermark else ('', ())
+        for rows in SubscriptionMirror._fetch(where, params, batch_size):
+            written, removed, watermark = SubscriptionMirror._apply(rows, local_code)
+            upserted += written
+            deleted += removed
+            SubscriptionMirror._advance(state, watermark)
+            db.session.commit()
+
+        state = SubscriptionMirror.state()
+        state.last_run_at = datetime.utcnow()
+        state.last_error = None
+        state.rows = SinpeSubscription.query.count()
+        db.session.commit()
+        return {'upserted': upserted, 'deleted': deleted}
+
+    @staticmethod
+    def sync(full: bool = False) -> dict:
+        """
+        Run a full load if none has finished yet (or full=True), otherwise an incremental sync
+
+        Failures are recorded in the sync state and re-raised.
+        """
+        state = SubscriptionMirror.state()
+        db.session.commit()
+        try:
+            if full or state.completed_at is None:
+                return SubscriptionMirror.full_sync()
+            return SubscriptionMirror.sync_changes()
+        except Exception as e:
+            db.session.rollback()
+            state = SubscriptionMirror.state()
+            state.last_error = str(e)[:255]
+            db.session.commit()
+            raise
+
+    @staticmethod
+    def is_authoritative(max_lag: int = None) -> bool:
+        """
+        True when a local miss can be trusted: a full load has completed and
+        the last sync is recent enough (default three sync intervals)
+        """
+        state = db.session.get(SyncState, SYNC_NAME)
+        if state is None or state.completed_at is None or state.last_run_at is None:
+            return False
+        if max_lag is None:
+            max_lag = 3 * current_app.config.get('BCCR_SYNC_INTERVAL', SYNC_INTERVAL)
+        return datetime.utcnow() - state.last_run_at <= timedelta(seconds=max_lag)
+
+    @staticmethod
+    def start(app, interval: int = None):
+        """
+        Sync now and then every interval seconds in a daemon thread
+
+        Args:
+            app: Flask application providing the database context
+            interval: Seconds between runs (defaults to BCCR_SYNC_INTERVAL)
+
+        Returns:
+            threading.Thread running the loop (the existing one if already started)
+        """
+        if SubscriptionMirror._thread and SubscriptionMirror._thread.is_alive():
+            return SubscriptionMirror._thread
+
+        interval = interval or app.config.get('BCCR_SYNC_INTERVAL', SYNC_INTERVAL)
+        stop = threading.Event()
+
+        def run():
+            while True:
+                try:
+                    with app.app_context():
+                        SubscriptionMirror.sync()
+                except Exception as e:
+                    app.logger.error(f"BCCR subscription sync failed: {e}")
+                try:
+                    # Rebuilt even after a failure so the filter's complete flag follows the mirror
+                    with app.app_context():
+                        from app.services.phone_filter import PhoneFilter
+                        PhoneFilter.rebuild()
+                except Exception as e:
+                    app.logger.error(f"Phone filter rebuild failed: {e}")
+                if stop.wait(interval):
+                    return
+
+        thread = threading.Thread(target=run, name='bccr-subscription-mirror', daemon=True)
+        thread.stop = stop
+        thread.start()
+        SubscriptionMirror._thread = thread
+        return thread
@@ -2,23 +2,39 @@
 Terminal Service - Rich terminal interface for SINPE Banking System
 """
 
-import requests
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm, FloatPrompt
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.text import Text
+from rich.console import Group
+from rich.live import Live
 from rich import box
+from app.services.api_client import ApiClient
+from collections import deque
 import time
 
 console = Console()
 
 class TerminalService:
-    def __init__(self):
-        self.base_url = "http://127.0.0.1:5000/api"
+    def __init__(self, app=None, api_client=None):
+        """
+        Args:
+            app: Shared Flask application; when given, API calls run in-process
+            api_client: Optional preconfigured ApiClient (e.g. pooled HTTP)
+        """
+        self.app = app
+        self.api = api_client or ApiClient(app=app)
         self.current_user = None
     
+    def _app_context(self):
+        """App context of the shared application, created once if none was given"""
+        if self.app is None:
+            from app import create_app
+            self.app = create_app(with_routes=False)
+        return self.app.app_context()
+    
     def show_user_management(self):
         """User management interface"""
         console.clear()
@@ -56,7 +72,7 @@ class TerminalService:
     def list_users(self):
         """List all users"""
         try:
-            response = requests.get(f"{self.base_url}/users")
+            response = self.api.get("/users")
             if response.status_code == 200:
                 data = response.json()
                 users = data['data']
@@ -100,7 +116,7 @@ class TerminalService:
                 'password': password
             }
             
-            response = requests.post(f"{self.base_url}/users", json=data)
+            response = self.api.post("/users", json=data)
             if response.status_code == 201:
                 console.print("[green]✓ User created successfully[/green]")
             else:
@@ -118,7 +134,7 @@ class TerminalService:
         
         try:
             data = {'username': username, 'password': password}
-            response = requests.post(f"{self.base_url}/auth/login", json=data)
+            response = self.api.post("/auth/login", json=data)
             
             if response.status_code == 200:
                 result = response.json()
@@ -133,7 +149,7 @@ class TerminalService:
     def logout_user(self):
         """Logout user"""
         try:
-            requests.post(f"{self.base_url}/auth/logout")
+            self.api.post("/auth/logout")
             self.current_user = None
             console.print("[green]✓ Logged out successfully[/green]")
         except Exception as e:
@@ -176,7 +192,7 @@ class TerminalService:
     def list_accounts(self):
         """List all accounts"""
         try:
-            response = requests.get(f"{self.base_url}/accounts")
+            response = self.api.get("/accounts")
             if response.status_code == 200:
                 data = response.json()
                 accounts = data['data']
@@ -225,7 +241,7 @@ class TerminalService:
             if user_id:
                 data['user_id'] = int(user_id)
             
-            response = requests.post(f"{self.base_url}/accounts", json=data)
+            response = self.api.post("/accounts", json=data)
             if response.status_code == 201:
                 result = response.json()
                 account = result['data']
@@ -241,7 +257,7 @@ class TerminalService:
         user_id = Prompt.ask("Enter User ID")
         
         try:
-            response = requests.get(f"{self.base_url}/users/{user_id}/accounts")
+            response = self.api.get(f"/users/{user_id}/accounts")
             if response.status_code == 200:
                 data = response.json()
                 accounts = data['data']
@@ -276,7 +292,7 @@ class TerminalService:
         
         try:
             data = {'balance': new_balance}
-            response = requests.put(f"{self.base_url}/accounts/{account_id}/balance", json=data)
+            response = self.api.put(f"/accounts/{account_id}/balance", json=data)
             
             if response.status_code == 200:
                 console.print("[green]✓ Balance updated successfully[/green]")
@@ -301,7 +317,7 @@ class TerminalService:
         
         # Validate receiver phone first
         try:
-            validate_response = requests.get(f"{self.base_url}/validate/{receiver_phone}")
+            validate_response = self.api.get(f"/validate/{receiver_phone}")
             if validate_response.status_code != 200:
                 console.print("[red]❌ Receiver phone number is not registered in SINPE[/red]")
                 return
@@ -327,17 +343,13 @@ class TerminalService:
             task = progress.add_task("Processing transfer...", total=None)
             
             try:
-                # Simulate processing time
-                time.sleep(2)
-                
                 # For demo purposes, we'll call the service directly
                 # In a real implementation, you'd generate proper HMAC
                 from app.services.sinpe_service import SinpeService
-                from app import create_app
                 
-                app = create_app()
-                with app.app_context():
-                    transfer = SinpeService.send_sinpe_transfer(
+                with self._app_context():
+                    # Same per-account lane (or group commit) as API transfers
+                    transfer = SinpeService.execute_sinpe_movil(
                         sender_phone=sender_phone,
                         receiver_phone=receiver_phone,
                         amount=amount,
@@ -345,12 +357,11 @@ class TerminalService:
                     )
                 
                 progress.update(task, description="Transfer completed!")
-                time.sleep(1)
                 
                 console.print(f"\n[green]✅ Transfer successful![/green]")
-                console.print(f"Transaction ID: {transfer.transaction_id}")
-                console.print(f"Amount: {transfer.amount:,.2f} {transfer.currency}")
-                console.print(f"Status: {transfer.status}")
+                console.print(f"Transaction ID: {transfer['transaction_id']}")
+                console.print(f"Amount: {transfer['amount']:,.2f} {transfer['currency']}")
+                console.print(f"Status: {transfer['status']}")
                 
             except Exception as e:
                 progress.update(task, description="Transfer failed!")
@@ -364,7 +375,7 @@ class TerminalService:
         console.print(Panel("📊 Transaction History", style="bold yellow"))
         
         try:
-            response = requests.get(f"{self.base_url}/transactions")
+            response = self.api.get("/transactions")
             if response.status_code == 200:
                 data = response.json()
                 transactions = data['data']
@@ -441,7 +452,7 @@ class TerminalService:
     def list_phone_links(self):
         """List all phone links"""
         try:
-            response = requests.get(f"{self.base_url}/phone-links")
+            response = self.api.get("/phone-links")
             if response.status_code == 200:
                 data = response.json()
                 links = data['data']
@@ -479,7 +490,7 @@ class TerminalService:
                 'phone': phone
             }
             
-            response = requests.post(f"{self.base_url}/phone-links", json=data)
+            response = self.api.post("/phone-links", json=data)
             if response.status_code == 201:
                 console.print("[green]✓ Phone link created successfully[/green]")
             else:
@@ -493,7 +504,7 @@ class TerminalService:
         phone = Prompt.ask("Phone number")
         
         try:
-            response = requests.get(f"{self.base_url}/phone-links/phone/{phone}")
+            response = self.api.get(f"/phone-links/phone/{phone}")
             if response.status_code == 200:
                 data = response.json()
                 link = data['data']
@@ -512,7 +523,7 @@ class TerminalService:
         account_number = Prompt.ask("Account number")
         
         try:
-            response = requests.get(f"{self.base_url}/phone-links/account/{account_number}")
+            response = self.api.get(f"/phone-links/account/{account_number}")
             if response.status_code == 200:
                 data = response.json()
                 link = data['data']
@@ -539,6 +550,8 @@ class TerminalService:
         table.add_row("2", "🔄 Reset database")
         table.add_row("3", "🧪 Create test data")
         table.add_row("4", "🔍 Validate SINPE phone")
+        table.add_row("5", "📈 Live operations dashboard")
+        table.add_row("6", "🐢 Slow queries")
         table.add_row("0", "⬅️  Back to main menu")
         
         console.print(table)
@@ -553,6 +566,10 @@ class TerminalService:
             self.create_test_data()
         elif choice == "4":
             self.validate_sinpe_phone()
+        elif choice == "5":
+            self.show_live_dashboard()
+        elif choice == "6":
+            self.show_slow_queries()
         elif choice == "0":
             return
         else:
@@ -564,34 +581,158 @@ class TerminalService:
         """Show database statistics"""
         try:
             from app.services.database_service import DatabaseService
-            from app import create_app
             
-            app = create_app()
-            with app.app_context():
+            with self._app_context():
                 db_service = DatabaseService()
                 stats = db_service.get_database_stats()
             
             table = Table(title="📊 Database Statistics")
-            table.add_column("Table", style="cyan")
-            table.add_column("Count", style="yellow", justify="right")
+            table.add_column("Statistic", style="cyan")
+            table.add_column("Value", style="yellow", justify="right")
             
-            for table_name, count in stats.items():
-                table.add_row(table_name.replace('_', ' ').title(), str(count))
+            for name, value in stats.items():
+                table.add_row(name.replace('_', ' ').title(), f"{value:,}")
             
             console.print(table)
             
         except Exception as e:
             console.print(f"[red]Error: {e}[/red]")
     
+    def show_live_dashboard(self, duration: float = None):
+        """
+        Live operations dashboard fed by delta fetches from /admin/metrics
+        
+        Only seconds not yet received are fetched on each poll, and the
+        endpoint is served from memory, so watching the dashboard adds no
+        database load.
+        
+        Args:
+            duration: Optional number of seconds to run (default: until Ctrl+C)
+        """
+        from config.settings import TERMINAL_REFRESH_RATE
+        from app.services.metrics_service import MetricsService
+        
+        window = deque(maxlen=60)
+        since, data = None, None
+        interval = 1.0 / TERMINAL_REFRESH_RATE
+        deadline = time.monotonic() + duration if duration else None
+        
+        console.clear()
+        console.print("[dim]Press Ctrl+C to return to the menu[/dim]")
+        
+        try:
+            with Live(console=console, refresh_per_second=TERMINAL_REFRESH_RATE) as live:
+                while deadline is None or time.monotonic() < deadline:
+                    response = self.api.get("/admin/metrics", params={'since': since} if since is not None else None)
+                    if response.status_code == 200:
+                        data = response.json()
+                        window.extend(data['buckets'])
+                        if data['buckets']:
+                            since = data['buckets'][-1]['ts']
+                        live.update(self._render_dashboard(list(window), data, MetricsService))
+                    else:
+                        live.update(Text(f"Metrics unavailable: HTTP {response.status_code}", style="red"))
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+    
+    def _render_dashboard(self, buckets: list, data: dict, metrics):
+        """Build the dashboard renderable from buffered buckets and the latest poll"""
+        now = data['now']
+        bounds = data['latency_bounds_ms']
+        
+        def ms(value):
+            return '-' if value is None else f"≤{value:,} ms"
+        
+        traffic = Table(title="📈 Traffic", box=box.ROUNDED)
+        for column in ("Window", "TPS", "p50", "p95", "p99", "5xx", "4xx", "DB writes/s", "DB write wait"):
+            traffic.add_column(column, justify="right")
+        for seconds in (10, 60):
+            recent = [b for b in buckets if b['ts'] >= now - seconds]
+            summary = metrics.summarize(recent, seconds=seconds, bounds=bounds)
+            traffic.add_row(
+                f"{seconds}s",
+                f"{summary['tps']:,.1f}",
+                ms(summary['p50_ms']),
+                ms(summary['p95_ms']),
+                ms(summary['p99_ms']),
+                f"{summary['error_rate']:.1%}",
+                f"{summary['client_error_rate']:.1%}",
+                f"{summary['db_writes_per_sec']:,.1f}",
+                f"{summary['db_write_wait_ms']:,.1f} ms/s"
+            )
+        
+        peers = Table(title="🏦 Peer Banks", box=box.ROUNDED)
+        for column in ("Bank", "Status", "Calls", "Failures", "Avg latency", "Last OK"):
+            peers.add_column(column)
+        for code, peer in sorted(data['peers'].items()):
+            failures = peer['consecutive_failures']
+            status = "[green]UP[/green]" if not failures else "[yellow]DEGRADED[/yellow]" if failures < 3 else "[red]DOWN[/red]"
+            avg = peer['avg_latency_ms']
+            last_ok = f"{now - peer['last_ok']:.0f}s ago" if peer['last_ok'] else 'never'
+            peers.add_row(code, status, str(peer['calls']), str(peer['failures']),
+                          '-' if avg is None else f"{avg:,.0f} ms", last_ok)
+        
+        gauges = Table(title="📦 Queues & Resources", box=box.ROUNDED)
+        gauges.add_column("Gauge", style="cyan")
+        gauges.add_column("Value", style="yellow", justify="right")
+        for name, value in sorted(data['gauges'].items()):
+            gauges.add_row(name.replace('_', ' '), '-' if value is None else f"{value:,}")
+        
+        return Group(traffic, peers, gauges)
+    
+    def show_slow_queries(self):
+        """Top SQL fingerprints from /admin/queries, with the plans captured for slow ones"""
+        sort = Prompt.ask("Sort by", choices=["total", "mean", "max", "calls", "slow"], default="total")
+        
+        try:
+            response = self.api.get("/admin/queries", params={'sort': sort, 'limit': 15})
+            if response.status_code != 200:
+                console.print(f"[red]Query statistics unavailable: HTTP {response.status_code}[/red]")
+                return
+            data = response.json()
+            
+            table = Table(title=f"🐢 Queries by {sort} (slow ≥ {data['threshold_ms']:,} ms)", box=box.ROUNDED)
+            table.add_column("ID", style="dim")
+            table.add_column("Calls", justify="right")
+            table.add_column("Total", justify="right")
+            table.add_column("Mean", justify="right")
+            table.add_column("Max", justify="right")
+            table.add_column("Slow", justify="right", style="red")
+            table.add_column("Statement", style="cyan", overflow="fold")
+            
+            for query in data['queries']:
+                table.add_row(
+                    query['id'],
+                    f"{query['calls']:,}",
+                    f"{query['total_ms']:,.1f} ms",
+                    f"{query['mean_ms']:,.2f} ms",
+                    f"{query['max_ms']:,.1f} ms",
+                    f"{query['slow_calls']:,}",
+                    query['fingerprint'][:200]
+                )
+            
+            console.print(table)
+            
+            for query in data['queries']:
+                if query['plan']:
+                    slowest = query['slowest']
+                    console.print(Panel(
+                        "\n".join(query['plan']),
+                        title=f"Plan {query['id']} (slowest {slowest['duration_ms']:,.1f} ms)",
+                        border_style="yellow"
+                    ))
+            
+        except Exception as e:
+            console.print(f"[red]Error: {e}[/red]")
+    
     def reset_database(self):
         """Reset database"""
         if Confirm.ask("[red]⚠️  This will delete all data. Are you sure?[/red]"):
             try:
                 from app.services.database_service import DatabaseService
-                from app import create_app
                 
-                app = create_app()
-                with app.app_context():
+                with self._app_context():
                     db_service = DatabaseService()
                     db_service.reset_database()
                 
@@ -611,7 +752,7 @@ class TerminalService:
         phone = Prompt.ask("Phone number to validate")
         
         try:
-            response = requests.get(f"{self.base_url}/validate/{phone}")
+            response = self.api.get(f"/validate/{phone}")
             if response.status_code == 200:
                 data = response.json()
                 console.print(f"[green]✓ Phone number is registered:[/green]")
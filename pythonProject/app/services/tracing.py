@@ -0,0 +1,284 @@
+"""
+Tracing - Lightweight spans with W3C trace context and OTLP-compatible JSON export
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Share of new traces recorded; a sampled parent in traceparent is always followed
+SAMPLE_RATE = 0.01
+
+# Finished traces waiting for the exporter thread before new ones are dropped
+EXPORT_QUEUE_SIZE = 1000
+
+# Longest db.statement attribute kept on a span
+MAX_STATEMENT_LENGTH = 500
+
+_KINDS = {'internal': 1, 'server': 2, 'client': 3}
+
+_current = ContextVar('current_span', default=None)
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+class Span:
+    """One timed operation; unsampled spans only carry the ids to propagate"""
+
+    __slots__ = ('trace', 'trace_id', 'span_id', 'parent_id', 'name', 'kind', 'sampled',
+                 'attributes', 'start_ns', 'end_ns', 'error')
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, sampled: bool = False,
+                 kind: str = 'internal', trace: list = None):
+        self.trace = trace if trace is not None else []
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.attributes = {}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, key: str, value):
+        if self.sampled and value is not None:
+            self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_otlp(self) -> dict:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': _KINDS.get(self.kind, 1),
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or time.time_ns()),
+            'attributes': [_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+class FileExporter:
+    """Appends each trace as one OTLP/JSON ExportTraceServiceRequest line"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, payload: dict):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(payload, separators=(',', ':')) + '\n')
+
+class OTLPHttpExporter:
+    """Posts each trace to an OTLP/HTTP JSON endpoint (e.g. http://collector:4318/v1/traces)"""
+
+    def __init__(self, url: str, timeout: float = 2.0):
+        self.url = url
+        self.timeout = timeout
+
+    def export(self, payload: dict):
+        import requests
+        requests.post(self.url, json=payload, timeout=self.timeout)
+
+def parse_traceparent(header: str):
+    """
+    Parse a W3C traceparent header
+
+    Returns:
+        tuple: (trace_id, parent span id, sampled), or None if malformed
+    """
+    parts = (header or '').strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == '0' * 32 or parts[2] == '0' * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+class Tracer:
+    """
+    Spans for the request and transfer pipeline
+
+    A trace is started per request (continuing the caller's traceparent
+    when present) and sampled at SAMPLE_RATE. Unsampled traces keep only
+    their ids, so span() costs one context lookup and propagation still
+    works; sampled traces collect their spans and hand the whole trace to
+    the exporter thread when the root span ends.
+    """
+
+    exporter = None
+    sample_rate = SAMPLE_RATE
+    service_name = 'banco-sinpe'
+    _queue = None
+    _thread = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def configure(exporter=None, sample_rate: float = SAMPLE_RATE, service_name: str = None):
+        """Set the exporter (None disables export) and sampling rate"""
+        Tracer.exporter = exporter
+        Tracer.sample_rate = sample_rate
+        if service_name:
+            Tracer.service_name = service_name
+
+    @staticmethod
+    def current():
+        """Innermost active span (None outside a trace)"""
+        return _current.get()
+
+    @staticmethod
+    def start_trace(name: str, traceparent: str = None, kind: str = 'server', trust_sampled: bool = True,
+                    **attributes):
+        """
+        Start the root span of a trace and make it current
+
+        Args:
+            trust_sampled: Follow the sampled flag of traceparent; when False
+                the trace is continued but sampled at the local rate, so an
+                untrusted caller cannot force its requests to be exported
+
+        Returns:
+            tuple: (span, token to pass to end_trace)
+        """
+        parent = parse_traceparent(traceparent)
+        if parent:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id, sampled = os.urandom(16).hex(), None, None
+        if sampled is None or not trust_sampled:
+            sampled = Tracer.exporter is not None and random.random() < Tracer.sample_rate
+        span = Span(name, trace_id, parent_id, sampled and Tracer.exporter is not None, kind)
+        for key, value in attributes.items():
+            span.set(key, value)
+        return span, _current.set(span)
+
+    @staticmethod
+    def end_trace(span, token, error: str = None):
+        """End a root span, restore the previous context and export a sampled trace"""
+        span.end_ns = time.time_ns()
+        span.error = error
+        _current.reset(token)
+        if span.sampled:
+            span.trace.append(span)
+            Tracer._export(span.trace)
+
+    @staticmethod
+    @contextmanager
+    def attach(span):
+        """Make a span captured in another thread current (worker threads do not inherit it)"""
+        token = _current.set(span)
+        try:
+            yield span
+        finally:
+            _current.reset(token)
+
+    @staticmethod
+    @contextmanager
+    def span(name: str, kind: str = 'internal', **attributes):
+        """
+        Time a block as a child of the current span
+
+        Yields the Span, or None when the current trace is not sampled.
+        """
+        parent = _current.get()
+        if parent is None or not parent.sampled:
+            yield None
+            return
+
+        span = Span(name, parent.trace_id, parent.span_id, True, kind, parent.trace)
+        for key, value in attributes.items():
+            span.set(key, value)
+        token = _current.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current.reset(token)
+            parent.trace.append(span)
+
+    @staticmethod
+    def traced(name: str = None):
+        """Decorator running a function inside a span named after it"""
+        def decorate(fn):
+            label = name or fn.__qualname__
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                parent = _current.get()
+                if parent is None or not parent.sampled:
+                    return fn(*args, **kwargs)
+                with Tracer.span(label):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    @staticmethod
+    def inject(headers: dict) -> dict:
+        """Add the current traceparent to outbound request headers"""
+        span = _current.get()
+        if span is not None:
+            headers['traceparent'] = span.traceparent
+        return headers
+
+    @staticmethod
+    def _export(spans: list):
+        with Tracer._lock:
+            if Tracer._thread is None:
+                Tracer._queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+                Tracer._thread = threading.Thread(target=Tracer._work, name='trace-exporter', daemon=True)
+                Tracer._thread.start()
+        try:
+            Tracer._queue.put_nowait(spans)
+        except queue.Full:
+            logger.warning("Trace export queue full, dropping trace")
+
+    @staticmethod
+    def _work():
+        while True:
+            spans = Tracer._queue.get()
+            exporter = Tracer.exporter
+            if exporter is None:
+                continue
+            try:
+                exporter.export(Tracer.payload(spans))
+            except Exception as e:
+                logger.warning(f"Trace export failed: {e}")
+
+    @staticmethod
+    def payload(spans: list) -> dict:
+        """OTLP/JSON ExportTraceServiceRequest for a list of spans"""
+        return {'resourceSpans': [{
+            'resource': {'attributes': [_attribute('service.name', Tracer.service_name)]},
+            'scopeSpans': [{
+                'scope': {'name': 'app.tracing'},
+                'spans': [span.to_otlp() for span in spans]
+            }]
+        }]}
@@ -0,0 +1,143 @@
+"""
+Transfer Executor - Serialize transfers per account on single-threaded lanes
+"""
+
+from concurrent.futures import Future
+from flask import current_app, has_app_context
+from app.services.metrics_service import MetricsService
+from app.services.tracing import Tracer
+import queue
+import threading
+import zlib
+
+# Worker threads; transfers of different accounts run in parallel across them
+LANES = 8
+
+# Transfers waiting per lane before new ones are refused
+QUEUE_SIZE = 200
+
+# Seconds a caller waits for room in a full lane before LaneFullError
+ENQUEUE_TIMEOUT = 2.0
+
+class LaneFullError(Exception):
+    """An account's lane is full; the caller should retry later"""
+
+class TransferExecutor:
+    """
+    Runs transfer functions on a fixed set of single-threaded lanes
+
+    Work is sharded by account key (crc32 % lanes), so everything touching
+    one account runs in order on one thread: the balance check and the
+    ledger postings of one transfer can no longer interleave with another
+    transfer from the same account, and bursts on one account queue up in
+    memory instead of retrying on the database lock. Accounts on different
+    lanes proceed in parallel. Each lane queue is bounded; when it stays
+    full for ENQUEUE_TIMEOUT seconds the submission fails with
+    LaneFullError.
+
+    Each task runs in its own application context (and so its own
+    database session); return plain values, not ORM instances.
+    """
+
+    def __init__(self, app, lanes: int = LANES, queue_size: int = QUEUE_SIZE,
+                 enqueue_timeout: float = ENQUEUE_TIMEOUT):
+        self.app = app
+        self.lanes = lanes
+        self.enqueue_timeout = enqueue_timeout
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(lanes)]
+        self._threads = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @staticmethod
+    def current():
+        """Executor of the active Flask application (None if not configured)"""
+        if not has_app_context():
+            return None
+        return current_app.extensions.get('transfer_executor')
+
+    def lane_for(self, key) -> int:
+        return zlib.crc32(str(key).encode()) % self.lanes
+
+    def start(self):
+        """Start the lane threads (idempotent)"""
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.lanes):
+                thread = threading.Thread(target=self._work, args=(index,), name=f'transfer-lane-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        MetricsService.register_gauge('transfer_lane_queue_max', lambda: max(self.depths()))
+
+    def submit(self, key, fn, *args, **kwargs) -> Future:
+        """
+        Queue fn(*args, **kwargs) on the lane of `key`
+
+        Raises:
+            LaneFullError: If the lane stays full for enqueue_timeout seconds
+        """
+        future = Future()
+        lane = self.lane_for(key)
+
+        # Already on this lane (a transfer calling another): waiting on our own queue would deadlock
+        if getattr(self._local, 'lane', None) == lane:
+            future.set_result(fn(*args, **kwargs))
+            return future
+
+        self.start()
+        try:
+            self._queues[lane].put((future, Tracer.current(), fn, args, kwargs), timeout=self.enqueue_timeout)
+        except queue.Full:
+            raise LaneFullError(f"Transfer lane {lane} is full")
+        return future
+
+    def run(self, key, fn, *args, **kwargs):
+        """
+        Run fn on the lane of `key` and wait for its result
+
+        There is deliberately no result timeout: once queued a transfer will
+        run, so the caller must not report it as failed.
+        """
+        return self.submit(key, fn, *args, **kwargs).result()
+
+    def depths(self) -> list:
+        return [q.qsize() for q in self._queues]
+
+    def _work(self, index: int):
+        self._local.lane = index
+        tasks = self._queues[index]
+        while True:
+            future, span, fn, args, kwargs = tasks.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with self.app.app_context(), Tracer.attach(span):
+                    future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+def run_serialized(key, fn, *args, **kwargs):
+    """
+    Run fn on the account lane of `key` when the app has an executor, inline otherwise
+
+    With group commit enabled fn goes to the group committer instead, whose
+    single writer thread already serializes every transfer. The calling
+    request is marked as having written (see read_routing.remember_write).
+
+    Raises:
+        LaneFullError: If the lane is full
+    """
+    committer = current_app.extensions.get('group_committer') if has_app_context() else None
+    if committer is not None:
+        result = committer.run(fn, *args, **kwargs)
+    else:
+        executor = TransferExecutor.current()
+        if executor is None:
+            return fn(*args, **kwargs)
+        result = executor.run(key, fn, *args, **kwargs)
+
+    # The writes were flushed on another thread, outside the request's context
+    from app.middleware.read_routing import remember_write
+    remember_write()
+    return result
@@ -0,0 +1,184 @@
+"""
+Bloom Filter - Memory-mapped set membership filter shared between processes
+"""
+
+from contextlib import contextmanager
+import hashlib
+import math
+import mmap
+import os
+import struct
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are not serialized across processes
+    fcntl = None
+
+MAGIC = b'SBF1'
+
+# magic, bit count, hash count, item count, built at (epoch), flags
+_HEADER = struct.Struct('<4sQIQdI')
+
+# Header flag: the items were a complete copy of the source when the filter was built
+FLAG_COMPLETE = 1
+
+def optimal_size(expected: int, fp_rate: float) -> tuple:
+    """
+    Bit and hash counts for a filter holding `expected` items
+
+    Returns:
+        tuple: (bits, hashes)
+    """
+    expected = max(1, expected)
+    bits = max(64, int(math.ceil(-expected * math.log(fp_rate) / (math.log(2) ** 2))))
+    hashes = max(1, int(round(bits / expected * math.log(2))))
+    return bits, hashes
+
+def _positions(item: str, bits: int, hashes: int):
+    """Bit positions of an item (Kirsch-Mitzenmacher double hashing)"""
+    digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+    h1, h2 = struct.unpack('<QQ', digest)
+    h2 |= 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+class BloomFilter:
+    """
+    Bloom filter stored in a file and read through mmap
+
+    Every process maps the same file, so the bit array lives once in the
+    page cache however many workers read it. build() writes a new file
+    and renames it over the old one; open filters notice the new file
+    (checked at most once per `check_interval` seconds) and remap it.
+    add() sets bits in place. Both hold an exclusive lock on
+    `<path>.lock`, so an item added while a rebuild is reading its source
+    lands in the new file rather than the one being replaced.
+
+    A negative answer is definite; a positive one is wrong with roughly
+    the false-positive rate the filter was built for.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._map = None
+        self._view = (None, 0, 0)  # (map, bits, hashes), swapped as one reference
+        self._inode = None
+        self._next_check = 0.0
+        self.bits = self.hashes = self.count = self.flags = 0
+        self.built_at = 0.0
+        self._remap()
+
+    @staticmethod
+    @contextmanager
+    def locked(path: str):
+        """Exclusive cross-process lock serializing build() and add() on a filter file"""
+        with open(f"{path}.lock", 'a') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def build(path: str, items, expected: int, fp_rate: float = 0.01, flags: int = 0) -> 'BloomFilter':
+        """
+        Write a filter containing `items` to `path` (atomically replacing any existing file)
+
+        Args:
+            path: Filter file
+            items: Iterable of strings
+            expected: Expected item count, used to size the filter
+            fp_rate: Target false-positive rate
+            flags: Header flags (e.g. FLAG_COMPLETE)
+        """
+        bits, hashes = optimal_size(expected, fp_rate)
+        array = bytearray((bits + 7) // 8)
+        count = 0
+        with BloomFilter.locked(path):
+            for item in items:
+                for position in _positions(item, bits, hashes):
+                    array[position >> 3] |= 1 << (position & 7)
+                count += 1
+
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(_HEADER.pack(MAGIC, bits, hashes, count, time.time(), flags))
+                f.write(array)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        return BloomFilter(path)
+
+    def _remap(self):
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except OSError:
+            self._map, self._view, self._inode = None, (None, 0, 0), None
+            return
+        try:
+            inode = os.fstat(fd).st_ino
+            mapped = mmap.mmap(fd, 0)
+        finally:
+            os.close(fd)
+
+        magic, bits, hashes, count, built_at, flags = _HEADER.unpack_from(mapped)
+        if magic != MAGIC or len(mapped) < _HEADER.size + (bits + 7) // 8:
+            mapped.close()
+            raise ValueError(f"Not a bloom filter file: {self.path}")
+
+        # Readers may still hold the old map; it is unmapped once no longer referenced
+        self._map, self._view, self._inode = mapped, (mapped, bits, hashes), inode
+        self.bits, self.hashes, self.count, self.built_at, self.flags = bits, hashes, count, built_at, flags
+
+    def _check_for_changes(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            inode = os.stat(self.path).st_ino
+        except OSError:
+            inode = None
+        if inode != self._inode:
+            self._remap()
+        elif self._map is not None:
+            # Another process may have added items in place
+            self.count = _HEADER.unpack_from(self._map)[3]
+
+    @property
+    def loaded(self) -> bool:
+        self._check_for_changes()
+        return self._map is not None
+
+    def __contains__(self, item: str) -> bool:
+        self._check_for_changes()
+        mapped, bits, hashes = self._view
+        if mapped is None:
+            return True
+        offset = _HEADER.size
+        for position in _positions(item, bits, hashes):
+            if not mapped[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, item: str):
+        """Set an item's bits in place, visible to every process mapping the file"""
+        with BloomFilter.locked(self.path):
+            # A rebuild may have just replaced the file
+            self._next_check = 0.0
+            self._check_for_changes()
+            if self._map is None:
+                return
+            offset = _HEADER.size
+            for position in _positions(item, self.bits, self.hashes):
+                self._map[offset + (position >> 3)] |= 1 << (position & 7)
+            self.count = _HEADER.unpack_from(self._map)[3] + 1
+            struct.pack_into('<Q', self._map, 16, self.count)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map, self._view = None, (None, 0, 0)
@@ -3,6 +3,20 @@ IBAN Generator - Generate Costa Rican IBAN numbers
 """
 
 import random
+import re
+
+COUNTRY_CODE = "CR"
+BANK_CODE = "0666"  # Our bank code with leading 0
+BRANCH_CODE = "0001"  # Fixed branch code
+ACCOUNT_DIGITS = 12
+
+# CR + 2 check digits + bank (4) + branch (4) + account (12) = 24 chars
+IBAN_LENGTH = 4 + len(BANK_CODE) + len(BRANCH_CODE) + ACCOUNT_DIGITS
+
+_IBAN_PATTERN = re.compile(r'^CR\d{22}$')
+
+# ISO 13616: letters are replaced by two digits (A=10 ... Z=35)
+_LETTER_DIGITS = str.maketrans({chr(c): str(c - 55) for c in range(ord('A'), ord('Z') + 1)})
 
 def generate_account_number():
     """
@@ -13,26 +27,42 @@ def generate_account_number():
     """
     return ''.join([str(random.randint(0, 9)) for _ in range(12)])
 
+def compute_check_digits(bban: str, country_code: str = COUNTRY_CODE) -> str:
+    """
+    Compute ISO 7064 mod 97-10 IBAN check digits
+    
+    Args:
+        bban: Basic bank account number (everything after the check digits)
+        country_code: Two-letter country code
+        
+    Returns:
+        str: Two check digits
+    """
+    numeric = (bban + country_code + "00").upper().translate(_LETTER_DIGITS)
+    return f"{98 - int(numeric) % 97:02d}"
+
+def build_iban(account_number) -> str:
+    """
+    Build our bank's IBAN for an account sequence number
+    
+    Args:
+        account_number: Account part as int or digit string (max 12 digits)
+        
+    Returns:
+        str: IBAN with correct check digits
+    """
+    bban = f"{BANK_CODE}{BRANCH_CODE}{int(account_number):0{ACCOUNT_DIGITS}d}"
+    return f"{COUNTRY_CODE}{compute_check_digits(bban)}{bban}"
+
 def generate_iban():
     """
     Generate a Costa Rican IBAN number
-    Format: CR21+0666+0001+12 random digits
+    Format: CR + check digits + 0666 + 0001 + 12 random digits
     
     Returns:
         str: Generated IBAN number
     """
-    # Fixed parts
-    country_code = "CR21"
-    bank_code = "0666"  # Our bank code with leading 0
-    branch_code = "0001"  # Fixed branch code
-    
-    # Generate account number
-    account_number = generate_account_number()
-    
-    # Combine all parts
-    iban = f"{country_code}{bank_code}{branch_code}{account_number}"
-    
-    return iban
+    return build_iban(generate_account_number())
 
 def validate_iban(iban: str) -> bool:
     """
@@ -44,17 +74,32 @@ def validate_iban(iban: str) -> bool:
     Returns:
         bool: True if valid, False otherwise
     """
-    if not iban or len(iban) != 22:  # CR21 + 0666 + 0001 + 12 digits = 22 chars
-        return False
-        
-    # Check fixed parts
-    if not (iban.startswith("CR21") and 
-            iban[4:8] == "0666" and  # Our bank
-            iban[8:12] == "0001"):
-        return False
+    return validate_ibans([iban])[0]
+
+def validate_ibans(ibans) -> list:
+    """
+    Validate many IBANs at once (e.g. the rows of an import file)
     
-    # Check if last 12 characters are digits
-    return iban[12:].isdigit()
+    Structure is checked with one precompiled pattern and the mod-97
+    checksum is computed over the whole rearranged number in a single
+    big-integer operation per IBAN.
+    
+    Args:
+        ibans: Iterable of IBAN strings
+        
+    Returns:
+        list: One bool per input, in order
+    """
+    match = _IBAN_PATTERN.match
+    translate = _LETTER_DIGITS
+    results = []
+    for iban in ibans:
+        if not iban or not match(iban):
+            results.append(False)
+            continue
+        rearranged = (iban[4:] + iban[:4]).translate(translate)
+        results.append(int(rearranged) % 97 == 1)
+    return results
 
 def extract_bank_code(iban: str) -> str:
     """
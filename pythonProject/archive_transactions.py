@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Move old completed transactions to the archive table
+"""
+
+import argparse
+from datetime import date, datetime
+from app import create_app
+from app.models import db
+from app.services.archive_service import ArchiveService
+
+def archive_transactions(days: int = None, before: date = None):
+    """Archive completed transactions older than the horizon (or a given date)"""
+    app = create_app(with_routes=False)
+    if days is not None:
+        app.config['TRANSACTION_ARCHIVE_DAYS'] = days
+    
+    with app.app_context():
+        db.create_all()
+        
+        cutoff = datetime.combine(before, datetime.min.time()) if before else ArchiveService.horizon()
+        moved = ArchiveService.archive(cutoff)
+        print(f"✓ {moved} transactions created before {cutoff:%Y-%m-%d} archived")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Archive old completed transactions')
+    parser.add_argument('--days', type=int, help='Archive transactions older than this many days (default: 90)')
+    parser.add_argument('--before', type=date.fromisoformat, help='Archive transactions created before this date')
+    args = parser.parse_args()
+    
+    archive_transactions(args.days, args.before)
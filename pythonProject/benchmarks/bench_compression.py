@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Compression Benchmark - Bandwidth and latency impact of response compression
+
+Serves a synthetic transaction history (shaped like Transaction.to_dict())
+through the compression middleware and reports, per encoding, the bytes on
+the wire, the server-side time and the estimated end-to-end latency over a
+few typical link speeds.
+
+Usage:
+    python benchmarks/bench_compression.py [--rows 5000] [--repeat 20] [--level 6]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, Response, jsonify
+from app.middleware.compression import init_compression, _load_brotli
+
+# Link speeds in megabits per second used to estimate transfer time
+LINK_SPEEDS = [('3G', 2), ('DSL', 10), ('LAN', 100)]
+
+
+def build_payload(rows: int) -> list:
+    """Build a synthetic list of transactions"""
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            'id': i,
+            'transaction_id': str(uuid.UUID(int=i)),
+            'from_account_id': i % 97 + 1,
+            'to_account_id': i % 89 + 1,
+            'amount': float(1000 + (i * 37) % 50000),
+            'currency': 'CRC',
+            'status': 'completed',
+            'description': 'Transferencia SINPE Móvil',
+            'sender_phone': f"8888{i % 10000:04d}",
+            'receiver_phone': f"8777{(i * 7) % 10000:04d}",
+            'created_at': (start + timedelta(minutes=i)).isoformat()
+        }
+        for i in range(rows)
+    ]
+
+
+def build_app(payload: list, level: int) -> Flask:
+    app = Flask(__name__)
+    app.config['COMPRESS_LEVEL'] = level
+    init_compression(app)
+
+    @app.route('/transactions')
+    def transactions():
+        return jsonify({'success': True, 'data': payload})
+
+    @app.route('/transactions/stream')
+    def transactions_stream():
+        def generate():
+            for item in payload:
+                yield json.dumps(item) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    return app
+
+
+def measure(client, path: str, encoding: str, repeat: int):
+    """Return (bytes on the wire, median server time in ms)"""
+    headers = {'Accept-Encoding': encoding} if encoding else {}
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path, headers=headers)
+        body = response.get_data()
+        timings.append((time.perf_counter() - started) * 1000)
+        size = len(body)
+    timings.sort()
+    return size, timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark response compression')
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--level', type=int, default=6)
+    args = parser.parse_args()
+
+    payload = build_payload(args.rows)
+    client = build_app(payload, args.level).test_client()
+
+    encodings = [('identity', None), ('gzip', 'gzip'), ('deflate', 'deflate')]
+    if _load_brotli() is not None:
+        encodings.append(('br', 'br'))
+
+    print(f"Compression benchmark: {args.rows} rows, level {args.level}, {args.repeat} runs\n")
+
+    for label, path in [('JSON list', '/transactions'), ('NDJSON stream', '/transactions/stream')]:
+        print(f"== {label} ({path}) ==")
+        header = f"{'encoding':<10}{'bytes':>12}{'ratio':>8}{'server ms':>11}"
+        header += ''.join(f"{name + ' ms':>11}" for name, _ in LINK_SPEEDS)
+        print(header)
+
+        baseline = None
+        for label_enc, encoding in encodings:
+            size, server_ms = measure(client, path, encoding, args.repeat)
+            baseline = baseline or size
+            row = f"{label_enc:<10}{size:>12,}{baseline / size:>8.1f}{server_ms:>11.2f}"
+            for _, mbps in LINK_SPEEDS:
+                wire_ms = size * 8 / (mbps * 1_000_000) * 1000
+                row += f"{server_ms + wire_ms:>11.1f}"
+            print(row)
+        print()
+
+    # Sanity check: the gzip body must round-trip to the original payload
+    response = client.get('/transactions', headers={'Accept-Encoding': 'gzip'})
+    decoded = json.loads(zlib.decompress(response.get_data(), 16 + zlib.MAX_WBITS))
+    assert decoded['data'] == payload, 'gzip round-trip mismatch'
+    print("✓ gzip round-trip verified")
+
+
+if __name__ == '__main__':
+    main()
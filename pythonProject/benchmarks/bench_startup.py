@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark - Cold-start time of the CLI, API and terminal entry points
+
+Each scenario runs in a fresh interpreter under ``python -X importtime``.
+The benchmark reports wall-clock start time and total import time, lists
+the slowest top-level imports, and checks that heavy optional dependencies
+(psycopg2, requests, brotli, ...) stay off the startup path.
+
+Budgets are set on the time above a floor scenario that only imports Flask
+and Flask-SQLAlchemy. With --check the script exits non-zero if a scenario
+exceeds its budget or imports a forbidden module, so it can run as a
+regression gate.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--top 10] [--check]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only imported when BCCR or a peer bank is contacted
+HEAVY_MODULES = ('psycopg2', 'requests', 'brotli')
+
+# Unavoidable cost of any entry point: the interpreter plus Flask and SQLAlchemy.
+# Budgets are expressed on top of it so the check holds on slow and fast machines.
+FLOOR = "import flask, flask_sqlalchemy"
+
+# name -> (code, budget in ms above the floor, modules that must not be imported)
+SCENARIOS = {
+    'cli': (
+        "from app import create_app; create_app(with_routes=False)",
+        150, HEAVY_MODULES + ('flask_session', 'flask_cors', 'app.routes'),
+    ),
+    'api': (
+        "from app import create_app; create_app()",
+        350, HEAVY_MODULES,
+    ),
+    'terminal': (
+        "import main; main.SinpeBankingSystem().load_application()",
+        500, HEAVY_MODULES,
+    ),
+}
+
+
+def parse_importtime(stderr: str):
+    """
+    Parse -X importtime output
+
+    Returns:
+        tuple: (total self time in us, {module: cumulative us} for top-level imports)
+    """
+    total, top_level = 0, {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2]
+        total += self_us
+        if not name.startswith('  '):
+            top_level[name.strip()] = cumulative_us
+    return total, top_level
+
+
+def run_scenario(code: str, repeat: int) -> dict:
+    walls, imports, top_level = [], [], {}
+    modules = set()
+    probe = f"{code}; import sys as _s; print('\\n'.join(_s.modules))"
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', probe],
+            cwd=PROJECT_ROOT, capture_output=True, text=True
+        )
+        walls.append((time.perf_counter() - started) * 1000)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        total, top_level = parse_importtime(result.stderr)
+        imports.append(total / 1000)
+        modules = set(result.stdout.split())
+    return {
+        'wall_ms': statistics.median(walls),
+        'import_ms': statistics.median(imports),
+        'top_level': top_level,
+        'modules': modules,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per scenario (median is reported)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest top-level imports to list')
+    parser.add_argument('--check', action='store_true', help='Fail if a budget is exceeded')
+    args = parser.parse_args()
+
+    floor = run_scenario(FLOOR, args.repeat)['wall_ms']
+    print(f"floor      wall {floor:7.1f} ms  ({FLOOR})")
+
+    failures = []
+    for name, (code, budget_ms, forbidden) in SCENARIOS.items():
+        result = run_scenario(code, args.repeat)
+        overhead = result['wall_ms'] - floor
+        loaded = sorted(
+            module for module in forbidden
+            if any(m == module or m.startswith(module + '.') for m in result['modules'])
+        )
+
+        status = 'ok' if overhead <= budget_ms and not loaded else 'OVER'
+        print(f"\n{name:<10} wall {result['wall_ms']:7.1f} ms  floor +{overhead:6.1f} ms (budget +{budget_ms} ms)  "
+              f"imports {result['import_ms']:7.1f} ms  [{status}]")
+        for module, cumulative in sorted(result['top_level'].items(), key=lambda i: -i[1])[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {module}")
+        if loaded:
+            print(f"    forbidden modules imported: {', '.join(loaded)}")
+
+        if overhead > budget_ms:
+            failures.append(f"{name}: floor +{overhead:.0f} ms > +{budget_ms} ms")
+        if loaded:
+            failures.append(f"{name}: imports {', '.join(loaded)}")
+
+    if args.check and failures:
+        print('\nStartup budget exceeded:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
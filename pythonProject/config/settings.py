@@ -63,7 +63,7 @@ PHONE_NUMBER_PREFIX = ["8", "6", "7"]  # Valid Costa Rican prefixes
 
 # Account number settings
 ACCOUNT_NUMBER_LENGTH = 15
-IBAN_LENGTH = 22
+IBAN_LENGTH = 24  # CR + check digits + bank (4) + branch (4) + account (12)
 
 # Session settings
 SESSION_TIMEOUT = 3600  # 1 hour in seconds
\ No newline at end of file
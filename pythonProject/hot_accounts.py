@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Mark accounts as hot: their balance checkpoints are written in the background
+"""
+
+import argparse
+import sys
+from app import create_app
+from app.models import db, Account
+from app.services.ledger_service import LedgerService
+
+def hot_accounts(command: str, numbers: list):
+    """Add, remove or list hot accounts, or consolidate them now"""
+    app = create_app(with_routes=False)
+    
+    with app.app_context():
+        db.create_all()
+        
+        if command == 'list':
+            ids = LedgerService.hot_account_ids()
+            for account in Account.query.filter(Account.id.in_(ids)).order_by(Account.number):
+                print(f"{account.number}  {account.balance:,.2f} {account.currency}")
+            print(f"✓ {len(ids)} hot accounts")
+            return
+        
+        if command == 'consolidate':
+            print(f"✓ {LedgerService.consolidate()} checkpoints written")
+            return
+        
+        for number in numbers:
+            account = Account.query.filter_by(number=number).first()
+            if not account:
+                print(f"✗ Account {number} not found")
+                sys.exit(1)
+            LedgerService.set_hot(account, command == 'add')
+            print(f"✓ {number} {'marked hot' if command == 'add' else 'back to per-transfer checkpoints'}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Manage accounts with background balance checkpoints')
+    parser.add_argument('command', choices=['add', 'remove', 'list', 'consolidate'])
+    parser.add_argument('numbers', nargs='*', help='Account numbers (IBAN) for add/remove')
+    args = parser.parse_args()
+    
+    hot_accounts(args.command, args.numbers)
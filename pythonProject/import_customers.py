@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Bulk import migrated customers from a CSV or NDJSON file
+
+Columns / keys: name, email, phone, password and optionally
+account_number, currency, balance, sinpe_phone.
+"""
+
+import argparse
+import time
+from app import create_app
+from app.models import db
+from app.services.import_service import ImportService, SUPPORTED_FORMATS, DEFAULT_CHUNK_SIZE
+
+def import_customers(path: str, fmt: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = None):
+    """Import a customer file and print progress per chunk"""
+    app = create_app(with_routes=False)
+    fmt = fmt or ImportService.detect_format(path)
+    started = time.perf_counter()
+    
+    def show_progress(report):
+        elapsed = time.perf_counter() - started
+        rate = report['processed'] / elapsed if elapsed else 0
+        print(f"  {report['processed']:,} processed | {report['imported']:,} imported | "
+              f"{report['failed']:,} failed | {rate:,.0f} rows/s")
+    
+    with app.app_context():
+        db.create_all()
+        
+        print(f"Importing {path} ({fmt}, {chunk_size} rows per chunk)...")
+        with open(path, encoding='utf-8', newline='') as f:
+            report = ImportService.import_records(
+                ImportService.parse_records(f, fmt),
+                chunk_size=chunk_size,
+                workers=workers,
+                progress=show_progress
+            )
+        
+        print(f"✓ Import finished: {report['imported']:,} imported, {report['failed']:,} failed")
+        for error in report['errors'][:20]:
+            print(f"  line {error['line']}: {error['error']}")
+        if report['failed'] > 20:
+            print(f"  ... {report['failed'] - 20:,} more")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Bulk import customers')
+    parser.add_argument('path', help='CSV or NDJSON file')
+    parser.add_argument('--format', choices=SUPPORTED_FORMATS, help='Defaults to the file extension')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, help='Password hashing threads (default: CPU count)')
+    args = parser.parse_args()
+    
+    import_customers(args.path, args.format, args.chunk_size, args.workers)
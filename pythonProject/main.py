@@ -5,44 +5,57 @@ Terminal-based banking application with Flask API backend
 """
 
 import os
+import socket
 import sys
 import threading
 import time
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
-from rich.prompt import Prompt, Confirm
+from rich.prompt import Prompt
 from rich.text import Text
-from rich.layout import Layout
-from rich.live import Live
 from rich import box
 
 # Add app directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
-from app import create_app
-from app.models import db
-from app.services.database_service import DatabaseService
-from app.services.terminal_service import TerminalService
-
 console = Console()
 
 class SinpeBankingSystem:
     def __init__(self):
-        self.app = create_app()
-        self.terminal_service = TerminalService()
+        self.app = None
+        self.terminal_service = None
         self.current_user = None
         self.server_thread = None
         self.server_running = False
+    
+    def load_application(self):
+        """Build the Flask app and terminal UI (deferred so the welcome screen shows immediately)"""
+        from app import create_app
+        from app.services.terminal_service import TerminalService
+        
+        self.app = create_app()
+        self.terminal_service = TerminalService(self.app)
         
     def initialize_database(self):
         """Initialize database with sample data"""
+        from app.models import db
+        from app.services.database_service import DatabaseService
+        from app.services.stats_service import StatsService
+        from app.services.ledger_service import LedgerService
+        from app.services.subscription_mirror import SubscriptionMirror
+        
         console.print("[yellow]Initializing database...[/yellow]")
         
         with self.app.app_context():
             db.create_all()
             db_service = DatabaseService()
             db_service.create_sample_data()
+            StatsService.install_counters()
+        
+        StatsService.start_reconciler(self.app)
+        LedgerService.start_consolidator(self.app)
+        SubscriptionMirror.start(self.app)
             
         console.print("[green]✓ Database initialized successfully[/green]")
     
@@ -53,8 +66,18 @@ class SinpeBankingSystem:
         
         self.server_thread = threading.Thread(target=run_server, daemon=True)
         self.server_thread.start()
-        self.server_running = True
-        time.sleep(2)  # Give server time to start
+        self.server_running = self.wait_for_server()
+    
+    def wait_for_server(self, timeout: float = 5.0) -> bool:
+        """Poll the API port until it accepts connections instead of sleeping blindly"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection(('127.0.0.1', 5000), timeout=0.2):
+                    return True
+            except OSError:
+                time.sleep(0.05)
+        return False
         
     def show_welcome_screen(self):
         """Display welcome screen"""
@@ -152,6 +175,7 @@ class SinpeBankingSystem:
             # Initialize system
             self.show_welcome_screen()
             console.print("[yellow]Starting SINPE Banking System...[/yellow]")
+            self.load_application()
             
             # Initialize database
             self.initialize_database()
@@ -9,7 +9,7 @@ from app.services.database_service import DatabaseService
 
 def reset_database():
     """Reset the database with new sample data"""
-    app = create_app()
+    app = create_app(with_routes=False)
     
     with app.app_context():
         print("Resetting database...")
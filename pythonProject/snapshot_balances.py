@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Write end-of-day closing balance snapshots
+"""
+
+import argparse
+from datetime import date, datetime, timedelta
+from app import create_app
+from app.models import db
+from app.services.ledger_service import LedgerService
+
+def snapshot_balances(start: date, end: date):
+    """Snapshot every business day from start to end (inclusive)"""
+    app = create_app(with_routes=False)
+    
+    with app.app_context():
+        db.create_all()
+        
+        day = start
+        while day <= end:
+            written = LedgerService.snapshot_end_of_day(day)
+            print(f"✓ {day.isoformat()}: {written} account balances snapshotted")
+            day += timedelta(days=1)
+
+if __name__ == "__main__":
+    yesterday = datetime.utcnow().date() - timedelta(days=1)
+    
+    parser = argparse.ArgumentParser(description='Write end-of-day balance snapshots')
+    parser.add_argument('--date', type=date.fromisoformat, default=yesterday,
+                        help='Business day to close (default: yesterday, UTC)')
+    parser.add_argument('--from', dest='start', type=date.fromisoformat,
+                        help='Backfill every day from this date up to --date')
+    args = parser.parse_args()
+    
+    snapshot_balances(args.start or args.date, args.date)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Sync the local SINPE subscription table from the BCCR directory
+"""
+
+import argparse
+from app import create_app
+from app.models import db
+from app.services.subscription_mirror import SubscriptionMirror
+from app.services.phone_filter import PhoneFilter
+
+def sync_subscriptions(full: bool):
+    """Run one full or incremental sync and report the result"""
+    app = create_app(with_routes=False)
+    
+    with app.app_context():
+        db.create_all()
+        
+        result = SubscriptionMirror.sync(full=full)
+        state = SubscriptionMirror.state()
+        print(f"✓ {result['upserted']} subscriptions updated, {result['deleted']} removed")
+        print(f"  {state.rows} subscriptions local, watermark {state.watermark or '-'}")
+        print(f"✓ Phone filter rebuilt with {PhoneFilter.rebuild()} numbers")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Mirror BCCR SINPE subscriptions locally')
+    parser.add_argument('--full', action='store_true',
+                        help='Reload the whole directory instead of only changes')
+    args = parser.parse_args()
+    
+    sync_subscriptions(args.full)
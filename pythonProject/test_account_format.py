@@ -24,8 +24,8 @@ def test_account_format():
         bank_code = extract_bank_code(iban)
         print(f"  Bank Code: {bank_code}")
         
-        # Check format: CR21 + 0666 + 0001 + 12 digits
-        expected_format = iban.startswith("CR21") and iban[4:8] == "0666" and iban[8:12] == "0001" and len(iban) == 22
+        # Check format: CR + check digits + 0666 + 0001 + 12 digits
+        expected_format = iban.startswith("CR") and iban[4:8] == "0666" and iban[8:12] == "0001" and len(iban) == 24
         print(f"  Correct Format: {expected_format}")
         print()
 
@@ -0,0 +1,84 @@
+"""
+Test admission control and priority load shedding
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from flask import Flask, Blueprint, jsonify
+from app import create_app
+from app.middleware.admission import AdmissionController, ROUTE_CLASSES, init_admission
+
+class TestAdmission(unittest.TestCase):
+    
+    def test_lower_classes_leave_room_for_transfers(self):
+        """Test listing requests stop at their share while transfers use the remaining slots"""
+        controller = AdmissionController(max_in_flight=4, max_wait={'transfer': 0.0, 'listing': 0.0})
+        self.assertTrue(controller.admit('listing'))
+        self.assertTrue(controller.admit('listing'))
+        self.assertFalse(controller.admit('listing'))
+        self.assertTrue(controller.admit('transfer'))
+        self.assertTrue(controller.admit('transfer'))
+        self.assertFalse(controller.admit('transfer'))
+        self.assertEqual(controller.shed['listing'], 1)
+    
+    def test_waiting_request_gets_released_slot(self):
+        """Test a transfer waits for a slot freed by another request"""
+        controller = AdmissionController(max_in_flight=1, max_wait={'transfer': 2.0})
+        self.assertTrue(controller.admit('transfer'))
+        threading.Timer(0.05, controller.release).start()
+        self.assertTrue(controller.admit('transfer'))
+    
+    def test_listing_shed_when_waits_grow(self):
+        """Test listing is refused outright once admission waits exceed the target"""
+        controller = AdmissionController(max_in_flight=8, target_wait_ms=10)
+        controller._wait_ms = 500.0
+        self.assertFalse(controller.admit('listing'))
+        self.assertTrue(controller.admit('transfer'))
+    
+    def test_shed_request_returns_503(self):
+        """Test a shed request gets 503 with Retry-After and /health is not controlled"""
+        app = Flask(__name__)
+        app.config['ADMISSION_MAX_IN_FLIGHT'] = 4
+        init_admission(app)
+        admin_bp = Blueprint('admin', __name__)
+        
+        @admin_bp.route('/admin/metrics')
+        def metrics():
+            return jsonify({})
+        
+        @app.route('/health')
+        def health():
+            return jsonify({})
+        
+        app.register_blueprint(admin_bp, url_prefix='/api')
+        client = app.test_client()
+        
+        self.assertEqual(client.get('/api/admin/metrics').status_code, 200)
+        self.assertEqual(app.extensions['admission'].in_flight, 0)
+        
+        app.extensions['admission'].in_flight = 1
+        response = client.get('/api/admin/metrics')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(client.get('/health').status_code, 200)
+    
+    def test_route_classes_match_the_application(self):
+        """Test every ROUTE_CLASSES key names a blueprint or endpoint of the real application"""
+        tmp = tempfile.mkdtemp()
+        try:
+            app = create_app(config={
+                'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+                'SESSION_FILE_DIR': os.path.join(tmp, 'sessions'),
+                'TRACE_EXPORT_PATH': None,
+                'PROFILE_DIR': None,
+            })
+            for name in ROUTE_CLASSES:
+                self.assertTrue(name in app.blueprints or name in app.view_functions, name)
+        finally:
+            shutil.rmtree(tmp)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Test the in-process API client against the full application
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from werkzeug.security import generate_password_hash
+from app import create_app
+from app.models import db, User
+from app.services.api_client import ApiClient
+
+class TestApiClient(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.app = create_app(config={
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(self.tmp, 'banking.db')}",
+            'SESSION_FILE_DIR': os.path.join(self.tmp, 'sessions'),
+            'RATE_LIMIT_STORAGE': None,
+            'TRACE_EXPORT_PATH': None,
+            'PROFILE_DIR': None,
+        })
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(User(name='ana', email='ana@example.com', phone='88881111',
+                                password_hash=generate_password_hash('secret')))
+            db.session.commit()
+        self.api = ApiClient(app=self.app)
+    
+    def tearDown(self):
+        self.api.close()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        shutil.rmtree(self.tmp)
+    
+    def test_in_process_calls(self):
+        """Test requests reach the API routes without a server and return status and JSON"""
+        self.assertTrue(self.api.in_process)
+        
+        response = self.api.post("/auth/login", json={'username': 'ana', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['error'], 'Invalid credentials')
+        
+        self.assertEqual(self.api.get("/no-such-route").status_code, 404)
+        self.assertIn('X-Trace-Id', self.api.get("/auth/check").headers)
+    
+    def test_login_session_persists_across_calls(self):
+        """Test the session cookie set by login is sent on later calls and cleared by logout"""
+        self.assertFalse(self.api.get("/auth/check").json()['authenticated'])
+        
+        response = self.api.post("/auth/login", json={'username': 'ana', 'password': 'secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['name'], 'ana')
+        
+        check = self.api.get("/auth/check").json()
+        self.assertTrue(check['authenticated'])
+        self.assertEqual(check['username'], 'ana')
+        
+        self.assertEqual(self.api.post("/auth/logout").status_code, 200)
+        self.assertFalse(self.api.get("/auth/check").json()['authenticated'])
+
+if __name__ == '__main__':
+    unittest.main()
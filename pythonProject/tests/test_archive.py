@@ -0,0 +1,84 @@
+"""
+Test transaction archival and reads across hot and archived rows
+"""
+
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from flask import Flask
+from sqlalchemy import text
+from app.models import db, Account, Transaction, TransactionArchive, LedgerEntry
+from app.services.ledger_service import LedgerService
+from app.services.archive_service import ArchiveService
+from app.services.stats_service import StatsService
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        StatsService.install_counters()
+
+        self.account = Account(number='CR01', currency='CRC', balance=Decimal('0.00'))
+        db.session.add(self.account)
+        db.session.flush()
+        for n, (day, status) in enumerate([(1, 'completed'), (2, 'pending'), (3, 'completed'), (20, 'completed')]):
+            db.session.add(Transaction(
+                transaction_id=f'tx-{n}', to_account_id=self.account.id, amount=Decimal('10.00'),
+                status=status, created_at=datetime(2024, 1, day)
+            ))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_archive_moves_old_completed(self):
+        """Test only completed transactions before the cutoff move, and totals are kept"""
+        self.assertEqual(ArchiveService.archive(datetime(2024, 1, 10), batch_size=1), 2)
+
+        self.assertEqual(sorted(t.transaction_id for t in Transaction.query), ['tx-1', 'tx-3'])
+        self.assertEqual(sorted(t.transaction_id for t in TransactionArchive.query), ['tx-0', 'tx-2'])
+        stats = StatsService.get_stats()
+        self.assertEqual((stats['transactions'], stats['transactions_archive']), (2, 2))
+        self.assertEqual(stats['transactions_completed'], 3)
+        self.assertEqual(StatsService.reconcile(), 0)
+
+    def test_archive_keeps_ledger_entries(self):
+        """Test transactions with ledger legs archive with foreign keys enforced, and the legs still resolve"""
+        db.session.commit()
+        db.session.execute(text('PRAGMA foreign_keys=ON'))
+        self.assertEqual(db.session.execute(text('PRAGMA foreign_keys')).scalar(), 1)
+        LedgerService.post_transfer('tx-0', None, self.account, Decimal('10.00'))
+        db.session.commit()
+
+        self.assertEqual(ArchiveService.archive(datetime(2024, 1, 10)), 2)
+
+        entry = LedgerEntry.query.filter_by(transaction_id='tx-0', account_id=self.account.id).one()
+        self.assertTrue(ArchiveService.find(entry.transaction_id)['archived'])
+        self.assertEqual(LedgerService.get_balance(self.account), Decimal('10.00'))
+
+    def test_reads_span_both_tables(self):
+        """Test listings, lookups and ranges include archived rows only when needed"""
+        ArchiveService.archive(datetime(2024, 1, 10))
+
+        newest = ArchiveService.list_transactions(page=1, per_page=1)
+        self.assertEqual([t['transaction_id'] for t in newest['data']], ['tx-3'])
+        self.assertEqual(newest['pagination']['total'], 4)
+        # An old pending transaction stays hot, so archived rows interleave with it
+        page = ArchiveService.list_transactions(page=2, per_page=2)
+        self.assertEqual([(t['transaction_id'], t['archived']) for t in page['data']],
+                         [('tx-1', False), ('tx-0', True)])
+
+        self.assertTrue(ArchiveService.find('tx-0')['archived'])
+        recent = ArchiveService.account_transactions(self.account.id, start=datetime(2024, 1, 15))
+        self.assertEqual([t['transaction_id'] for t in recent], ['tx-3'])
+        self.assertEqual(len(ArchiveService.account_transactions(self.account.id)), 4)
+
+if __name__ == '__main__':
+    unittest.main()
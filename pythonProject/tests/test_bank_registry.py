@@ -0,0 +1,61 @@
+"""
+Test bank code normalisation and hot reloading of the bank routing table
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from app.services.bank_registry import BankRegistry, canonical_code, wire_code
+
+BANKS = {
+    "0666": {"name": "My Bank", "url": "http://localhost:5000"},
+    "0152": {"name": "Other Bank", "url": "http://localhost:3001", "timeout": 4},
+}
+
+class TestBankRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'banks.json')
+        self.write(BANKS)
+        self.registry = BankRegistry(self.path, check_interval=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, banks, mtime=None):
+        with open(self.path, 'w') as f:
+            f.write(banks if isinstance(banks, str) else json.dumps(banks))
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_code_forms(self):
+        """Test every form of a bank code finds the same entry"""
+        self.assertEqual(canonical_code(666), '0666')
+        self.assertEqual(wire_code('0666'), '666')
+        for code in ('666', '0666', 666, '00666'):
+            self.assertEqual(self.registry.get(code).name, 'My Bank')
+        self.assertEqual(self.registry.get('152').timeouts, (3.0, 4.0))
+        self.assertTrue(self.registry.is_local('666'))
+        self.assertIsNone(self.registry.get('999'))
+
+    def test_reload_on_change(self):
+        """Test an edited file replaces the table without a restart"""
+        self.write(dict(BANKS, **{"0111": {"name": "Banco Popular", "url": "http://x"}}), mtime=2_000_000_000)
+        self.assertEqual(self.registry.name_for('111'), 'Banco Popular')
+
+    def test_invalid_file_keeps_table(self):
+        """Test a half-written file does not empty the table"""
+        self.write('{"0666": ', mtime=2_000_000_000)
+        self.assertEqual(self.registry.name_for('0152'), 'Other Bank')
+
+    def test_added_bank_survives_reload(self):
+        """Test banks added at runtime stay routable after a file reload"""
+        self.registry.add('0200', 'New Bank', 'http://new')
+        self.write(BANKS, mtime=2_000_000_000)
+        self.assertEqual(self.registry.get(200).url, 'http://new')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Test buffered BCCR transfer logging and the local spool
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+from flask import Flask
+from app.services.bccr_transfer_log import BCCRTransferLog, transfer_row
+
+def transfer(n: int) -> dict:
+    return {
+        'transaction_id': f'tx-{n}',
+        'timestamp': '2024-01-01T10:00:00',
+        'sender': {'bank_code': '0666', 'account_number': 'CR01'},
+        'receiver': {'bank_code': '0152', 'account_number': 'CR02'},
+        'amount': {'value': 100, 'currency': 'CRC'}
+    }
+
+class TestBCCRTransferLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'spool.db')
+        self.log = BCCRTransferLog(Flask(__name__), self.path, batch_size=3)
+        # Keep the flusher thread out of the way; flush() is called directly
+        self.log._thread = mock.Mock()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_spool_created_on_first_use(self):
+        """Test constructing the log leaves no spool file until a record is spilled"""
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(self.log.flush(), 0)
+        self.log.stop()
+        self.assertFalse(os.path.exists(self.path))
+
+        self.log._spill([('tx',) * 9])
+        self.assertTrue(os.path.exists(self.path))
+        self.assertEqual(self.log.pending(), 1)
+
+    def test_flush_writes_one_batch(self):
+        """Test queued transfers are written in a single multi-row batch"""
+        for n in range(4):
+            self.log.enqueue(transfer(n))
+
+        with mock.patch('app.services.bccr_transfer_log.write_batch') as write:
+            self.assertEqual(self.log.flush(), 3)
+
+        rows = write.call_args[0][0]
+        self.assertEqual([row[0] for row in rows], ['tx-0', 'tx-1', 'tx-2'])
+        self.assertEqual((rows[0][2], rows[0][4]), ('666', '152'))
+        self.assertEqual(self.log.pending(), 1)
+
+    def test_outage_spools_and_replays(self):
+        """Test a failed flush keeps records on disk and sends them first next time"""
+        self.log.enqueue(transfer(0))
+        with mock.patch('app.services.bccr_transfer_log.write_batch', side_effect=ConnectionError):
+            self.assertEqual(self.log.flush(), 0)
+
+        # A new writer on the same spool file (e.g. after a restart) still has the record
+        restarted = BCCRTransferLog(Flask(__name__), self.path, batch_size=3)
+        restarted._thread = mock.Mock()
+        restarted.enqueue(transfer(1))
+        with mock.patch('app.services.bccr_transfer_log.write_batch') as write:
+            self.assertEqual(restarted.flush(), 2)
+
+        self.assertEqual([row[0] for row in write.call_args[0][0]], ['tx-0', 'tx-1'])
+        self.assertEqual(restarted.pending(), 0)
+
+    def test_outage_backs_off_with_full_buffer(self):
+        """Test the flusher sleeps until the retry time instead of spinning while BCCR is down"""
+        log = BCCRTransferLog(Flask(__name__), self.path, batch_size=3, flush_interval=0.2)
+        for n in range(12):
+            log._buffer.append(transfer_row(transfer(n)))
+        
+        clock = mock.Mock(monotonic=mock.Mock(side_effect=time.monotonic))
+        with mock.patch('app.services.bccr_transfer_log.write_batch', side_effect=ConnectionError) as write, \
+                mock.patch('app.services.bccr_transfer_log.time', clock):
+            log.start()
+            time.sleep(0.5)
+            log.stop()
+        
+        # Attempts at 0, 0.2 and 0.6 s (doubling delay), plus the final one on stop
+        self.assertLessEqual(write.call_count, 4)
+        self.assertLess(clock.monotonic.call_count, 50)
+
+if __name__ == '__main__':
+    unittest.main()
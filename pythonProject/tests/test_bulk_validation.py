@@ -0,0 +1,57 @@
+"""
+Test bulk SINPE number validation
+"""
+
+import os
+import unittest
+from unittest import mock
+from flask import Flask
+from app.models import db, SinpeSubscription
+from app.routes.sinpe_routes import sinpe_bp
+from app.services.bank_registry import BankRegistry
+
+BANKS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'banks.json')
+
+class TestBulkValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.extensions['bank_registry'] = BankRegistry(BANKS_PATH)
+        db.init_app(self.app)
+        self.app.register_blueprint(sinpe_bp, url_prefix='/api')
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        db.session.add(SinpeSubscription(sinpe_number='88887777', sinpe_bank_code='0666', sinpe_client_name='Local User'))
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_one_bccr_query_for_local_misses(self):
+        """Test local hits skip BCCR and the misses are sent in one call"""
+        remote = {'22223333': {'phone': '22223333', 'bank_code': '152', 'name': 'Remote User'}}
+        with mock.patch('app.services.bccr_service.BCCRService.validate_sinpe_numbers', return_value=remote) as bccr:
+            response = self.client.post('/api/validate', json={'phones': ['8888-7777', '22223333', '11112222', 'abc']})
+
+        bccr.assert_called_once_with(['22223333', '11112222'])
+        results = {r['phone']: r for r in response.get_json()['results']}
+        self.assertEqual(results['88887777']['source'], 'local')
+        self.assertEqual(results['22223333']['bank_name'], 'Banco de Gayndall Gayseca')
+        self.assertEqual(results['11112222']['status'], 'not_registered')
+        self.assertEqual(results['abc']['status'], 'invalid')
+
+    def test_bccr_outage_is_per_number(self):
+        """Test an unreachable BCCR only affects numbers not found locally"""
+        with mock.patch('app.services.bccr_service.BCCRService.validate_sinpe_numbers', return_value=None):
+            response = self.client.post('/api/validate', json={'phones': ['88887777', '22223333']})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['summary'], {'registered': 1, 'unavailable': 1})
+
+if __name__ == '__main__':
+    unittest.main()
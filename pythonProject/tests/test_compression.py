@@ -0,0 +1,78 @@
+"""
+Test response compression middleware
+"""
+
+import json
+import unittest
+import zlib
+from flask import Flask, Response, jsonify
+from app.middleware.compression import init_compression, choose_encoding
+
+class TestCompression(unittest.TestCase):
+    
+    def setUp(self):
+        app = Flask(__name__)
+        app.config['COMPRESS_MIN_SIZE'] = 500
+        init_compression(app)
+        
+        self.rows = [{'id': i, 'status': 'completed', 'currency': 'CRC'} for i in range(200)]
+        
+        @app.route('/large')
+        def large():
+            return jsonify({'data': self.rows})
+        
+        @app.route('/small')
+        def small():
+            return jsonify({'status': 'healthy'})
+        
+        @app.route('/stream')
+        def stream():
+            def generate():
+                for row in self.rows:
+                    yield json.dumps(row) + '\n'
+            return Response(generate(), mimetype='application/x-ndjson')
+        
+        self.client = app.test_client()
+    
+    def test_choose_encoding(self):
+        """Test Accept-Encoding negotiation"""
+        self.assertEqual(choose_encoding('gzip, deflate', ('gzip', 'deflate')), 'gzip')
+        self.assertEqual(choose_encoding('gzip;q=0.5, deflate', ('gzip', 'deflate')), 'deflate')
+        self.assertEqual(choose_encoding('*', ('gzip', 'deflate')), 'gzip')
+        self.assertIsNone(choose_encoding('identity', ('gzip', 'deflate')))
+        self.assertIsNone(choose_encoding('gzip;q=0', ('gzip', 'deflate')))
+    
+    def test_large_response_is_gzipped(self):
+        """Test large JSON bodies are compressed"""
+        response = self.client.get('/large', headers={'Accept-Encoding': 'gzip'})
+        
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        body = zlib.decompress(response.get_data(), 16 + zlib.MAX_WBITS)
+        self.assertEqual(json.loads(body)['data'], self.rows)
+    
+    def test_small_response_is_not_compressed(self):
+        """Test bodies under the size threshold are sent as-is"""
+        response = self.client.get('/small', headers={'Accept-Encoding': 'gzip'})
+        
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.get_json()['status'], 'healthy')
+    
+    def test_no_accept_encoding(self):
+        """Test clients without Accept-Encoding get identity bodies"""
+        response = self.client.get('/large')
+        
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.get_json()['data'], self.rows)
+    
+    def test_streamed_response_is_deflated(self):
+        """Test streamed bodies are compressed incrementally"""
+        response = self.client.get('/stream', headers={'Accept-Encoding': 'deflate'})
+        
+        self.assertEqual(response.headers['Content-Encoding'], 'deflate')
+        self.assertNotIn('Content-Length', response.headers)
+        lines = zlib.decompress(response.get_data()).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.rows)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Test deterministic synthetic dataset generation
+"""
+
+import unittest
+from flask import Flask
+from app.models import db, User, Account, PhoneLink, SinpeSubscription, Transaction, LedgerEntry, BalanceCheckpoint
+from app.services.dataset_generator import DatasetGenerator
+from app.utils.iban_generator import validate_ibans
+from config.settings import PHONE_NUMBER_LENGTH, PHONE_NUMBER_PREFIX
+
+TABLES = (User, Account, PhoneLink, SinpeSubscription, Transaction, LedgerEntry, BalanceCheckpoint)
+
+def generate(seed: int) -> tuple:
+    """Generate a small dataset into a fresh in-memory database and return every row"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        counts = DatasetGenerator(users=50, transactions=400, external_subscriptions=10,
+                                  seed=seed, batch_size=64).generate()
+        rows = {
+            model.__tablename__: [
+                {column.key: getattr(row, column.key) for column in model.__mapper__.column_attrs}
+                for row in model.query.order_by(*model.__table__.primary_key.columns)
+            ]
+            for model in TABLES
+        }
+        db.drop_all()
+    return counts, rows
+
+class TestDatasetGenerator(unittest.TestCase):
+    
+    def test_same_seed_same_dataset(self):
+        """Test two runs with the same seed on empty databases produce identical rows"""
+        first_counts, first = generate(7)
+        second_counts, second = generate(7)
+        
+        self.assertEqual(first_counts, second_counts)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first['transactions'], generate(8)[1]['transactions'])
+    
+    def test_numbers_are_valid_and_unique(self):
+        """Test generated IBANs and phone numbers are well formed and never repeated"""
+        counts, rows = generate(7)
+        numbers = [account['number'] for account in rows['accounts']]
+        phones = [user['phone'] for user in rows['users']]
+        sinpe_numbers = [subscription['sinpe_number'] for subscription in rows['sinpe_subscription']]
+        
+        self.assertEqual(len(numbers), counts['accounts'])
+        self.assertTrue(all(validate_ibans(numbers)))
+        self.assertEqual(len(set(numbers)), len(numbers))
+        for phone in phones + sinpe_numbers:
+            self.assertEqual(len(phone), PHONE_NUMBER_LENGTH)
+            self.assertTrue(phone.isdigit() and phone[0] in PHONE_NUMBER_PREFIX)
+        self.assertEqual(len(set(phones)), len(phones))
+        self.assertEqual(len(set(sinpe_numbers)), len(sinpe_numbers))
+
+    def test_entities_inserted_in_batches(self):
+        """Test users and derived rows are committed in batches of at most batch_size"""
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(app)
+        batches = []
+        with app.app_context():
+            db.create_all()
+            counts = DatasetGenerator(users=50, transactions=0, external_subscriptions=10,
+                                      seed=7, batch_size=8).generate(lambda table, rows: batches.append((table, rows)))
+            self.assertEqual(User.query.count(), 50)
+            self.assertEqual(SinpeSubscription.query.count(), counts['sinpe_subscriptions'])
+            db.drop_all()
+
+        self.assertTrue(all(rows <= 8 for _, rows in batches))
+        self.assertGreater(len([table for table, _ in batches if table == 'users']), 1)
+        self.assertEqual(sum(rows for table, rows in batches if table == 'accounts'), counts['accounts'])
+
+if __name__ == '__main__':
+    unittest.main()
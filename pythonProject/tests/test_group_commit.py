@@ -0,0 +1,114 @@
+"""
+Test group commit of concurrent transfers
+"""
+
+import threading
+import unittest
+from concurrent.futures import Future
+from decimal import Decimal
+from unittest import mock
+from flask import Flask
+from sqlalchemy import event
+from app.models import db, Account, LedgerEntry
+from app.services.group_commit import GroupCommitter
+from app.services.ledger_service import LedgerService
+from app.services.transfer_executor import run_serialized
+
+class TestGroupCommit(unittest.TestCase):
+    
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.create_all()
+            db.session.add_all([
+                Account(number='CR01', currency='CRC', balance=Decimal('1000.00')),
+                Account(number='CR02', currency='CRC', balance=Decimal('0.00'))
+            ])
+            db.session.commit()
+        self.committer = GroupCommitter(self.app, window=0.2)
+        self.app.extensions['group_committer'] = self.committer
+    
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+    
+    def transfer(self, n: int, amount: str):
+        sender = Account.query.filter_by(number='CR01').one()
+        receiver = Account.query.filter_by(number='CR02').one()
+        LedgerService.post_transfer(f'tx-{n}', sender, receiver, Decimal(amount))
+        if sender.balance < 0:
+            raise ValueError('Fondos insuficientes')
+        GroupCommitter.commit()
+        return n
+    
+    def test_concurrent_transfers_share_one_commit(self):
+        """Test transfers submitted together are committed once, failures only undo their own work"""
+        commits = []
+        with self.app.app_context():
+            event.listen(db.engine, 'commit', lambda conn: commits.append(1))
+        
+        futures = [self.committer.submit(self.transfer, n, amount)
+                   for n, amount in enumerate(['100.00', '5000.00', '200.00'])]
+        
+        self.assertEqual(futures[0].result(5), 0)
+        with self.assertRaises(ValueError):
+            futures[1].result(5)
+        self.assertEqual(futures[2].result(5), 2)
+        self.assertEqual(len(commits), 1)
+        
+        with self.app.app_context():
+            self.assertEqual(Account.query.filter_by(number='CR02').one().balance, Decimal('300.00'))
+            self.assertEqual(LedgerEntry.query.filter_by(transaction_id='tx-1').count(), 0)
+    
+    def test_failed_commit_fails_the_group(self):
+        """Test no caller gets a result when the shared commit fails"""
+        with mock.patch.object(db.session, 'commit', side_effect=RuntimeError('disk I/O error')):
+            future = self.committer.submit(self.transfer, 1, '100.00')
+            with self.assertRaises(RuntimeError):
+                future.result(5)
+    
+    def test_error_outside_a_transfer_fails_the_rest_of_the_group(self):
+        """Test transfers not reached yet fail too instead of waiting forever"""
+        def fail():
+            raise ValueError('Fondos insuficientes')
+        
+        savepoint = mock.Mock(is_active=True)
+        savepoint.rollback.side_effect = RuntimeError('database is locked')
+        batch = [(Future(), None, fail, (), {}), (Future(), None, self.transfer, (2, '100.00'), {})]
+        with mock.patch.object(db.session, 'begin_nested', return_value=savepoint):
+            self.committer._apply(batch)
+        
+        for future, _, _, _, _ in batch:
+            with self.assertRaisesRegex(RuntimeError, 'database is locked'):
+                future.result(0)
+    
+    def test_failed_savepoint_fails_only_its_transfer(self):
+        """Test a savepoint that cannot be opened fails its own transfer only"""
+        begin_nested = db.session.begin_nested
+        calls = []
+        
+        def flaky():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError('database is locked')
+            return begin_nested()
+        
+        batch = [(Future(), None, self.transfer, (n, '100.00'), {}) for n in range(2)]
+        with mock.patch.object(db.session, 'begin_nested', side_effect=flaky):
+            self.committer._apply(batch)
+        
+        with self.assertRaises(RuntimeError):
+            batch[0][0].result(0)
+        self.assertEqual(batch[1][0].result(0), 1)
+    
+    def test_run_serialized_uses_committer(self):
+        """Test transfers are routed to the committer when group commit is enabled"""
+        with self.app.app_context():
+            thread = run_serialized('CR01', threading.current_thread)
+        self.assertEqual(thread.name, 'group-committer')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Test IBAN check digits, batch validation and block allocation
+"""
+
+import os
+import tempfile
+import unittest
+from flask import Flask
+from app.models import db, Account
+from app.services.account_number_service import AccountNumberService
+from app.utils.iban_generator import build_iban, compute_check_digits, validate_iban, validate_ibans
+
+class TestIBANCheckDigits(unittest.TestCase):
+    
+    def test_known_iban(self):
+        """Test check digits against a published Costa Rican IBAN"""
+        self.assertEqual(compute_check_digits('015202001026284066'), '05')
+    
+    def test_build_iban_round_trip(self):
+        """Test built IBANs validate and keep the bank layout"""
+        iban = build_iban(42)
+        
+        self.assertEqual(len(iban), 24)
+        self.assertEqual(iban[4:12], '06660001')
+        self.assertTrue(iban.endswith('000000000042'))
+        self.assertTrue(validate_iban(iban))
+    
+    def test_validate_ibans_batch(self):
+        """Test batch validation flags bad checksums and malformed rows"""
+        good = build_iban(7)
+        tampered = good[:-1] + ('8' if good[-1] != '8' else '9')
+        
+        self.assertEqual(
+            validate_ibans([good, tampered, 'CR21', '', None, good.lower()]),
+            [True, False, False, False, False, False]
+        )
+
+class TestAccountNumberAllocation(unittest.TestCase):
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{self.db_path}'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        os.remove(self.db_path)
+    
+    def test_blocks_do_not_overlap(self):
+        """Test consecutive blocks hand out distinct numbers"""
+        first = AccountNumberService.allocate_ibans(1000)
+        second = AccountNumberService.allocate_ibans(10)
+        
+        self.assertEqual(len(set(first + second)), 1010)
+        self.assertTrue(all(validate_ibans(first + second)))
+    
+    def test_sequence_starts_after_existing_ibans(self):
+        """Test the sequence is seeded past numbers already issued"""
+        db.session.add(Account(number=build_iban(500), currency='CRC'))
+        db.session.commit()
+        
+        self.assertEqual(AccountNumberService.allocate_ibans(1), [build_iban(501)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Test bulk customer import
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+from flask import Flask
+from app.models import db, User, Account, UserAccount, PhoneLink
+from app.routes.import_routes import import_bp
+from app.services.import_service import ImportService
+
+CSV_DATA = """name,email,phone,password,account_number,currency,balance,sinpe_phone
+ana,ana@example.com,88881111,secret,,CRC,1500.50,88881111
+luis,luis@example.com,88882222,secret,,USD,20,
+ana,other@example.com,88883333,secret,,CRC,0,
+bad,bad@example.com,123,secret,,CRC,0,
+"""
+
+class TestImport(unittest.TestCase):
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{self.db_path}'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        os.remove(self.db_path)
+    
+    def test_csv_import(self):
+        """Test valid rows are imported with links and invalid rows reported"""
+        progress = []
+        report = ImportService.import_records(
+            ImportService.parse_records(io.StringIO(CSV_DATA), 'csv'),
+            chunk_size=2,
+            progress=lambda r: progress.append(r['processed'])
+        )
+        
+        self.assertEqual(report['imported'], 2)
+        self.assertEqual(report['failed'], 2)
+        self.assertEqual(progress, [2, 4])
+        self.assertEqual(sorted(e['line'] for e in report['errors']), [4, 5])
+        
+        self.assertEqual(User.query.count(), 2)
+        self.assertEqual(UserAccount.query.count(), 2)
+        link = PhoneLink.query.one()
+        self.assertEqual(link.phone, '88881111')
+        account = Account.query.filter_by(number=link.account_number).one()
+        self.assertEqual(float(account.balance), 1500.50)
+    
+    def test_failed_chunk_can_be_retried(self):
+        """Test rows of a chunk that failed to commit are not reported as duplicates when retried"""
+        rows = list(ImportService.parse_records(io.StringIO(CSV_DATA), 'csv'))[:2]
+        commit = db.session.commit
+        calls = []
+
+        def failing_first_commit():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError('disk I/O error')
+            commit()
+
+        with mock.patch.object(db.session, 'commit', side_effect=failing_first_commit):
+            report = ImportService.import_records(rows + rows, chunk_size=2)
+
+        self.assertEqual(report['imported'], 2)
+        self.assertEqual(report['failed'], 2)
+        self.assertTrue(all('Chunk insert failed' in e['error'] for e in report['errors']))
+        self.assertEqual(User.query.count(), 2)
+
+    def test_ndjson_parse_errors(self):
+        """Test malformed NDJSON lines are reported, not fatal"""
+        records = list(ImportService.parse_records(io.StringIO('{"name": "x"}\n\nnot json\n'), 'ndjson'))
+        
+        self.assertEqual(records[0], (1, {'name': 'x'}))
+        self.assertEqual(records[1][0], 3)
+        self.assertIn('__error__', records[1][1])
+    
+    def test_endpoint_requires_admin(self):
+        """Test remote callers without the admin token cannot import"""
+        self.app.config['ADMIN_TOKEN'] = 'secret'
+        self.app.register_blueprint(import_bp, url_prefix='/api')
+        client = self.app.test_client()
+        remote = {'REMOTE_ADDR': '10.0.0.5'}
+        
+        response = client.post('/api/import/customers?format=csv', data=CSV_DATA, environ_base=remote)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(User.query.count(), 0)
+        
+        response = client.post('/api/import/customers?format=csv', data=CSV_DATA, environ_base=remote,
+                               headers={'X-Admin-Token': 'secret'})
+        self.assertEqual(response.status_code, 201)
+
+if __name__ == '__main__':
+    unittest.main()
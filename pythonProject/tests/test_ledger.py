@@ -0,0 +1,150 @@
+"""
+Test ledger postings, checkpoints and derived balances
+"""
+
+import unittest
+from unittest import mock
+from datetime import datetime, date
+from decimal import Decimal
+from flask import Flask
+from sqlalchemy import event
+from app.models import db, Account, LedgerEntry, BalanceCheckpoint, DailyBalance, HotAccount
+from app.services.ledger_service import LedgerService
+
+class TestLedger(unittest.TestCase):
+    
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        
+        opened = datetime(2024, 1, 1)
+        self.sender = Account(number='CR01', currency='CRC', balance=Decimal('1000.00'), created_at=opened)
+        self.receiver = Account(number='CR02', currency='CRC', balance=Decimal('0.00'), created_at=opened)
+        db.session.add_all([self.sender, self.receiver])
+        db.session.commit()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+    
+    def test_transfer_posts_balanced_legs(self):
+        """Test a transfer appends one debit and one credit"""
+        LedgerService.post_transfer('tx-1', self.sender, self.receiver, Decimal('250.00'))
+        db.session.commit()
+        
+        entries = LedgerEntry.query.filter_by(transaction_id='tx-1').all()
+        self.assertEqual(sorted(e.direction for e in entries), ['credit', 'debit'])
+        self.assertEqual(self.sender.balance, Decimal('750.00'))
+        self.assertEqual(self.receiver.balance, Decimal('250.00'))
+    
+    def test_external_side_uses_clearing_leg(self):
+        """Test missing accounts are booked against the clearing leg"""
+        LedgerService.post_transfer('tx-ext', self.sender, None, Decimal('100.00'))
+        db.session.commit()
+        
+        clearing = LedgerEntry.query.filter_by(transaction_id='tx-ext', account_id=None).one()
+        self.assertEqual(clearing.direction, 'credit')
+        self.assertEqual(self.sender.balance, Decimal('900.00'))
+    
+    def test_adjustment(self):
+        """Test balance adjustments are booked as entries"""
+        LedgerService.post_adjustment(self.sender, Decimal('1500.00'))
+        db.session.commit()
+        
+        self.assertEqual(self.sender.balance, Decimal('1500.00'))
+        self.assertEqual(self.sender.opening_balance, Decimal('1000.00'))
+    
+    def test_checkpoints_do_not_change_balances(self):
+        """Test checkpointed and batch balances match the full replay"""
+        for i in range(7):
+            LedgerService.post_transfer(f'tx-{i}', self.sender, self.receiver, Decimal('10.00'))
+            LedgerService.checkpoint_if_due([self.sender.id, self.receiver.id], interval=3)
+        db.session.commit()
+        
+        self.assertGreater(BalanceCheckpoint.query.count(), 0)
+        self.assertEqual(self.sender.balance, Decimal('930.00'))
+        balances = LedgerService.get_balances([self.sender, self.receiver])
+        self.assertEqual(balances[self.sender.id], Decimal('930.00'))
+        self.assertEqual(balances[self.receiver.id], Decimal('70.00'))
+    
+    def _transfer_at(self, transaction_id, amount, created_at):
+        for entry in LedgerService.post_transfer(transaction_id, self.sender, self.receiver, Decimal(amount)):
+            entry.created_at = created_at
+        db.session.commit()
+    
+    def test_point_in_time_balance_with_snapshots(self):
+        """Test as_of balances with and without end-of-day snapshots"""
+        self._transfer_at('tx-d1', '100.00', datetime(2024, 3, 1, 10, 0))
+        self._transfer_at('tx-d2a', '50.00', datetime(2024, 3, 2, 9, 0))
+        self._transfer_at('tx-d2b', '25.00', datetime(2024, 3, 2, 18, 0))
+        
+        before = LedgerService.get_balance(self.sender, datetime(2024, 3, 2, 12, 0))
+        
+        self.assertEqual(LedgerService.snapshot_end_of_day(date(2024, 3, 1)), 2)
+        self.assertEqual(LedgerService.snapshot_end_of_day(date(2024, 3, 1)), 0)
+        closing = DailyBalance.query.filter_by(account_id=self.sender.id).one()
+        self.assertEqual(closing.closing_balance, Decimal('900.00'))
+        
+        after = LedgerService.get_balance(self.sender, datetime(2024, 3, 2, 12, 0))
+        self.assertEqual(before, Decimal('850.00'))
+        self.assertEqual(after, before)
+        self.assertEqual(LedgerService.get_balance(self.receiver, datetime(2024, 3, 3)), Decimal('175.00'))
+        self.assertEqual(LedgerService.get_balance(self.sender, datetime(2023, 12, 31)), Decimal('0.00'))
+        
+        LedgerService.snapshot_end_of_day(date(2024, 3, 2))
+        closing = DailyBalance.query.filter_by(account_id=self.sender.id, business_date=date(2024, 3, 2)).one()
+        self.assertEqual(closing.closing_balance, Decimal('825.00'))
+    
+    def test_hot_account_checkpoints_on_consolidation(self):
+        """Test hot accounts skip per-transfer checkpoints until consolidated"""
+        LedgerService.set_hot(self.receiver)
+        with mock.patch('app.services.ledger_service.CHECKPOINT_INTERVAL', 1):
+            for n in range(5):
+                LedgerService.post_transfer(f'tx-hot-{n}', self.sender, self.receiver, Decimal('10.00'))
+        db.session.commit()
+        
+        self.assertEqual(BalanceCheckpoint.query.filter_by(account_id=self.sender.id).count(), 5)
+        self.assertEqual(BalanceCheckpoint.query.filter_by(account_id=self.receiver.id).count(), 0)
+        self.assertEqual(self.receiver.balance, Decimal('50.00'))
+        
+        self.assertEqual(LedgerService.consolidate(), 1)
+        checkpoint = BalanceCheckpoint.query.filter_by(account_id=self.receiver.id).one()
+        self.assertEqual(checkpoint.balance, Decimal('50.00'))
+        self.assertEqual(LedgerService.consolidate(), 0)
+        self.assertEqual(self.receiver.to_dict()['balance'], 50.0)
+        
+        LedgerService.set_hot(self.receiver, False)
+        self.assertIsNone(db.session.get(HotAccount, self.receiver.id))
+    
+    def test_postings_read_cached_hot_accounts(self):
+        """Test transfers do not query hot_accounts; set_hot and consolidation refresh the cache"""
+        LedgerService.set_hot(self.receiver)
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            LedgerService.post_transfer('tx-cached', self.sender, self.receiver, Decimal('10.00'))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertFalse([s for s in statements if 'hot_accounts' in s])
+        self.assertEqual(LedgerService.cached_hot_account_ids(), {self.receiver.id})
+        
+        # Marked hot elsewhere (e.g. by hot_accounts.py in another process)
+        db.session.add(HotAccount(account_id=self.sender.id))
+        db.session.commit()
+        self.assertEqual(LedgerService.cached_hot_account_ids(), {self.receiver.id})
+        LedgerService.consolidate()
+        self.assertEqual(LedgerService.cached_hot_account_ids(), {self.sender.id, self.receiver.id})
+    
+    def test_persisted_balance_is_read_only(self):
+        """Test balances cannot be overwritten in place"""
+        with self.assertRaises(AttributeError):
+            self.sender.balance = Decimal('5.00')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Test in-memory operational metrics and the admin metrics endpoint
+"""
+
+import unittest
+from unittest import mock
+from flask import Flask
+from app.routes.admin_routes import admin_bp
+from app.services.metrics_service import MetricsService
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        MetricsService.reset()
+        app = Flask(__name__)
+        app.register_blueprint(admin_bp, url_prefix='/api')
+        self.client = app.test_client()
+
+    def tearDown(self):
+        MetricsService.reset()
+
+    def test_snapshot_returns_only_new_completed_seconds(self):
+        """Test delta fetches skip seconds already received and the open second"""
+        with mock.patch('app.services.metrics_service.time.time', return_value=1000.5):
+            MetricsService.record_request(3, 200)
+        with mock.patch('app.services.metrics_service.time.time', return_value=1001.2):
+            MetricsService.record_request(40, 500)
+            MetricsService.record_request(900, 200)
+
+        with mock.patch('app.services.metrics_service.time.time', return_value=1001.9):
+            self.assertEqual([b['ts'] for b in MetricsService.snapshot()['buckets']], [1000])
+        with mock.patch('app.services.metrics_service.time.time', return_value=1002.1):
+            buckets = MetricsService.snapshot(since=1000)['buckets']
+
+        self.assertEqual([b['ts'] for b in buckets], [1001])
+        summary = MetricsService.summarize(buckets, seconds=1)
+        self.assertEqual(summary['tps'], 2)
+        self.assertEqual(summary['error_rate'], 0.5)
+        self.assertEqual(summary['p50_ms'], 50)
+        self.assertEqual(summary['p99_ms'], 1000)
+
+    def test_peer_health(self):
+        """Test peer calls raising an exception count as failures"""
+        with self.assertRaises(ConnectionError):
+            with MetricsService.peer_call('0152'):
+                raise ConnectionError()
+        with MetricsService.peer_call('0152'):
+            pass
+
+        peer = MetricsService.snapshot()['peers']['0152']
+        self.assertEqual((peer['calls'], peer['failures'], peer['consecutive_failures']), (2, 1, 0))
+
+    def test_endpoint_requires_local_caller(self):
+        """Test remote callers without an admin token are rejected"""
+        self.assertEqual(self.client.get('/api/admin/metrics').status_code, 200)
+        remote = self.client.get('/api/admin/metrics', environ_base={'REMOTE_ADDR': '10.0.0.5'})
+        self.assertEqual(remote.status_code, 403)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Test the memory-mapped Bloom filter of known SINPE numbers
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from flask import Flask
+from app.models import db, SinpeSubscription
+from app.services.phone_filter import PhoneFilter
+from app.utils.bloom_filter import BloomFilter, FLAG_COMPLETE
+
+class TestBloomFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'phones.bloom')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_membership(self):
+        """Test every added number is found and most others are not"""
+        numbers = [f'8{n:07d}' for n in range(5000)]
+        bloom = BloomFilter.build(self.path, iter(numbers), len(numbers), fp_rate=0.01)
+
+        self.assertTrue(all(number in bloom for number in numbers))
+        false_positives = sum(f'6{n:07d}' in bloom for n in range(5000))
+        self.assertLess(false_positives, 150)
+
+    def test_shared_between_instances(self):
+        """Test in-place adds and rebuilds are seen by other mappings of the file"""
+        writer = BloomFilter.build(self.path, iter(['88887777']), 100)
+        reader = BloomFilter(self.path, check_interval=0)
+
+        writer.add('71111111')
+        self.assertIn('71111111', reader)
+
+        BloomFilter.build(self.path, iter(['72222222']), 100, flags=FLAG_COMPLETE)
+        self.assertNotIn('88887777', reader)
+        self.assertEqual(reader.flags, FLAG_COMPLETE)
+
+    def test_missing_file_rejects_nothing(self):
+        """Test a filter that was never built answers 'maybe' for everything"""
+        self.assertIn('88887777', BloomFilter(self.path))
+
+class TestPhoneFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['PHONE_FILTER_PATH'] = os.path.join(self.tmp, 'phones.bloom')
+        db.init_app(self.app)
+        PhoneFilter.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        db.session.add(SinpeSubscription(sinpe_number='88887777', sinpe_bank_code='0666', sinpe_client_name='Local User'))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.tmp)
+
+    def test_only_trusted_when_complete(self):
+        """Test numbers are rejected only by a filter built from a complete mirror"""
+        PhoneFilter.rebuild()
+        self.assertFalse(PhoneFilter.definitely_unregistered('60000000'))
+
+        BloomFilter.build(self.app.config['PHONE_FILTER_PATH'], iter(['88887777']), 10, flags=FLAG_COMPLETE)
+        PhoneFilter._filters.clear()
+        self.assertTrue(PhoneFilter.definitely_unregistered('60000000'))
+        self.assertFalse(PhoneFilter.definitely_unregistered('88887777'))
+
+        # New local subscriptions are accepted straight away
+        db.session.add(SinpeSubscription(sinpe_number='60000000', sinpe_bank_code='0666', sinpe_client_name='New User'))
+        db.session.commit()
+        self.assertFalse(PhoneFilter.definitely_unregistered('60000000'))
+
+if __name__ == '__main__':
+    unittest.main()
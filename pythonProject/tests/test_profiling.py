@@ -0,0 +1,103 @@
+"""
+Test on-demand request profiling and the admin profiles endpoints
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from flask import Blueprint, Flask, jsonify
+from app.middleware.profiling import init_profiling
+from app.middleware.tracing import init_tracing
+from app.routes.admin_routes import admin_bp
+from app.services.profiler import Profiler
+from app.services.tracing import Tracer
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+
+def busy_handler_work():
+    deadline = time.perf_counter() + 0.03
+    while time.perf_counter() < deadline:
+        sum(range(100))
+
+class TestProfiling(unittest.TestCase):
+    
+    def setUp(self):
+        Profiler.reset()
+        self.tmp = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['PROFILE_DIR'] = self.tmp
+        self.app.config['ADMIN_TOKEN'] = 'secret'
+        init_profiling(self.app)
+        
+        work_bp = Blueprint('work', __name__)
+        
+        @work_bp.route('/work')
+        def work():
+            busy_handler_work()
+            return jsonify({'ok': True})
+        
+        self.app.register_blueprint(work_bp, url_prefix='/api')
+        self.app.register_blueprint(admin_bp, url_prefix='/api')
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        Tracer.configure(None)
+        Profiler.configure(None)
+        Profiler.reset()
+        shutil.rmtree(self.tmp)
+    
+    def test_unflagged_and_non_admin_requests_are_not_profiled(self):
+        """Test the flag is ignored for remote callers without the admin token"""
+        self.assertNotIn('X-Profile-Id', self.client.get('/api/work').headers)
+        remote = self.client.get('/api/work?profile=1', environ_base={'REMOTE_ADDR': '10.0.0.5'})
+        self.assertNotIn('X-Profile-Id', remote.headers)
+        
+        admin = self.client.get('/api/work?profile=1', headers={'X-Admin-Token': 'secret'},
+                                environ_base={'REMOTE_ADDR': '10.0.0.5'})
+        self.assertIn('X-Profile-Id', admin.headers)
+    
+    def test_cprofile_request_is_stored_and_aggregated(self):
+        """Test a deterministic profile is saved as pstats and its functions aggregated"""
+        profile_id = self.client.get('/api/work', headers={'X-Profile': '1'}).headers['X-Profile-Id']
+        
+        data = self.client.get('/api/admin/profiles?limit=500').get_json()
+        self.assertEqual(data['requests'], 1)
+        self.assertEqual(data['profiles'][0]['mode'], 'cprofile')
+        self.assertEqual(data['profiles'][0]['request'], 'GET /api/work')
+        hot = next(f for f in data['functions'] if 'busy_handler_work' in f['function'])
+        self.assertEqual(hot['calls'], 1)
+        self.assertGreater(hot['total_ms'], 20)
+        
+        download = self.client.get(f'/api/admin/profiles/{profile_id}')
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp, f'{profile_id}.pstats')))
+        self.assertEqual(self.client.get('/api/admin/profiles/../../etc').status_code, 404)
+    
+    def test_sampled_request_exports_speedscope(self):
+        """Test the stack sampler writes a speedscope profile containing the handler"""
+        profile_id = self.client.get('/api/work?profile=sample').headers['X-Profile-Id']
+        
+        with open(os.path.join(self.tmp, f'{profile_id}.speedscope.json')) as f:
+            speedscope = json.load(f)
+        names = {frame['name'] for frame in speedscope['shared']['frames']}
+        self.assertIn('busy_handler_work', names)
+        profile = speedscope['profiles'][0]
+        self.assertEqual(len(profile['samples']), len(profile['weights']))
+    
+    def test_requests_of_one_trace_keep_their_own_profiles(self):
+        """Test two requests sharing a client-supplied trace id get separate profiles"""
+        init_tracing(self.app)
+        headers = {'X-Profile': 'sample', 'traceparent': f'00-{TRACE_ID}-00f067aa0ba902b7-00'}
+        ids = [self.client.get('/api/work', headers=headers).headers['X-Profile-Id'] for _ in range(2)]
+        
+        self.assertNotEqual(ids[0], ids[1])
+        profiles = self.client.get('/api/admin/profiles').get_json()['profiles']
+        self.assertEqual([p['trace_id'] for p in profiles if p['id'] in ids], [TRACE_ID, TRACE_ID])
+        for profile_id in ids:
+            self.assertTrue(os.path.exists(os.path.join(self.tmp, f'{profile_id}.speedscope.json')))
+
+if __name__ == '__main__':
+    unittest.main()
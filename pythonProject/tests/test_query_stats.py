@@ -0,0 +1,69 @@
+"""
+Test SQL fingerprinting, slow-query capture and the admin queries endpoint
+"""
+
+import unittest
+from flask import Flask
+from app.models import db, Account
+from app.middleware.query_log import init_query_log
+from app.routes.admin_routes import admin_bp
+from app.services.query_stats import QueryStats, fingerprint
+
+class TestQueryStats(unittest.TestCase):
+    
+    def setUp(self):
+        QueryStats.reset()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['SLOW_QUERY_MS'] = 1000
+        db.init_app(self.app)
+        init_query_log(self.app)
+        self.app.register_blueprint(admin_bp, url_prefix='/api')
+        with self.app.app_context():
+            db.create_all()
+    
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+        QueryStats.configure()
+        QueryStats.reset()
+    
+    def test_fingerprint(self):
+        """Test literals, placeholders and lists normalize to one fingerprint"""
+        self.assertEqual(
+            fingerprint("SELECT * FROM accounts WHERE account_number = 'CR01'  AND id IN (1, 2, 3)"),
+            fingerprint("SELECT * FROM accounts\n WHERE account_number = ? AND id IN (?, ?)")
+        )
+        self.assertEqual(fingerprint("SELECT t1.id FROM t1 LIMIT :param_1"), "SELECT t1.id FROM t1 LIMIT ?")
+        self.assertEqual(fingerprint("INSERT INTO t VALUES (?, ?), (?, ?)"), "INSERT INTO t VALUES (...)")
+    
+    def test_statements_are_aggregated(self):
+        """Test repeated lookups count under one fingerprint without being marked slow"""
+        with self.app.app_context():
+            for number in ('CR01', 'CR02', 'CR03'):
+                Account.query.filter_by(number=number).first()
+        
+        queries = QueryStats.snapshot(sort='calls')['queries']
+        lookup = next(q for q in queries if 'accounts.number = ?' in q['fingerprint'])
+        self.assertEqual(lookup['calls'], 3)
+        self.assertEqual(lookup['slow_calls'], 0)
+        self.assertIsNone(lookup['plan'])
+    
+    def test_slow_statement_plan_is_captured(self):
+        """Test statements over the threshold keep a sample and their EXPLAIN QUERY PLAN"""
+        QueryStats.configure(threshold_ms=0)
+        with self.app.app_context():
+            Account.query.filter_by(number='CR01').first()
+        
+        data = self.app.test_client().get('/api/admin/queries?sort=slow').get_json()
+        lookup = next(q for q in data['queries'] if 'accounts.number = ?' in q['fingerprint'])
+        self.assertEqual(lookup['slow_calls'], 1)
+        self.assertIn("'CR01'", lookup['slowest']['parameters'])
+        self.assertTrue(any('accounts' in line for line in lookup['plan']))
+        self.assertEqual(data['recent_slow'][0]['id'], data['queries'][0]['id'])
+        
+        self.app.test_client().delete('/api/admin/queries')
+        self.assertEqual(QueryStats.snapshot()['fingerprints'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
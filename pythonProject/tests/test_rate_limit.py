@@ -0,0 +1,109 @@
+"""
+Test token-bucket rate limiting
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from flask import Flask, Blueprint, jsonify
+from app.middleware.rate_limit import MemoryStore, SQLiteStore, init_rate_limit, parse_limit
+from app.services.bank_registry import BankRegistry
+from app.utils.hmac_generator import generate_hmac
+
+BANKS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'banks.json')
+
+class TestRateLimit(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def make_app(self, **config):
+        app = Flask(__name__)
+        app.config['SECRET_KEY'] = 'test'
+        app.config['RATE_LIMITS'] = {
+            'sinpe.validate': '2/minute', 'sinpe.validate_bulk': '1/minute', 'sinpe': '100/second'
+        }
+        app.config.update(config)
+        app.extensions['bank_registry'] = BankRegistry(BANKS_PATH)
+        init_rate_limit(app)
+        
+        sinpe_bp = Blueprint('sinpe', __name__)
+        
+        @sinpe_bp.route('/validate/<phone>')
+        def validate(phone):
+            return jsonify({'phone': phone})
+        
+        @sinpe_bp.route('/validate', methods=['POST'])
+        def validate_bulk():
+            return jsonify({})
+        
+        @sinpe_bp.route('/other')
+        def other():
+            return jsonify({})
+        
+        app.register_blueprint(sinpe_bp, url_prefix='/api')
+        return app
+    
+    def test_parse_limit(self):
+        """Test limits parse to capacity and refill rate"""
+        self.assertEqual(parse_limit('60/minute'), (60, 1.0))
+        with self.assertRaises(ValueError):
+            parse_limit('ten/minute')
+    
+    def test_bucket_refills(self):
+        """Test a drained bucket grants a token again after 1/rate seconds"""
+        store = MemoryStore()
+        self.assertEqual(store.take('k', 2, 1.0, now=100.0), 0)
+        self.assertEqual(store.take('k', 2, 1.0, now=100.0), 0)
+        self.assertAlmostEqual(store.take('k', 2, 1.0, now=100.0), 1.0)
+        self.assertEqual(store.take('k', 2, 1.0, now=101.0), 0)
+    
+    def test_endpoint_limit_returns_429(self):
+        """Test requests over the endpoint limit get 429 with Retry-After, per client"""
+        client = self.make_app().test_client()
+        for _ in range(2):
+            self.assertEqual(client.get('/api/validate/88887777').status_code, 200)
+        
+        response = client.get('/api/validate/88887777')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '30')
+        
+        # Other endpoints and other clients have their own buckets
+        self.assertEqual(client.get('/api/other').status_code, 200)
+        other = client.get('/api/validate/88887777', environ_base={'REMOTE_ADDR': '10.0.0.2'})
+        self.assertEqual(other.status_code, 200)
+    
+    def test_peer_bank_bucket_requires_signature(self):
+        """Test X-Bank-Code only selects the bank's bucket for a transfer signed by that bank"""
+        client = self.make_app().test_client()
+        headers = {'X-Bank-Code': '0152'}
+        transfer = {
+            'timestamp': '2024-01-01T10:00:00', 'transaction_id': 'tx-1',
+            'sender': {'account_number': 'CR01', 'bank_code': '152'},
+            'amount': {'value': 100.0, 'currency': 'CRC'}
+        }
+        transfer['hmac_md5'] = generate_hmac('CR01', transfer['timestamp'], 'tx-1', 100.0)
+        
+        # Unsigned requests claiming the bank count against the caller's IP
+        self.assertEqual(client.post('/api/validate', json={}, headers=headers).status_code, 200)
+        self.assertEqual(client.post('/api/validate', json={}, headers=headers).status_code, 429)
+        forged = dict(transfer, hmac_md5='0' * 32)
+        self.assertEqual(client.post('/api/validate', json=forged, headers=headers).status_code, 429)
+        
+        # A signed transfer from the bank has the bank's own bucket
+        self.assertEqual(client.post('/api/validate', json=transfer, headers=headers).status_code, 200)
+        self.assertEqual(client.post('/api/validate', json=transfer, headers=headers).status_code, 429)
+    
+    def test_sqlite_store_is_shared(self):
+        """Test buckets in the SQLite store are shared between store instances (processes)"""
+        path = os.path.join(self.tmp, 'limits.db')
+        first, second = SQLiteStore(path), SQLiteStore(path)
+        self.assertEqual(first.take('k', 1, 0.1, now=100.0), 0)
+        self.assertAlmostEqual(second.take('k', 1, 0.1, now=100.0), 10.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Test routing of read-only requests to the read engine
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from decimal import Decimal
+from flask import Flask
+from app.models import db, Account, User, UserAccount
+from app.routes.account_routes import account_bp
+from app.routes.sinpe_routes import sinpe_bp
+from app.middleware.read_routing import init_read_routing
+from app.services.bank_registry import BankRegistry
+from app.services.transfer_executor import TransferExecutor
+from app.utils.hmac_generator import generate_hmac
+
+BANKS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'banks.json')
+
+class TestReadRouting(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp, 'bank.db')}"
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.create_all()
+        init_read_routing(self.app)
+        self.app.register_blueprint(account_bp, url_prefix='/api')
+        self.app.register_blueprint(sinpe_bp, url_prefix='/api')
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        self.app.extensions['db_reader'].dispose()
+        shutil.rmtree(self.tmp)
+
+    def bound_to_reader(self, **kwargs) -> bool:
+        with self.app.test_request_context('/api/accounts', **kwargs):
+            self.app.preprocess_request()
+            return db.session.get_bind() is self.app.extensions['db_reader']
+
+    def test_get_reads_from_reader(self):
+        """Test GETs on routed blueprints use the read-only engine and others do not"""
+        self.assertTrue(self.bound_to_reader())
+        self.assertFalse(self.bound_to_reader(method='POST'))
+        self.assertFalse(self.bound_to_reader(headers={'X-Read-Primary': '1'}))
+        self.assertEqual(self.client.get('/api/accounts').status_code, 200)
+
+    def test_reader_is_read_only(self):
+        """Test the read engine refuses writes"""
+        with self.app.app_context():
+            with self.app.extensions['db_reader'].connect() as connection:
+                with self.assertRaises(Exception):
+                    connection.exec_driver_sql("DELETE FROM accounts")
+
+    def test_read_your_writes(self):
+        """Test a client's reads stay on the primary right after it writes"""
+        response = self.client.post('/api/accounts', json={'number': 'CR01', 'currency': 'CRC', 'balance': 0})
+        self.assertEqual(response.status_code, 201)
+        cookie = self.client.get_cookie('read_primary_until')
+        self.assertIsNotNone(cookie)
+
+        self.assertFalse(self.bound_to_reader(headers={'Cookie': f'read_primary_until={cookie.value}'}))
+        with self.app.app_context():
+            self.assertEqual(Account.query.count(), 1)
+
+    def test_transfer_on_lane_keeps_reads_on_primary(self):
+        """Test a transfer posted on a lane thread still sets the read-your-writes cookie"""
+        self.app.config['SECRET_KEY'] = 'test'
+        self.app.extensions['bank_registry'] = BankRegistry(BANKS_PATH)
+        self.app.extensions['transfer_executor'] = TransferExecutor(self.app, lanes=2)
+        with self.app.app_context():
+            user = User(name='ana', email='ana@example.com', phone='88881111', password_hash='x')
+            sender = Account(number='CR01', currency='CRC', balance=Decimal('1000.00'))
+            db.session.add_all([user, sender, Account(number='CR02', currency='CRC', balance=Decimal('0.00'))])
+            db.session.flush()
+            db.session.add(UserAccount(user_id=user.id, account_id=sender.id))
+            db.session.commit()
+            user_id = user.id
+        with self.client.session_transaction() as session:
+            session['user_id'] = user_id
+
+        transfer = {
+            'version': '1.0', 'timestamp': '2024-01-01T10:00:00', 'transaction_id': 'tx-1',
+            'sender': {'account_number': 'CR01', 'bank_code': '0666', 'name': 'Ana'},
+            'receiver': {'account_number': 'CR02', 'bank_code': '0666', 'name': 'Luis'},
+            'amount': {'value': 100.0, 'currency': 'CRC'}
+        }
+        signature = generate_hmac('CR01', transfer['timestamp'], 'tx-1', 100.0)
+        response = self.client.post('/api/sinpe-transfer', json=transfer, headers={
+            'X-SINPE-Token': 'token', 'X-SINPE-Signature': signature
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(self.client.get_cookie('read_primary_until'))
+
+if __name__ == '__main__':
+    unittest.main()
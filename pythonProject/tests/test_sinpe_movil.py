@@ -0,0 +1,98 @@
+"""
+Test SINPE mobile transfers only hold the transfer lane for their postings
+"""
+
+import threading
+import unittest
+from decimal import Decimal
+from unittest import mock
+from flask import Flask
+from app.models import db, Account, PhoneLink, SinpeSubscription, Transaction
+from app.services.group_commit import GroupCommitter
+from app.services.sinpe_service import SinpeService
+from app.services.transfer_executor import TransferExecutor
+
+class TestSinpeMovil(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.app.extensions['transfer_executor'] = TransferExecutor(self.app, lanes=2)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.sender = Account(number='CR01', currency='CRC', balance=Decimal('1000.00'))
+        receiver = Account(number='CR02', currency='CRC', balance=Decimal('0.00'))
+        db.session.add_all([
+            self.sender, receiver,
+            PhoneLink(account_number='CR01', phone='88880001'),
+            PhoneLink(account_number='CR02', phone='88880002'),
+            SinpeSubscription(sinpe_number='88880002', sinpe_bank_code='0666', sinpe_client_name='Local'),
+            SinpeSubscription(sinpe_number='88889999', sinpe_bank_code='0152', sinpe_client_name='Remote')
+        ])
+        db.session.commit()
+        self.threads = []
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _peer(self, success: bool):
+        def call(*args):
+            self.threads.append(threading.current_thread().name)
+            return {'success': True, 'message': 'ok'} if success else {'success': False, 'error': 'Banco caído'}
+        return mock.patch.object(SinpeService, '_process_external_sinpe_movil', side_effect=call)
+
+    def test_local_transfer_posts_on_the_lane(self):
+        """Test a local transfer completes and is posted on a lane thread"""
+        post = SinpeService._post_sinpe_movil
+
+        def recorded(*args, **kwargs):
+            self.threads.append(threading.current_thread().name)
+            return post(*args, **kwargs)
+
+        with mock.patch.object(SinpeService, '_post_sinpe_movil', side_effect=recorded):
+            result = SinpeService.execute_sinpe_movil('88880001', '88880002', 100)
+
+        self.assertEqual(result['status'], 'completed')
+        self.assertTrue(self.threads[0].startswith('transfer-lane-'))
+        self.assertEqual(self.sender.balance, Decimal('900.00'))
+
+    def test_peer_is_called_outside_the_lane(self):
+        """Test the peer bank is called from the request thread after the debit is reserved"""
+        with self._peer(True):
+            result = SinpeService.execute_sinpe_movil('88880001', '88889999', 100)
+
+        self.assertEqual(self.threads, [threading.current_thread().name])
+        self.assertEqual(result['status'], 'completed')
+        self.assertIsNone(result['to_account_id'])
+        self.assertEqual(self.sender.balance, Decimal('900.00'))
+
+    def test_group_commit_only_receives_the_postings(self):
+        """Test with group commit the peer call stays in the request thread"""
+        self.app.extensions['group_committer'] = GroupCommitter(self.app, window=0.01)
+        post = SinpeService._post_sinpe_movil
+
+        def recorded(*args, **kwargs):
+            self.threads.append(threading.current_thread().name)
+            return post(*args, **kwargs)
+
+        with self._peer(True), mock.patch.object(SinpeService, '_post_sinpe_movil', side_effect=recorded):
+            result = SinpeService.execute_sinpe_movil('88880001', '88889999', 100)
+
+        self.assertEqual(self.threads, ['group-committer', threading.current_thread().name])
+        self.assertEqual(result['status'], 'completed')
+
+    def test_refused_external_transfer_is_reversed(self):
+        """Test a transfer the peer refuses is marked failed and the debit credited back"""
+        with self._peer(False), self.assertRaisesRegex(Exception, 'Banco caído'):
+            SinpeService.execute_sinpe_movil('88880001', '88889999', 100)
+
+        self.assertEqual(Transaction.query.one().status, 'failed')
+        self.assertEqual(self.sender.balance, Decimal('1000.00'))
+
+if __name__ == '__main__':
+    unittest.main()
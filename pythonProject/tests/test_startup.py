@@ -0,0 +1,36 @@
+"""
+Test heavy optional dependencies stay off the startup path
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def imported_modules(code: str) -> set:
+    """Modules loaded after running code in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, '-c', f"{code}; import sys; print('\\n'.join(sys.modules))"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    return set(result.stdout.split())
+
+class TestStartup(unittest.TestCase):
+
+    def test_api_startup_skips_external_clients(self):
+        """Test building the full app does not import psycopg2 or requests"""
+        modules = imported_modules("from app import create_app; create_app()")
+        self.assertIn('app.routes.sinpe_routes', modules)
+        self.assertNotIn('psycopg2', modules)
+        self.assertNotIn('requests', modules)
+
+    def test_cli_startup_skips_http_stack(self):
+        """Test database-only apps skip blueprints and sessions"""
+        modules = imported_modules("from app import create_app; create_app(with_routes=False)")
+        self.assertNotIn('flask_session', modules)
+        self.assertNotIn('app.routes.sinpe_routes', modules)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Test trigger-maintained database statistics
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from datetime import datetime, date
+from decimal import Decimal
+from flask import Flask
+from sqlalchemy import create_engine, text
+from app.models import db, User, Account, Transaction, StatCounter
+from app.services.ledger_service import LedgerService
+from app.services.stats_service import StatsService, counter_name
+
+class TestStats(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        db.session.add(User(name='ana', email='ana@example.com', phone='88884444', password_hash='x'))
+        self.crc = Account(number='CR01', currency='CRC', balance=Decimal('1000.00'))
+        self.usd = Account(number='CR02', currency='USD', balance=Decimal('50.00'))
+        db.session.add_all([self.crc, self.usd])
+        db.session.commit()
+        # Installing seeds the counters with the rows that already exist
+        self.assertTrue(StatsService.install_counters())
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_counters_follow_writes(self):
+        """Test counters track inserts, ledger postings and status changes"""
+        other = Account(number='CR03', currency='CRC', balance=Decimal('0.00'))
+        db.session.add(other)
+        tx = Transaction(transaction_id='tx-1', from_account_id=self.crc.id, to_account_id=other.id,
+                         amount=Decimal('200.00'), status='pending', created_at=datetime(2025, 3, 1, 10))
+        db.session.add(tx)
+        db.session.flush()
+        LedgerService.post_transfer('tx-1', self.crc, other, Decimal('200.00'))
+        LedgerService.post_transfer(None, self.usd, None, Decimal('20.00'))
+        tx.status = 'completed'
+        db.session.commit()
+
+        stats = StatsService.get_stats(today=date(2025, 3, 1))
+        self.assertEqual(stats['users'], 1)
+        self.assertEqual(stats['accounts'], 3)
+        self.assertEqual(stats['transactions'], 1)
+        self.assertEqual(stats['transactions_today'], 1)
+        self.assertEqual(stats['transactions_completed'], 1)
+        self.assertEqual(stats.get('transactions_pending', 0), 0)
+        self.assertEqual(stats['total_balance_crc'], Decimal('1000.00'))
+        self.assertEqual(stats['total_balance_usd'], Decimal('30.00'))
+
+        self.assertEqual(StatsService.reconcile(), 0)
+
+    def test_reconcile_repairs_drift(self):
+        """Test the exact recount corrects drifted counters"""
+        db.session.add(StatCounter(key='rows:accounts#5', value=97))
+        db.session.commit()
+
+        self.assertEqual(StatsService.reconcile(), 1)
+        self.assertEqual(StatsService.get_stats()['accounts'], 2)
+
+    def test_installed_triggers_are_not_rechecked(self):
+        """Test get_stats does not query sqlite_master once the triggers are known to exist"""
+        with mock.patch.object(StatsService, 'counters_installed') as check:
+            StatsService.get_stats()
+        check.assert_not_called()
+
+    def test_reconcile_prunes_old_day_counters(self):
+        """Test per-day counters outside the retention window are dropped"""
+        for day in (1, 20, 25):
+            db.session.add(Transaction(transaction_id=f'tx-{day}', from_account_id=self.crc.id,
+                                       to_account_id=self.usd.id, amount=Decimal('1.00'),
+                                       status='completed', created_at=datetime(2025, 3, day, 12)))
+        db.session.commit()
+
+        self.assertEqual(StatsService.reconcile(today=date(2025, 3, 25)), 0)
+        days = {counter_name(row.key) for row in StatCounter.query.filter(StatCounter.key.like('day:%'))}
+        self.assertEqual(days, {'day:2025-03-20', 'day:2025-03-25'})
+        self.assertEqual(StatsService.get_stats(today=date(2025, 3, 25))['transactions_today'], 1)
+
+    def test_counter_updates_are_spread_over_shards(self):
+        """Test inserts add to several rows of a counter, read back as one total"""
+        for n in range(64):
+            db.session.add(Transaction(transaction_id=f'tx-{n}', from_account_id=self.crc.id,
+                                       to_account_id=self.usd.id, amount=Decimal('1.00'), status='completed'))
+        db.session.commit()
+
+        shards = StatCounter.query.filter(StatCounter.key.like('rows:transactions#%')).count()
+        self.assertGreater(shards, 1)
+        self.assertEqual(StatsService.get_stats()['transactions'], 64)
+
+    def test_recount_cached_without_counters(self):
+        """Test databases without counters do not recount on every call"""
+        with mock.patch.object(StatsService, 'counters_supported', return_value=False), \
+                mock.patch.object(StatsService, 'recount', wraps=StatsService.recount) as recount:
+            StatsService.get_stats()
+            self.assertEqual(StatsService.get_stats()['accounts'], 2)
+        self.assertEqual(recount.call_count, 1)
+
+class TestStatsReconcileConcurrency(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.url = f"sqlite:///{os.path.join(self.tmp, 'bank.db')}"
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = self.url
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        db.session.execute(text('PRAGMA journal_mode=WAL'))
+        db.session.add(User(name='ana', email='ana@example.com', phone='88884444', password_hash='x'))
+        db.session.commit()
+        StatsService.install_counters()
+        self.writer = create_engine(self.url)
+
+    def tearDown(self):
+        self.writer.dispose()
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        shutil.rmtree(self.tmp)
+
+    def test_writers_proceed_during_reconcile(self):
+        """Test a write committed while the recount runs is neither blocked nor lost"""
+        recount = StatsService.recount
+
+        def recount_with_concurrent_insert(*args, **kwargs):
+            with self.writer.begin() as conn:
+                conn.execute(text("PRAGMA busy_timeout = 0"))
+                conn.execute(text(
+                    "INSERT INTO users (name, email, phone, password_hash) VALUES ('luis', 'l@example.com', '1', 'x')"
+                ))
+            return recount(*args, **kwargs)
+
+        with mock.patch.object(StatsService, 'recount', side_effect=recount_with_concurrent_insert):
+            self.assertEqual(StatsService.reconcile(), 0)
+        self.assertEqual(StatsService.get_stats()['users'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Test the local mirror of the BCCR subscription directory
+"""
+
+import os
+import unittest
+from datetime import datetime
+from unittest import mock
+from flask import Flask
+from app.models import db, SinpeSubscription
+from app.services.bank_registry import BankRegistry
+from app.services.subscription_mirror import SubscriptionMirror
+
+BANKS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'banks.json')
+
+def row(phone, bank, name, status='active', changed=1):
+    return {'phone_number': phone, 'bank_code': bank, 'client_name': name,
+            'status': status, 'changed_at': datetime(2024, 1, changed)}
+
+class TestSubscriptionMirror(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.extensions['bank_registry'] = BankRegistry(BANKS_PATH)
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        db.session.add_all([
+            SinpeSubscription(sinpe_number='88887777', sinpe_bank_code='0666', sinpe_client_name='Local User'),
+            SinpeSubscription(sinpe_number='70000000', sinpe_bank_code='0152', sinpe_client_name='Gone User'),
+        ])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def sync(self, batches, full=False):
+        with mock.patch.object(SubscriptionMirror, '_fetch', return_value=iter(batches)) as fetch:
+            SubscriptionMirror.sync(full=full)
+        return fetch
+
+    def test_full_load(self):
+        """Test the first sync loads everything and drops numbers BCCR no longer lists"""
+        self.assertFalse(SubscriptionMirror.is_authoritative())
+        self.sync([[row('71111111', '152', 'Ana')], [row('72222222', '111', 'Luis', changed=2)]])
+
+        numbers = {s.sinpe_number: s.sinpe_bank_code for s in SinpeSubscription.query}
+        self.assertEqual(numbers, {'88887777': '0666', '71111111': '0152', '72222222': '0111'})
+        self.assertEqual(SubscriptionMirror.state().watermark, '2024-01-02T00:00:00')
+        self.assertTrue(SubscriptionMirror.is_authoritative())
+
+    def test_incremental_changes(self):
+        """Test later syncs fetch from the watermark and apply deactivations"""
+        self.sync([[row('71111111', '152', 'Ana')]])
+        fetch = self.sync([[row('71111111', '152', 'Ana', status='inactive', changed=3),
+                            row('88887777', '666', 'Local User', status='inactive', changed=3)]])
+
+        self.assertEqual(fetch.call_args[0][1], ('2024-01-01T00:00:00',))
+        self.assertEqual([s.sinpe_number for s in SinpeSubscription.query], ['88887777'])
+
+    def test_failure_is_recorded(self):
+        """Test a failed sync leaves the mirror non-authoritative and records the error"""
+        with mock.patch.object(SubscriptionMirror, '_fetch', side_effect=ConnectionError('BCCR down')):
+            with self.assertRaises(ConnectionError):
+                SubscriptionMirror.sync()
+
+        self.assertEqual(SubscriptionMirror.state().last_error, 'BCCR down')
+        self.assertFalse(SubscriptionMirror.is_authoritative())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Test request tracing, propagation and export
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from flask import Flask, jsonify
+from app.models import db, Account
+from app.middleware.tracing import init_tracing
+from app.services.tracing import Tracer, parse_traceparent
+from app.services.transfer_executor import TransferExecutor
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+
+class TestTracing(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'traces.jsonl')
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['TRACE_SAMPLE_RATE'] = 1.0
+        self.app.config['TRACE_EXPORT_PATH'] = self.path
+        db.init_app(self.app)
+        init_tracing(self.app)
+        with self.app.app_context():
+            db.create_all()
+        
+        executor = TransferExecutor(self.app, lanes=2)
+        
+        @self.app.route('/api/accounts')
+        def accounts():
+            with Tracer.span('load_accounts'):
+                count = Account.query.count()
+            lane = executor.run('CR01', lambda: Tracer.current().trace_id)
+            return jsonify({'count': count, 'lane_trace': lane, 'outbound': Tracer.inject({})})
+    
+    def tearDown(self):
+        Tracer.configure(None)
+        with self.app.app_context():
+            db.drop_all()
+        shutil.rmtree(self.tmp)
+    
+    def exported(self) -> list:
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline:
+            if os.path.exists(self.path) and os.path.getsize(self.path):
+                with open(self.path) as f:
+                    return [json.loads(line) for line in f]
+            time.sleep(0.01)
+        return []
+    
+    def test_parse_traceparent(self):
+        """Test valid headers parse and malformed ones are ignored"""
+        self.assertEqual(parse_traceparent(f'00-{TRACE_ID}-00f067aa0ba902b7-01'), (TRACE_ID, '00f067aa0ba902b7', True))
+        self.assertIsNone(parse_traceparent('00-xyz-00f067aa0ba902b7-01'))
+        self.assertIsNone(parse_traceparent(None))
+    
+    def test_request_trace_is_exported(self):
+        """Test a sampled request exports its root, custom and SQL spans under the caller's trace id"""
+        response = self.app.test_client().get(
+            '/api/accounts', headers={'traceparent': f'00-{TRACE_ID}-00f067aa0ba902b7-01'}
+        )
+        body = response.get_json()
+        self.assertEqual(response.headers['X-Trace-Id'], TRACE_ID)
+        self.assertEqual(body['lane_trace'], TRACE_ID)
+        self.assertTrue(body['outbound']['traceparent'].startswith(f'00-{TRACE_ID}-'))
+        
+        traces = self.exported()
+        self.assertEqual(len(traces), 1)
+        spans = traces[0]['resourceSpans'][0]['scopeSpans'][0]['spans']
+        names = {span['name'] for span in spans}
+        self.assertIn('GET /api/accounts', names)
+        self.assertIn('load_accounts', names)
+        self.assertIn('db.query', names)
+        self.assertTrue(all(span['traceId'] == TRACE_ID for span in spans))
+        root = next(span for span in spans if span['name'] == 'GET /api/accounts')
+        self.assertEqual(root['parentSpanId'], '00f067aa0ba902b7')
+    
+    def test_unsampled_request_is_not_exported(self):
+        """Test an unsampled parent is followed: ids propagate but nothing is exported"""
+        response = self.app.test_client().get(
+            '/api/accounts', headers={'traceparent': f'00-{TRACE_ID}-00f067aa0ba902b7-00'}
+        )
+        self.assertTrue(response.get_json()['outbound']['traceparent'].endswith('-00'))
+        time.sleep(0.05)
+        self.assertFalse(os.path.exists(self.path))
+    
+    def test_sampled_flag_ignored_from_untrusted_callers(self):
+        """Test a remote caller cannot force sampling; the trace id is still continued"""
+        Tracer.sample_rate = 0.0
+        client = self.app.test_client()
+        headers = {'traceparent': f'00-{TRACE_ID}-00f067aa0ba902b7-01'}
+        
+        response = client.get('/api/accounts', headers=headers, environ_base={'REMOTE_ADDR': '10.0.0.5'})
+        self.assertEqual(response.headers['X-Trace-Id'], TRACE_ID)
+        self.assertTrue(response.get_json()['outbound']['traceparent'].endswith('-00'))
+        
+        # Admins (here: localhost) may still force a trace
+        response = client.get('/api/accounts', headers=headers)
+        self.assertTrue(response.get_json()['outbound']['traceparent'].endswith('-01'))
+        self.assertEqual(len(self.exported()), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Test per-account transfer lanes
+"""
+
+import threading
+import time
+import unittest
+from flask import Flask
+from app.services.transfer_executor import TransferExecutor, LaneFullError
+
+class TestTransferExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = TransferExecutor(Flask(__name__), lanes=4, queue_size=2, enqueue_timeout=0.05)
+
+    def test_same_account_runs_serially(self):
+        """Test transfers of one account never overlap"""
+        active, overlaps = [0], []
+        lock = threading.Lock()
+
+        def transfer():
+            with lock:
+                active[0] += 1
+                overlaps.append(active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+
+        self.executor = TransferExecutor(Flask(__name__), lanes=4, queue_size=50)
+        futures = [self.executor.submit('CR01', transfer) for _ in range(10)]
+        for future in futures:
+            future.result()
+        self.assertEqual(max(overlaps), 1)
+
+    def test_different_lanes_run_in_parallel(self):
+        """Test a blocked account does not hold up accounts on other lanes"""
+        keys = ['CR01', next(k for k in (f'CR{n:02d}' for n in range(2, 100))
+                             if self.executor.lane_for(k) != self.executor.lane_for('CR01'))]
+        release = threading.Event()
+        blocked = self.executor.submit(keys[0], release.wait, 5)
+
+        self.assertEqual(self.executor.run(keys[1], lambda: 'done'), 'done')
+        self.assertFalse(blocked.done())
+        release.set()
+        self.assertTrue(blocked.result())
+
+    def test_full_lane_is_refused(self):
+        """Test submissions beyond the lane queue raise LaneFullError"""
+        release = threading.Event()
+        started = threading.Event()
+
+        def hold():
+            started.set()
+            release.wait(5)
+
+        self.executor.submit('CR01', hold)
+        started.wait(1)
+        self.executor.submit('CR01', lambda: None)
+        self.executor.submit('CR01', lambda: None)
+        with self.assertRaises(LaneFullError):
+            self.executor.submit('CR01', lambda: None)
+        release.set()
+
+    def test_errors_reach_the_caller(self):
+        """Test an exception raised on the lane is re-raised by run()"""
+        def fail():
+            raise ValueError('Fondos insuficientes')
+
+        with self.assertRaises(ValueError):
+            self.executor.run('CR01', fail)
+
+if __name__ == '__main__':
+    unittest.main()